@@ -1,5 +1,3 @@
-import pkg_resources
-
 from .monkey import patch, patch_all  # noqa: E402
 from .pin import Pin  # noqa: E402
 from .span import Span  # noqa: E402
@@ -7,11 +5,29 @@ from .tracer import Tracer  # noqa: E402
 from .settings import config  # noqa: E402
 from .utils.deprecation import deprecated  # noqa: E402
 
-try:
-    __version__ = pkg_resources.get_distribution(__name__).version
-except pkg_resources.DistributionNotFound:
-    # package is not installed
-    __version__ = "dev"
+
+def _get_version():
+    try:
+        # DEV: importlib.metadata is much faster to import than pkg_resources
+        import importlib.metadata as importlib_metadata
+    except ImportError:
+        # Python < 3.8
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution(__name__).version
+        except pkg_resources.DistributionNotFound:
+            # package is not installed
+            return "dev"
+
+    try:
+        return importlib_metadata.version(__name__)
+    except importlib_metadata.PackageNotFoundError:
+        # package is not installed
+        return "dev"
+
+
+__version__ = _get_version()
 
 
 # a global tracer instance with integration settings
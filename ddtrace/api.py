@@ -6,6 +6,7 @@ from json import loads
 from .encoding import Encoder, JSONEncoder
 from .compat import httplib, PYTHON_VERSION, PYTHON_INTERPRETER, get_connection_response
 from .internal import uds
+from .internal._encoding import Packer
 from .internal.logger import get_logger
 from .internal.runtime import container
 from .payload import Payload, PayloadFull
@@ -97,12 +98,25 @@ class API(object):
     """
 
     TRACE_COUNT_HEADER = "X-Datadog-Trace-Count"
+    CLIENT_COMPUTED_STATS_HEADER = "Datadog-Client-Computed-Stats"
+
+    STATS_ENDPOINT = "/v0.6/stats"
 
     # Default timeout when establishing HTTP connection and sending/receiving from socket.
     # This ought to be enough as the agent is local
     TIMEOUT = 2
 
-    def __init__(self, hostname, port, uds_path=None, https=False, headers=None, encoder=None, priority_sampling=False):
+    def __init__(
+        self,
+        hostname,
+        port,
+        uds_path=None,
+        https=False,
+        headers=None,
+        encoder=None,
+        priority_sampling=False,
+        client_computed_stats=False,
+    ):
         """Create a new connection to the Tracer API.
 
         :param hostname: The hostname.
@@ -111,6 +125,7 @@ class API(object):
         :param headers: The headers to pass along the request.
         :param encoder: The encoder to use to serialize data.
         :param priority_sampling: Whether to use priority sampling.
+        :param client_computed_stats: Whether the trace statistics are computed by the tracer.
         """
         self.hostname = hostname
         self.port = int(port)
@@ -134,8 +149,12 @@ class API(object):
             }
         )
 
+        # Tell the agent not to compute statistics from the traces we send: they are sent with `send_stats`
+        if client_computed_stats:
+            self._headers[self.CLIENT_COMPUTED_STATS_HEADER] = "yes"
+
         # Add container information if we have it
-        self._container_info = container.get_container_info()
+        self._container_info = container.get_cached_container_info()
         if self._container_info and self._container_info.container_id:
             self._headers.update(
                 {
@@ -236,13 +255,27 @@ class API(object):
 
         return response
 
+    def send_stats(self, stats):
+        """Send trace statistics to the API.
+
+        :param stats: The statistics payload computed by a :class:`ddtrace.internal.stats.SpanStatsConcentrator`.
+        :return: The API HTTP response or the exception raised while sending the statistics.
+        """
+        try:
+            return self._put(self.STATS_ENDPOINT, Packer().pack(stats), headers={"Content-Type": "application/msgpack"})
+        except (httplib.HTTPException, OSError, IOError) as e:
+            return e
+
     @deprecated(message="Sending services to the API is no longer necessary", version="1.0.0")
     def send_services(self, *args, **kwargs):
         return
 
-    def _put(self, endpoint, data, count):
-        headers = self._headers.copy()
-        headers[self.TRACE_COUNT_HEADER] = str(count)
+    def _put(self, endpoint, data, count=None, headers=None):
+        request_headers = self._headers.copy()
+        if headers:
+            request_headers.update(headers)
+        if count is not None:
+            request_headers[self.TRACE_COUNT_HEADER] = str(count)
 
         if self.uds_path is None:
             if self.https:
@@ -253,7 +286,7 @@ class API(object):
             conn = uds.UDSHTTPConnection(self.uds_path, self.https, self.hostname, self.port, timeout=self.TIMEOUT)
 
         try:
-            conn.request("PUT", endpoint, data, headers)
+            conn.request("PUT", endpoint, data, request_headers)
 
             # Parse the HTTPResponse into an API.Response
             # DEV: This will call `resp.read()` which must happen before the `conn.close()` below,
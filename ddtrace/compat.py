@@ -1,3 +1,4 @@
+import inspect
 import platform
 import random
 import re
@@ -112,7 +113,14 @@ else:
 
 
 if PYTHON_VERSION_INFO[0:2] >= (3, 4):
-    from asyncio import iscoroutinefunction
+
+    def iscoroutinefunction(fn):
+        # DEV: asyncio is slow to import and generator-based coroutines can only be created once it is imported:
+        #      until then, only native coroutines can exist.
+        asyncio = sys.modules.get("asyncio")
+        if asyncio is not None:
+            return asyncio.iscoroutinefunction(fn)
+        return getattr(inspect, "iscoroutinefunction", lambda fn: False)(fn)
 
     # Execute from a string to get around syntax errors from `yield from`
     # DEV: The idea to do this was stolen from `six`
@@ -121,7 +129,6 @@ if PYTHON_VERSION_INFO[0:2] >= (3, 4):
         textwrap.dedent(
             """
     import functools
-    import asyncio
 
 
     def make_async_decorator(tracer, coro, *params, **kw_params):
@@ -135,6 +142,8 @@ if PYTHON_VERSION_INFO[0:2] >= (3, 4):
         :param tuple params: arguments given to the Tracer.trace()
         :param dict kw_params: keyword arguments given to the Tracer.trace()
         \"\"\"
+        import asyncio
+
         @functools.wraps(coro)
         @asyncio.coroutine
         def func_wrapper(*args, **kwargs):
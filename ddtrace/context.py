@@ -1,10 +1,9 @@
 import logging
 import threading
 
-from .constants import HOSTNAME_KEY, SAMPLING_PRIORITY_KEY, ORIGIN_KEY, LOG_SPAN_KEY
+from .constants import SAMPLING_PRIORITY_KEY, ORIGIN_KEY, LOG_SPAN_KEY
+from .internal import active_spans
 from .internal.logger import get_logger
-from .internal import hostname
-from .settings import config
 from .utils.formats import asbool, get_env
 
 log = get_logger(__name__)
@@ -123,11 +122,15 @@ class Context(object):
             self._trace.append(span)
             span._context = self
 
+        active_spans.on_span_added(span)
+
     def close_span(self, span):
         """
         Mark a span as a finished, increasing the internal counter to prevent
         cycles inside _trace list.
         """
+        active_spans.on_span_closed(span)
+
         with self._lock:
             self._finished_spans += 1
 
@@ -175,11 +178,6 @@ class Context(object):
                 if sampled and origin is not None and trace:
                     trace[0].meta[ORIGIN_KEY] = str(origin)
 
-                # Set hostname tag if they requested it
-                if config.report_hostname:
-                    # DEV: `get_hostname()` value is cached
-                    trace[0].meta[HOSTNAME_KEY] = hostname.get_hostname()
-
                 # clean the current state
                 self._trace = []
                 self._finished_spans = 0
@@ -202,11 +200,6 @@ class Context(object):
                     if sampled and origin is not None and trace:
                         trace[0].meta[ORIGIN_KEY] = str(origin)
 
-                    # Set hostname tag if they requested it
-                    if config.report_hostname:
-                        # DEV: `get_hostname()` value is cached
-                        trace[0].meta[HOSTNAME_KEY] = hostname.get_hostname()
-
                     self._finished_spans = 0
 
                     # Any open spans will remain as `self._trace`
@@ -2,9 +2,10 @@ from importlib import import_module
 
 from ddtrace.vendor.wrapt import wrap_function_wrapper as _w
 
-from .quantize import quantize
+from .quantize import QUANTIZE_PROCESSOR
 
 from ...compat import urlencode
+from ...internal import processor
 from ...constants import ANALYTICS_SAMPLE_RATE_KEY, SPAN_MEASURED_KEY
 from ...ext import SpanTypes, elasticsearch as metadata, http
 from ...pin import Pin
@@ -23,6 +24,8 @@ def _es_modules():
 
 # NB: We are patching the default elasticsearch.transport module
 def patch():
+    # Resources are quantized by the writer
+    processor.processors.register(QUANTIZE_PROCESSOR)
     for elasticsearch in _es_modules():
         _patch(elasticsearch)
 
@@ -36,6 +39,7 @@ def _patch(elasticsearch):
 
 
 def unpatch():
+    processor.processors.unregister(QUANTIZE_PROCESSOR)
     for elasticsearch in _es_modules():
         _unpatch(elasticsearch)
 
@@ -78,8 +82,6 @@ def _get_perform_request(elasticsearch):
             # set analytics sample rate
             span.set_tag(ANALYTICS_SAMPLE_RATE_KEY, config.elasticsearch.get_analytics_sample_rate())
 
-            span = quantize(span)
-
             try:
                 result = func(*args, **kwargs)
             except elasticsearch.exceptions.TransportError as e:
@@ -1,6 +1,7 @@
 import re
 
-from ...ext import elasticsearch as metadata
+from ...ext import SpanTypes, elasticsearch as metadata
+from ...internal import processor
 
 # Replace any ID
 ID_REGEXP = re.compile(r"/([0-9]+)([/\?]|$)")
@@ -32,3 +33,18 @@ def quantize(span):
     span.resource = "{method} {url}".format(method=method, url=quantized_url)
 
     return span
+
+
+class QuantizeProcessor(processor.SpanProcessor):
+    """Quantize the elasticsearch spans from the writer thread."""
+
+    stage = processor.NORMALIZATION
+
+    def process_trace(self, trace):
+        for span in trace:
+            # DEV: spans of unsampled traces are not instrumented and have no url
+            if span.span_type == SpanTypes.ELASTICSEARCH.value and span.get_tag(metadata.URL) is not None:
+                quantize(span)
+
+
+QUANTIZE_PROCESSOR = QuantizeProcessor()
@@ -2,9 +2,10 @@
 #   `elasticsearch`, `elasticsearch1`, `elasticsearch2`, `elasticsearch5`, 'elasticsearch6'
 from .elasticsearch import elasticsearch
 
-from .quantize import quantize
+from .quantize import QUANTIZE_PROCESSOR
 
 from ...constants import SPAN_MEASURED_KEY
+from ...internal import processor
 from ...utils.deprecation import deprecated
 from ...compat import urlencode
 from ...ext import SpanTypes, http, elasticsearch as metadata
@@ -15,6 +16,9 @@ DEFAULT_SERVICE = "elasticsearch"
 
 @deprecated(message="Use patching instead (see the docs).", version="1.0.0")
 def get_traced_transport(datadog_tracer, datadog_service=DEFAULT_SERVICE):
+    # Resources are quantized by the writer
+    processor.processors.register(QUANTIZE_PROCESSOR)
+
     class TracedTransport(elasticsearch.Transport):
         """Extend elasticseach transport layer to allow Datadog
         tracer to catch any performed request.
@@ -38,8 +42,6 @@ def get_traced_transport(datadog_tracer, datadog_service=DEFAULT_SERVICE):
                     s.set_tag(http.QUERY_STRING, urlencode(params))
                 if method == "GET":
                     s.set_tag(metadata.BODY, self.serializer.dumps(body))
-                s = quantize(s)
-
                 try:
                     result = super(TracedTransport, self).perform_request(method, url, params=params, body=body)
                 except elasticsearch.exceptions.TransportError as e:
@@ -4,6 +4,7 @@ This module contains utility functions for writing ddtrace integrations.
 from ddtrace import Pin
 from ddtrace.ext import http
 import ddtrace.http
+from ddtrace.internal import self_telemetry
 from ddtrace.internal.logger import get_logger
 import ddtrace.utils.wrappers
 from ddtrace.vendor import wrapt
@@ -45,6 +46,8 @@ def with_traced_module(func):
             elif not pin:
                 log.debug("Pin not found for traced method %r", wrapped)
                 return wrapped(*args, **kwargs)
+            if self_telemetry.enabled:
+                return self_telemetry.measure_integration(mod.__name__, func, mod, pin, wrapped, instance, args, kwargs)
             return func(mod, pin, wrapped, instance, args, kwargs)
 
         return wrapper
@@ -1,9 +1,83 @@
+import abc
 import re
 
 from .ext import http
+from .internal.logger import get_logger
+from .vendor import six
 
+log = get_logger(__name__)
 
-class FilterRequestsOnUrl(object):
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class TraceFilter(six.with_metaclass(abc.ABCMeta)):
+    """Base class for the trace filters.
+
+    Filters are applied by the writer, from its background thread, on each batch
+    of traces it flushes, so they do not add any latency to the traced code.
+    """
+
+    @abc.abstractmethod
+    def process_trace(self, trace):
+        """Process a trace.
+
+        :param list trace: The list of spans of the trace.
+        :return: The trace to send or None to discard it.
+        """
+
+    def process_traces(self, traces):
+        """Process a batch of traces.
+
+        The default implementation calls :meth:`process_trace` on each trace.
+        Filters that can process the whole batch at once should override it.
+
+        :param list traces: A list of traces.
+        :return: The list of traces to send.
+        """
+        processed = []
+        for trace in traces:
+            trace = self.process_trace(trace)
+            if trace:
+                processed.append(trace)
+        return processed
+
+
+def _process_traces(filters, traces):
+    """Apply the filters on a batch of traces.
+
+    Filters that do not implement ``process_traces`` are applied trace per trace.
+    A filter that fails keeps the traces it was applied to unchanged.
+
+    :param list filters: The filters to apply, in order.
+    :param list traces: A list of traces.
+    :return: The list of traces to send.
+    """
+    for filtr in filters:
+        if not traces:
+            break
+
+        process_traces = getattr(filtr, "process_traces", None)
+        if process_traces is not None:
+            try:
+                traces = process_traces(traces) or []
+            except Exception:
+                log.error("error while applying filter %s to traces", filtr, exc_info=True)
+            continue
+
+        processed = []
+        for trace in traces:
+            try:
+                trace = filtr.process_trace(trace)
+            except Exception:
+                log.error("error while applying filter %s to traces", filtr, exc_info=True)
+            if trace:
+                processed.append(trace)
+        traces = processed
+
+    return traces
+
+
+class FilterRequestsOnUrl(TraceFilter):
     r"""Filter out traces from incoming http requests based on the request's url.
 
     This class takes as argument a list of regular expression patterns
@@ -33,6 +107,33 @@ class FilterRequestsOnUrl(object):
         if isinstance(regexps, str):
             regexps = [regexps]
         self._regexps = [re.compile(regexp) for regexp in regexps]
+        # Match all the patterns at once with a single alternation, unless they can't be combined
+        # (e.g. patterns with different flags, back references or global inline flags)
+        self._regexp = None
+        if (
+            self._regexps
+            and len(set(regexp.flags for regexp in self._regexps)) == 1
+            and not any(_BACKREFERENCE.search(regexp.pattern) for regexp in self._regexps)
+        ):
+            try:
+                self._regexp = re.compile(
+                    "|".join("(?:%s)" % regexp.pattern for regexp in self._regexps), self._regexps[0].flags
+                )
+            except re.error:
+                pass
+
+    def _match(self, url):
+        if self._regexp is not None:
+            return self._regexp.match(url) is not None
+        return any(regexp.match(url) for regexp in self._regexps)
+
+    def _keep(self, trace):
+        for span in trace:
+            if span.parent_id is None:
+                url = span.get_tag(http.URL)
+                if url is not None and self._match(url):
+                    return False
+        return True
 
     def process_trace(self, trace):
         """
@@ -41,10 +142,10 @@ class FilterRequestsOnUrl(object):
         be fed to the next filter in the list. If process_trace returns None,
         the whole trace is discarded.
         """
-        for span in trace:
-            if span.parent_id is None and span.get_tag(http.URL) is not None:
-                url = span.get_tag(http.URL)
-                for regexp in self._regexps:
-                    if regexp.match(url):
-                        return None
-        return trace
+        if self._keep(trace):
+            return trace
+        return None
+
+    def process_traces(self, traces):
+        """Discard the traces whose root span url matches any of the patterns."""
+        return [trace for trace in traces if self._keep(trace)]
@@ -13,6 +13,10 @@ RESPONSE = 'response'
 # starting a "new object" on the UI.
 NORMALIZE_PATTERN = re.compile(r'([^a-z0-9_\-:/]){1}')
 
+# Traced header names are mostly the same from one request to another: cache their normalized tag names
+_NORMALIZED_TAG_NAMES_MAX_SIZE = 512
+_normalized_tag_names = {}
+
 
 def store_request_headers(headers, span, integration_config):
     """
@@ -86,5 +90,14 @@ def _normalize_tag_name(request_or_response, header_name):
     #   - any letter is converted to lowercase
     #   - any digit is left unchanged
     #   - any block of any length of different ASCII chars is converted to a single underscore '_'
+    key = (request_or_response, header_name)
+    try:
+        return _normalized_tag_names[key]
+    except KeyError:
+        pass
+
     normalized_name = NORMALIZE_PATTERN.sub('_', normalize_header_name(header_name))
-    return 'http.{}.headers.{}'.format(request_or_response, normalized_name)
+    tag_name = 'http.{}.headers.{}'.format(request_or_response, normalized_name)
+    if len(_normalized_tag_names) < _NORMALIZED_TAG_NAMES_MAX_SIZE:
+        _normalized_tag_names[key] = tag_name
+    return tag_name
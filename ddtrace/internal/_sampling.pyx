@@ -0,0 +1,55 @@
+"""Deterministic trace id sampling.
+
+A trace is kept when the Knuth multiplicative hash of its trace id, modulo 2**64, is lower than or equal to the sample
+rate scaled to 2**64. Any tracer using the same hash and factor takes the same decision for a given trace id, which
+keeps the sampling decisions consistent across services.
+
+The hash is computed with unsigned 64-bit C arithmetic, which wraps modulo 2**64, instead of Python integers.
+"""
+from libc.stdint cimport uint64_t
+
+
+cdef uint64_t KNUTH_FACTOR = 1111111111111111111
+cdef uint64_t MAX_THRESHOLD = 0xFFFFFFFFFFFFFFFF
+
+
+cpdef uint64_t threshold(double sample_rate):
+    """Return the hash threshold of a sample rate.
+
+    :param sample_rate: The sample rate, between 0 and 1.
+    :return: The largest hash value of the trace ids to keep.
+    """
+    if sample_rate >= 1.0:
+        return MAX_THRESHOLD
+    if sample_rate <= 0.0:
+        return 0
+    # DEV: sample_rate * 2**64 is exact and lower than 2**64, the cast truncates it, which keeps the same decisions
+    #      as comparing the hash to the floating point value
+    return <uint64_t>(sample_rate * 18446744073709551616.0)
+
+
+cdef inline uint64_t _to_uint64(object trace_id) except? 0:
+    try:
+        return trace_id
+    except OverflowError:
+        # Trace ids are 64-bit but propagated ones may be out of range: the hash only depends on the 64 lowest bits
+        return trace_id & MAX_THRESHOLD
+
+
+cpdef bint sample(object trace_id, uint64_t threshold):
+    """Return whether the trace with the given id is kept.
+
+    :param trace_id: The trace id.
+    :param threshold: The hash threshold returned by :func:`threshold`.
+    """
+    return <uint64_t>(_to_uint64(trace_id) * KNUTH_FACTOR) <= threshold
+
+
+def sample_many(trace_ids, uint64_t threshold):
+    """Return the sampling decisions of many trace ids at once.
+
+    :param trace_ids: An iterable of trace ids.
+    :param threshold: The hash threshold returned by :func:`threshold`.
+    :return: A list of booleans, ``True`` for the trace ids to keep.
+    """
+    return [<uint64_t>(_to_uint64(trace_id) * KNUTH_FACTOR) <= threshold for trace_id in trace_ids]
@@ -0,0 +1,123 @@
+"""
+Record the active span of each thread.
+
+Once enabled, the spans added to and closed in a ``Context`` update the active span of the thread doing it, so other
+threads (e.g. the profiler) can read it without hooking the creation of every span.
+"""
+import sys
+import threading
+
+from ddtrace.vendor.six.moves import _thread
+
+
+__all__ = [
+    "enable",
+    "disable",
+    "on_span_added",
+    "on_span_closed",
+    "get",
+    "current",
+    "clear_threads",
+    "clear_dead_threads",
+]
+
+
+# Keys are thread ids, values are the span activated last by the thread. `None` when disabled.
+_spans = None
+_get_ident = _thread.get_ident
+_users = 0
+_lock = threading.Lock()
+
+
+def enable(get_ident=None):
+    """Start recording the active span of each thread.
+
+    Each call must be matched by a call to `disable`.
+
+    :param get_ident: The function returning the id of the current thread. By default, the function given by the other
+                      users is kept, and `_thread.get_ident` is used if there is none.
+    """
+    global _spans, _get_ident, _users
+
+    with _lock:
+        _users += 1
+        if get_ident is not None:
+            _get_ident = get_ident
+        if _spans is None:
+            _spans = {}
+
+
+def disable():
+    """Stop recording the active span of each thread once every user is done with it."""
+    global _spans, _get_ident, _users
+
+    with _lock:
+        _users = max(0, _users - 1)
+        if _users == 0:
+            _spans = None
+            _get_ident = _thread.get_ident
+
+
+def on_span_added(span):
+    """Record a span added to a context as the active span of the current thread."""
+    spans = _spans
+    if spans is not None:
+        spans[_get_ident()] = span
+
+
+def on_span_closed(span):
+    """Make the parent of a closed span the active span of the current thread."""
+    spans = _spans
+    if spans is not None:
+        thread_id = _get_ident()
+        # The span might have been activated by another thread
+        if spans.get(thread_id) is span:
+            spans[thread_id] = span._parent
+
+
+def get(thread_id):
+    """Return the active span of a thread.
+
+    :param thread_id: The thread id.
+    :return: The span or `None` if the thread has no active span.
+    """
+    spans = _spans
+    if spans is None:
+        return None
+    span = spans.get(thread_id)
+    # The parent of a closed span might have been finished first
+    if span is None or span.finished:
+        return None
+    return span
+
+
+def current():
+    """Return the active span of the current thread.
+
+    :return: The span or `None` if the thread has no active span.
+    """
+    return get(_get_ident())
+
+
+def clear_threads(existing_thread_ids):
+    """Forget the threads that do not exist anymore.
+
+    :param existing_thread_ids: A set of thread ids to keep.
+    """
+    spans = _spans
+    if spans is None:
+        return
+    # Iterate over a copy of the keys since other threads might update the dict
+    for thread_id in list(spans):
+        if thread_id not in existing_thread_ids:
+            spans.pop(thread_id, None)
+
+
+def clear_dead_threads():
+    """Forget the threads that are not running anymore.
+
+    The users that do not track the running threads themselves should call it periodically, otherwise the spans of
+    the threads that exited are kept forever.
+    """
+    if _spans is not None:
+        clear_threads(set(sys._current_frames()))
@@ -0,0 +1,120 @@
+"""
+Thread-safe aggregation of the metrics sent to DogStatsD.
+"""
+import threading
+
+from ..vendor.dogstatsd import DogStatsd
+from .logger import get_logger
+
+
+log = get_logger(__name__)
+
+
+class AggregatingDogStatsd(object):
+    """Aggregate metrics in memory and send them to DogStatsD in batches.
+
+    The buffering of the DogStatsD client is not thread-safe (https://github.com/DataDog/datadogpy/issues/439), so
+    every metric used to be sent in its own packet. This client can be used by several threads at once: it aggregates
+    the metrics until it is flushed, then sends them in as few packets as possible given the maximum payload size of
+    the client.
+
+    Counters are summed and only the last value of a gauge is kept. Every histogram value is sent.
+    """
+
+    def __init__(self, client):
+        """
+        :param client: The `ddtrace.vendor.dogstatsd.DogStatsd` client used to send the metrics.
+        """
+        self.client = client
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Keys are (metric name, tags)
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(metric, tags):
+        return metric, tuple(tags) if tags else None
+
+    def increment(self, metric, value=1, tags=None):
+        key = self._key(metric, tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def decrement(self, metric, value=1, tags=None):
+        self.increment(metric, -value, tags)
+
+    def gauge(self, metric, value, tags=None):
+        key = self._key(metric, tags)
+        with self._lock:
+            self._gauges[key] = value
+
+    def histogram(self, metric, value, tags=None):
+        key = self._key(metric, tags)
+        with self._lock:
+            try:
+                self._histograms[key].append(value)
+            except KeyError:
+                self._histograms[key] = [value]
+
+    def _serialize(self, counters, gauges, histograms):
+        client = self.client
+        for metrics, metric_type in ((counters, "c"), (gauges, "g")):
+            for (metric, tags), value in metrics.items():
+                yield client._serialize_metric(
+                    metric, metric_type, value, client._add_constant_tags(tags and list(tags))
+                )
+        for (metric, tags), values in histograms.items():
+            tags = client._add_constant_tags(tags and list(tags))
+            for value in values:
+                yield client._serialize_metric(metric, "h", value, tags)
+
+    def flush(self):
+        """Send the metrics aggregated since the last flush."""
+        with self._lock:
+            counters, gauges, histograms = self._counters, self._gauges, self._histograms
+            self._reset()
+
+        client = self.client
+        if not client._enabled or not (counters or gauges or histograms):
+            return
+
+        max_size = client._max_payload_size
+        packet = []
+        size = 0
+        nmetrics = 0
+        for line in self._serialize(counters, gauges, histograms):
+            nmetrics += 1
+            # Account for the line break separating the metrics
+            if packet and size + len(line) + 1 > max_size:
+                client._send_to_server("\n".join(packet))
+                packet = []
+                size = 0
+            packet.append(line)
+            size += len(line) + 1
+
+        if packet:
+            client._send_to_server("\n".join(packet))
+
+        if client._telemetry:
+            client.metrics_count += nmetrics
+
+    def __repr__(self):
+        return "{}(client={!r})".format(self.__class__.__name__, self.client)
+
+
+def aggregating(client):
+    """Return a client aggregating the metrics sent to ``client`` until it is flushed.
+
+    :param client: A DogStatsD client, or ``None``.
+    :returns: ``client`` if it can already be flushed, an :class:`AggregatingDogStatsd` wrapping it otherwise.
+    """
+    if client is None or isinstance(client, AggregatingDogStatsd):
+        return client
+    # The vendored client has no flush method and its buffering is not thread-safe
+    if isinstance(client, DogStatsd) or not hasattr(client, "flush"):
+        return AggregatingDogStatsd(client)
+    return client
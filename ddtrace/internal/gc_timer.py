@@ -0,0 +1,96 @@
+"""
+Time the garbage collections of the process.
+
+A single function hooked into ``gc.callbacks`` times every collection for all the users: it keeps the total time spent
+collecting garbage and calls the callbacks registered by the users with the duration of each collection.
+
+``gc.callbacks`` is only available on Python >= 3.3: the collections are not timed otherwise.
+"""
+import gc
+import threading
+
+from ddtrace.compat import monotonic_ns
+
+
+__all__ = [
+    "register",
+    "unregister",
+    "total_ns",
+]
+
+
+# Total time spent collecting garbage since registered, in nanoseconds. `None` when nobody is registered.
+_total_ns = None
+_start_ns = None
+# DEV: replaced rather than updated so it can be iterated without the lock
+_callbacks = ()
+_users = 0
+_lock = threading.Lock()
+
+
+def _on_gc(phase, info):
+    global _total_ns, _start_ns
+
+    if phase == "start":
+        _start_ns = monotonic_ns()
+        duration_ns = None
+    else:
+        start_ns = _start_ns
+        if start_ns is None:
+            # Hooked in the middle of a collection
+            return
+        _start_ns = None
+        duration_ns = monotonic_ns() - start_ns
+        if _total_ns is not None:
+            _total_ns += duration_ns
+
+    for callback in _callbacks:
+        callback(phase, info, duration_ns)
+
+
+def register(callback=None):
+    """Start timing the garbage collections.
+
+    Each call must be matched by a call to `unregister` with the same callback.
+
+    :param callback: A function called with the phase and the information given to the ``gc.callbacks`` and the
+                     duration of the collection in nanoseconds, `None` when it starts.
+    """
+    global _total_ns, _callbacks, _users
+
+    with _lock:
+        _users += 1
+        if callback is not None:
+            _callbacks += (callback,)
+        if _total_ns is None:
+            _total_ns = 0
+            if hasattr(gc, "callbacks"):
+                gc.callbacks.append(_on_gc)
+
+
+def unregister(callback=None):
+    """Stop timing the garbage collections once every user is done with it.
+
+    :param callback: The callback given to `register`.
+    """
+    global _total_ns, _start_ns, _callbacks, _users
+
+    with _lock:
+        if callback is not None:
+            _callbacks = tuple(c for c in _callbacks if c != callback)
+        _users = max(0, _users - 1)
+        if _users == 0 and _total_ns is not None:
+            _total_ns = _start_ns = None
+            if hasattr(gc, "callbacks"):
+                try:
+                    gc.callbacks.remove(_on_gc)
+                except ValueError:
+                    pass
+
+
+def total_ns():
+    """Return the total time spent collecting garbage since registered.
+
+    :return: The time in nanoseconds, or `None` if nobody is registered.
+    """
+    return _total_ns
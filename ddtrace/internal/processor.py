@@ -0,0 +1,125 @@
+"""Span processors applied by the writer on each batch of traces before they are encoded.
+
+Processors enrich, obfuscate or normalize the finished spans from the writer thread, so that this work is not done
+by the application threads while the traced code runs. The processors of a :class:`SpanProcessorChain` run in
+stage order (enrichment, then obfuscation, then normalization) and, within a stage, in registration order.
+
+Writers that are not provided by ddtrace do not run the processors: the tracer runs them on each trace before writing
+it instead.
+"""
+import abc
+import threading
+
+from .. import compat
+from ..constants import HOSTNAME_KEY
+from ..settings import config
+from ..vendor import six
+from . import hostname
+from .logger import get_logger
+
+log = get_logger(__name__)
+
+
+ENRICHMENT = 0
+OBFUSCATION = 1
+NORMALIZATION = 2
+
+
+class SpanProcessor(six.with_metaclass(abc.ABCMeta)):
+    """Base class for the span processors."""
+
+    stage = ENRICHMENT
+
+    @abc.abstractmethod
+    def process_trace(self, trace):
+        """Process the spans of a trace in place.
+
+        :param list trace: The list of spans of the trace.
+        """
+
+    def process_traces(self, traces):
+        """Process a batch of traces in place.
+
+        :param list traces: A list of traces.
+        """
+        for trace in traces:
+            self.process_trace(trace)
+
+    @property
+    def name(self):
+        return self.__class__.__name__
+
+
+class HostnameProcessor(SpanProcessor):
+    """Set the hostname tag on the first span of each trace when ``report_hostname`` is enabled."""
+
+    stage = ENRICHMENT
+
+    def process_trace(self, trace):
+        if config.report_hostname and trace:
+            # DEV: `get_hostname()` value is cached
+            trace[0].meta[HOSTNAME_KEY] = hostname.get_hostname()
+
+    def process_traces(self, traces):
+        if not config.report_hostname:
+            return
+
+        host = hostname.get_hostname()
+        for trace in traces:
+            if trace:
+                trace[0].meta[HOSTNAME_KEY] = host
+
+
+class SpanProcessorChain(object):
+    """Ordered collection of span processors."""
+
+    def __init__(self, processors=None):
+        self._lock = threading.Lock()
+        self._processors = ()
+        for processor in processors or ():
+            self.register(processor)
+
+    def register(self, processor):
+        """Add a processor to the chain.
+
+        Registering the same processor several times has no effect.
+        """
+        with self._lock:
+            if processor in self._processors:
+                return
+            # DEV: the sort is stable so processors of the same stage keep their registration order.
+            # The tuple is replaced rather than updated so that the writer can iterate over it without locking.
+            self._processors = tuple(sorted(self._processors + (processor,), key=lambda p: p.stage))
+
+    def unregister(self, processor):
+        """Remove a processor from the chain."""
+        with self._lock:
+            self._processors = tuple(p for p in self._processors if p is not processor)
+
+    def __iter__(self):
+        return iter(self._processors)
+
+    def __len__(self):
+        return len(self._processors)
+
+    def process_traces(self, traces):
+        """Apply all the processors on a batch of traces.
+
+        A processor that fails is logged and the next processors are still applied.
+
+        :param list traces: A list of traces.
+        :return: The time spent in each processor, as a list of (processor, seconds) tuples.
+        """
+        durations = []
+        for processor in self._processors:
+            start = compat.monotonic()
+            try:
+                processor.process_traces(traces)
+            except Exception:
+                log.error("error while applying processor %s to traces", processor, exc_info=True)
+            durations.append((processor, compat.monotonic() - start))
+        return durations
+
+
+# Processors applied by default by the writers
+processors = SpanProcessorChain([HostnameProcessor()])
@@ -0,0 +1,128 @@
+"""
+Measure the resources used while the local root spans are active.
+
+Once enabled, the CPU time of the thread, the time spent collecting garbage and the bytes allocated by the thread
+between the start and the finish of a local root span are set as metrics of the span:
+
+- the CPU time is only available on Python >= 3.7 or on Linux and is not reported when the span is finished by another
+  thread;
+- the garbage collection time is the one of the whole process, since collecting garbage pauses all the threads. It is
+  timed by :mod:`ddtrace.internal.gc_timer` and only available on Python >= 3.3. It replaces the time of the
+  collections triggered by the thread of the span, reported under the same name by the runtime metrics;
+- the allocated bytes are only counted while the memory profiler runs.
+"""
+import gc
+import threading
+import time
+
+from ddtrace.vendor.six.moves import _thread
+
+from . import gc_timer
+from .runtime.constants import SPAN_ALLOCATED_BYTES
+from .runtime.constants import SPAN_CPU_TIME
+from .runtime.constants import SPAN_GC_TIME
+
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+
+if hasattr(time, "thread_time_ns"):
+    _thread_time_ns = time.thread_time_ns
+elif hasattr(resource, "RUSAGE_THREAD"):
+
+    def _thread_time_ns():
+        usage = resource.getrusage(resource.RUSAGE_THREAD)
+        return int((usage.ru_utime + usage.ru_stime) * 1e9)
+
+
+else:
+
+    def _thread_time_ns():
+        return None
+
+
+def _thread_allocated_bytes():
+    return None
+
+
+__all__ = [
+    "enable",
+    "disable",
+    "on_root_span_start",
+    "on_root_span_finish",
+]
+
+
+_enabled = False
+_users = 0
+_lock = threading.Lock()
+
+
+def enable():
+    """Start measuring the resources used by the local root spans.
+
+    Each call must be matched by a call to `disable`.
+    """
+    global _enabled, _thread_allocated_bytes, _users
+
+    with _lock:
+        _users += 1
+        if not _enabled:
+            # DEV: import the memory profiler only when needed, it imports the whole profiler
+            try:
+                from ddtrace.profiling.collector._memalloc import thread_allocated_bytes
+            except ImportError:
+                pass
+            else:
+                _thread_allocated_bytes = thread_allocated_bytes
+            gc_timer.register()
+            _enabled = True
+
+
+def disable():
+    """Stop measuring the resources used by the local root spans once every user is done with it."""
+    global _enabled, _users
+
+    with _lock:
+        _users = max(0, _users - 1)
+        if _users == 0 and _enabled:
+            _enabled = False
+            gc_timer.unregister()
+
+
+def on_root_span_start(span):
+    """Record the resources used so far by the thread starting a local root span."""
+    if not _enabled:
+        return
+    gc_time_ns = gc_timer.total_ns()
+    if gc_time_ns is None:
+        return
+    span._resource_usage = (_thread.get_ident(), _thread_time_ns(), gc_time_ns, _thread_allocated_bytes())
+
+
+def on_root_span_finish(span):
+    """Set the resources used since the start of a local root span as metrics of the span."""
+    thread_id, start_cpu_time_ns, start_gc_time_ns, start_allocated_bytes = span._resource_usage
+    span._resource_usage = None
+
+    gc_time_ns = gc_timer.total_ns()
+    # Timing might have been stopped and started again in the meantime
+    if gc_time_ns is not None and gc_time_ns >= start_gc_time_ns and hasattr(gc, "callbacks"):
+        span.metrics[SPAN_GC_TIME] = (gc_time_ns - start_gc_time_ns) / 1e9
+
+    # The thread counters of another thread are meaningless
+    if thread_id != _thread.get_ident():
+        return
+
+    if start_cpu_time_ns is not None:
+        span.metrics[SPAN_CPU_TIME] = (_thread_time_ns() - start_cpu_time_ns) / 1e9
+
+    if start_allocated_bytes is not None:
+        allocated_bytes = _thread_allocated_bytes()
+        # The memory profiler might have been restarted in the meantime
+        if allocated_bytes is not None and allocated_bytes >= start_allocated_bytes:
+            span.metrics[SPAN_ALLOCATED_BYTES] = allocated_bytes - start_allocated_bytes
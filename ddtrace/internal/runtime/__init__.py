@@ -1,17 +1,13 @@
+"""
+Runtime metrics and tags of the process.
+
+The runtime metrics are only imported when enabled, from `ddtrace.internal.runtime.runtime_metrics`.
+"""
 import os
 import uuid
 
-from .runtime_metrics import (
-    RuntimeTags,
-    RuntimeMetrics,
-    RuntimeWorker,
-)
-
 
 __all__ = [
-    "RuntimeTags",
-    "RuntimeMetrics",
-    "RuntimeWorker",
     "get_runtime_id",
 ]
 
@@ -36,6 +36,9 @@ class ValueCollector(object):
     def _on_modules_load(self):
         """Hook triggered after all required_modules have been successfully loaded."""
 
+    def close(self):
+        """Release the resources held by the collector."""
+
     def _load_modules(self):
         modules = {}
         try:
@@ -1,6 +1,31 @@
 GC_COUNT_GEN0 = "runtime.python.gc.count.gen0"
 GC_COUNT_GEN1 = "runtime.python.gc.count.gen1"
 GC_COUNT_GEN2 = "runtime.python.gc.count.gen2"
+GC_PAUSE_GEN0 = "runtime.python.gc.pause.gen0"
+GC_PAUSE_GEN1 = "runtime.python.gc.pause.gen1"
+GC_PAUSE_GEN2 = "runtime.python.gc.pause.gen2"
+GC_PAUSE_TIME = "runtime.python.gc.pause_time"
+GC_COLLECTED = "runtime.python.gc.collected"
+GC_UNCOLLECTABLE = "runtime.python.gc.uncollectable"
+GC_ALLOCATION_RATE = "runtime.python.gc.allocation_rate"
+
+ASYNCIO_LOOP_LAG = "runtime.python.asyncio.loop_lag"
+ASYNCIO_PENDING_TASKS = "runtime.python.asyncio.tasks.pending"
+ASYNCIO_SLOW_CALLBACKS = "runtime.python.asyncio.slow_callbacks"
+ASYNCIO_SLOW_CALLBACK_DURATION = "runtime.python.asyncio.slow_callback.duration"
+
+# Metric set on the local root spans: time spent collecting garbage while they were active, by the thread of the span
+# or, when resource accounting is enabled, by the whole process
+SPAN_GC_TIME = "runtime.python.gc.time"
+# Metrics set on the local root spans when resource accounting is enabled: resources used while they were active
+SPAN_CPU_TIME = "runtime.python.resources.cpu_time"
+SPAN_ALLOCATED_BYTES = "runtime.python.resources.allocated_bytes"
+# Metric set on the local root spans: maximum delay of the timers scheduled by the trace over the slow callback
+# threshold
+SPAN_ASYNCIO_LOOP_LAG = "runtime.python.asyncio.loop_lag"
+# Tag and metric set on the local root spans: location and duration of the slowest callback run by the trace
+SPAN_ASYNCIO_SLOW_CALLBACK = "runtime.python.asyncio.slow_callback"
+SPAN_ASYNCIO_SLOW_CALLBACK_DURATION = "runtime.python.asyncio.slow_callback.duration"
 
 THREAD_COUNT = "runtime.python.thread_count"
 MEM_RSS = "runtime.python.mem.rss"
@@ -9,14 +34,47 @@ CPU_TIME_USER = "runtime.python.cpu.time.user"
 CPU_PERCENT = "runtime.python.cpu.percent"
 CTX_SWITCH_VOLUNTARY = "runtime.python.cpu.ctx_switch.voluntary"
 CTX_SWITCH_INVOLUNTARY = "runtime.python.cpu.ctx_switch.involuntary"
+CPU_SCHED_WAIT_TIME = "runtime.python.cpu.sched.wait_time"
+PAGE_FAULTS_MINOR = "runtime.python.mem.page_faults.minor"
+PAGE_FAULTS_MAJOR = "runtime.python.mem.page_faults.major"
+FD_COUNT = "runtime.python.fd_count"
 
 GC_RUNTIME_METRICS = set([GC_COUNT_GEN0, GC_COUNT_GEN1, GC_COUNT_GEN2])
 
+# Metrics collected with `gc.callbacks`, only available on Python 3
+GC_CALLBACKS_RUNTIME_METRICS = set(
+    [
+        GC_PAUSE_GEN0,
+        GC_PAUSE_GEN1,
+        GC_PAUSE_GEN2,
+        GC_PAUSE_TIME,
+        GC_COLLECTED,
+        GC_UNCOLLECTABLE,
+        GC_ALLOCATION_RATE,
+    ]
+)
+
+# Metrics of the event loops, only collected when enabled with DD_RUNTIME_METRICS_ASYNCIO_ENABLED
+ASYNCIO_RUNTIME_METRICS = set(
+    [ASYNCIO_LOOP_LAG, ASYNCIO_PENDING_TASKS, ASYNCIO_SLOW_CALLBACKS, ASYNCIO_SLOW_CALLBACK_DURATION]
+)
+
+# Metrics whose value is a list of values sent as a histogram
+HISTOGRAM_RUNTIME_METRICS = set(
+    [GC_PAUSE_GEN0, GC_PAUSE_GEN1, GC_PAUSE_GEN2, ASYNCIO_LOOP_LAG, ASYNCIO_SLOW_CALLBACK_DURATION]
+)
+
 PSUTIL_RUNTIME_METRICS = set(
     [THREAD_COUNT, MEM_RSS, CTX_SWITCH_VOLUNTARY, CTX_SWITCH_INVOLUNTARY, CPU_TIME_SYS, CPU_TIME_USER, CPU_PERCENT]
 )
 
-DEFAULT_RUNTIME_METRICS = GC_RUNTIME_METRICS | PSUTIL_RUNTIME_METRICS
+PROC_RUNTIME_METRICS = PSUTIL_RUNTIME_METRICS | set(
+    [CPU_SCHED_WAIT_TIME, PAGE_FAULTS_MINOR, PAGE_FAULTS_MAJOR, FD_COUNT]
+)
+
+DEFAULT_RUNTIME_METRICS = (
+    GC_RUNTIME_METRICS | GC_CALLBACKS_RUNTIME_METRICS | PROC_RUNTIME_METRICS | ASYNCIO_RUNTIME_METRICS
+)
 
 SERVICE = "service"
 ENV = "env"
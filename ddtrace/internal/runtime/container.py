@@ -17,8 +17,11 @@ class CGroupInfo(object):
     CONTAINER_SOURCE_PATTERN = r"[0-9a-f]{64}"
 
     LINE_RE = re.compile(r"^(\d+):([^:]*):(.+)$")
-    POD_RE = re.compile(r"pod({0})(?:\.slice)?$".format(UUID_SOURCE_PATTERN))
-    CONTAINER_RE = re.compile(r"({0}|{1})(?:\.scope)?$".format(UUID_SOURCE_PATTERN, CONTAINER_SOURCE_PATTERN))
+    # The ids might be prefixed when the cgroups are managed by systemd, as with cgroup v2
+    # e.g. kubepods-burstable-pod<pod_id>.slice
+    POD_RE = re.compile(r"(?:^|-)pod({0})(?:\.slice)?$".format(UUID_SOURCE_PATTERN))
+    # e.g. docker-<container_id>.scope, cri-containerd-<container_id>.scope, crio-<container_id>.scope
+    CONTAINER_RE = re.compile(r"(?:^|[-:])({0}|{1})(?:\.scope)?$".format(UUID_SOURCE_PATTERN, CONTAINER_SOURCE_PATTERN))
 
     def __init__(self, **kwargs):
         # Initialize all attributes in __slots__ to `None`
@@ -55,19 +58,21 @@ class CGroupInfo(object):
         # Break up the path to grab container_id and pod_id if available
         # e.g. /docker/<container_id>
         # e.g. /kubepods/test/pod<pod_id>/<container_id>
+        # e.g. /kubepods.slice/kubepods-besteffort.slice/kubepods-besteffort-pod<pod_id>.slice/crio-<container_id>.scope
         parts = [p for p in info.path.split("/")]
 
         # Grab the container id from the path if a valid id is present
         if len(parts):
-            match = cls.CONTAINER_RE.match(parts.pop())
+            match = cls.CONTAINER_RE.search(parts.pop())
             if match:
                 info.container_id = match.group(1)
 
         # Grab the pod id from the path if a valid id is present
         if len(parts):
-            match = cls.POD_RE.match(parts.pop())
+            match = cls.POD_RE.search(parts.pop())
             if match:
-                info.pod_id = match.group(1)
+                # systemd replaces the dashes of the pod UID by underscores
+                info.pod_id = match.group(1).replace("_", "-")
 
         return info
 
@@ -92,7 +97,7 @@ def get_container_info(pid="self"):
 
     We will parse `/proc/{pid}/cgroup` to determine our container id.
 
-    The results of calling this function are cached
+    The results of calling this function are not cached, see :func:`get_cached_container_info`.
 
     :param pid: The pid of the cgroup file to parse (default: 'self')
     :type pid: str | int
@@ -115,3 +120,34 @@ def get_container_info(pid="self"):
                     return info
     except Exception:
         log.debug("Failed to parse cgroup file for pid %r", pid, exc_info=True)
+
+
+# The container info of the current process, `_UNKNOWN` until the cgroup file is parsed.
+# DEV: forked processes inherit it since they run in the cgroups of their parent.
+_UNKNOWN = object()
+_container_info = _UNKNOWN
+
+
+def get_cached_container_info():
+    """
+    Return the container info of the current process, parsing `/proc/self/cgroup` only once per process tree
+
+    :returns: The cgroup file info if found, or else None
+    :rtype: :class:`CGroupInfo` | None
+    """
+    info = _container_info
+    if info is _UNKNOWN:
+        info = refresh_container_info()
+    return info
+
+
+def refresh_container_info():
+    """
+    Parse `/proc/self/cgroup` again and cache the result, e.g. after the process moved to another cgroup
+
+    :returns: The cgroup file info if found, or else None
+    :rtype: :class:`CGroupInfo` | None
+    """
+    global _container_info
+    _container_info = info = get_container_info()
+    return info
@@ -1,10 +1,35 @@
+import functools
 import os
+import random
+import threading
+import weakref
 
+from ... import compat
+from ...utils.formats import asbool, get_env
+from .. import active_spans
+from .. import gc_timer
+from ..context_manager import _DD_CONTEXTVAR
+from ..logger import get_logger
 from .collector import ValueCollector
 from .constants import (
+    ASYNCIO_LOOP_LAG,
+    ASYNCIO_PENDING_TASKS,
+    ASYNCIO_SLOW_CALLBACKS,
+    ASYNCIO_SLOW_CALLBACK_DURATION,
     GC_COUNT_GEN0,
     GC_COUNT_GEN1,
     GC_COUNT_GEN2,
+    GC_PAUSE_GEN0,
+    GC_PAUSE_GEN1,
+    GC_PAUSE_GEN2,
+    GC_PAUSE_TIME,
+    GC_COLLECTED,
+    GC_UNCOLLECTABLE,
+    GC_ALLOCATION_RATE,
+    SPAN_ASYNCIO_LOOP_LAG,
+    SPAN_ASYNCIO_SLOW_CALLBACK,
+    SPAN_ASYNCIO_SLOW_CALLBACK_DURATION,
+    SPAN_GC_TIME,
     THREAD_COUNT,
     MEM_RSS,
     CTX_SWITCH_VOLUNTARY,
@@ -12,22 +37,133 @@ from .constants import (
     CPU_TIME_SYS,
     CPU_TIME_USER,
     CPU_PERCENT,
+    CPU_SCHED_WAIT_TIME,
+    PAGE_FAULTS_MINOR,
+    PAGE_FAULTS_MAJOR,
+    FD_COUNT,
 )
 
 
+log = get_logger(__name__)
+
+
+if hasattr(os, "pread"):
+    _pread = os.pread
+else:
+
+    def _pread(fd, size, offset):
+        os.lseek(fd, offset, os.SEEK_SET)
+        return os.read(fd, size)
+
+
+class Reservoir(object):
+    """Uniform random sample of at most `size` values.
+
+    See https://en.wikipedia.org/wiki/Reservoir_sampling
+    """
+
+    __slots__ = ("size", "values", "count")
+
+    def __init__(self, size):
+        self.size = size
+        self.values = []
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            i = random.randrange(self.count)
+            if i < self.size:
+                self.values[i] = value
+
+    def pop(self):
+        """Return the sampled values and start a new sample."""
+        values = self.values
+        self.values = []
+        self.count = 0
+        return values
+
+
 class RuntimeMetricCollector(ValueCollector):
     value = []
     periodic = True
 
 
 class GCRuntimeMetricCollector(RuntimeMetricCollector):
-    """Collector for garbage collection generational counts
+    """Collector for garbage collection metrics
+
+    The generational counts are always reported. When `gc.callbacks` is available (Python 3), every collection is
+    also timed: the pause times of each generation, the number of objects collected and uncollectable and the
+    allocation rate of objects tracked by the garbage collector are reported, and the time spent collecting is added
+    to the local root span active in the thread triggering the collection.
+
+    The collections are timed by :mod:`ddtrace.internal.gc_timer`, shared with the resource accounting. Only one
+    collector, the last one created, receives the timings at a time.
 
     More information at https://docs.python.org/3/library/gc.html
     """
 
     required_modules = ["gc"]
 
+    # Maximum number of pause times reported per generation and per collection, randomly sampled beyond
+    MAX_PAUSES = 128
+
+    _PAUSE_METRICS = (GC_PAUSE_GEN0, GC_PAUSE_GEN1, GC_PAUSE_GEN2)
+
+    # The collector receiving the timings of the collections
+    _hooked = None
+
+    def _on_modules_load(self):
+        gc = self.modules["gc"]
+        self._get_count = gc.get_count
+        self._pauses = tuple(Reservoir(self.MAX_PAUSES) for _ in range(3))
+        self._reset()
+        self._last_collect_time = compat.monotonic()
+        self._last_gen0_count = gc.get_count()[0]
+        if hasattr(gc, "callbacks"):
+            previous = GCRuntimeMetricCollector._hooked
+            if previous is not None:
+                previous.close()
+            gc_timer.register(self._on_gc)
+            active_spans.enable()
+            GCRuntimeMetricCollector._hooked = self
+
+    def _reset(self):
+        self._pause_time = 0
+        self._collected = 0
+        self._uncollectable = 0
+        # Objects tracked by the garbage collector allocated and not deallocated before the collections
+        self._allocations = 0
+
+    def close(self):
+        if GCRuntimeMetricCollector._hooked is self:
+            GCRuntimeMetricCollector._hooked = None
+            gc_timer.unregister(self._on_gc)
+            active_spans.disable()
+
+    def _on_gc(self, phase, info, duration_ns):
+        if phase == "start":
+            # Every collection resets the count of the youngest generation
+            self._allocations += self._get_count()[0]
+            return
+
+        duration = duration_ns / 1e9
+
+        generation = info["generation"]
+        self._pause_time += duration
+        self._collected += info["collected"]
+        self._uncollectable += info["uncollectable"]
+        self._pauses[generation].add(duration)
+
+        span = active_spans.current()
+        if span is not None:
+            while span._parent is not None:
+                span = span._parent
+            if not span.finished:
+                span.metrics[SPAN_GC_TIME] = span.metrics.get(SPAN_GC_TIME, 0) + duration
+
     def collect_fn(self, keys):
         gc = self.modules.get("gc")
 
@@ -38,6 +174,30 @@ class GCRuntimeMetricCollector(RuntimeMetricCollector):
             (GC_COUNT_GEN2, counts[2]),
         ]
 
+        if GCRuntimeMetricCollector._hooked is self:
+            now = compat.monotonic()
+            pauses = [reservoir.pop() for reservoir in self._pauses]
+            pause_time, collected, uncollectable, allocations = (
+                self._pause_time,
+                self._collected,
+                self._uncollectable,
+                self._allocations,
+            )
+            self._reset()
+
+            metrics.extend(zip(self._PAUSE_METRICS, pauses))
+            metrics.append((GC_PAUSE_TIME, pause_time))
+            metrics.append((GC_COLLECTED, collected))
+            metrics.append((GC_UNCOLLECTABLE, uncollectable))
+
+            elapsed = now - self._last_collect_time
+            if elapsed > 0:
+                metrics.append((GC_ALLOCATION_RATE, (allocations + counts[0] - self._last_gen0_count) / elapsed))
+            self._last_collect_time = now
+            self._last_gen0_count = counts[0]
+
+            active_spans.clear_dead_threads()
+
         return metrics
 
 
@@ -92,3 +252,337 @@ class PSUtilRuntimeMetricCollector(RuntimeMetricCollector):
             ]
 
             return metrics
+
+
+class ProcRuntimeMetricCollector(RuntimeMetricCollector):
+    """Collector for process metrics read from the Linux /proc filesystem.
+
+    It reports the metrics of :class:`PSUtilRuntimeMetricCollector` plus page faults, open file descriptors and the
+    time spent waiting for a CPU. ``/proc/<pid>/stat`` is opened once and read with a single ``pread`` per collection.
+
+    Unlike with psutil, the context switches and the scheduler wait time are the ones of all the threads of the
+    process: the context switches are read with ``getrusage`` and the wait time is summed over the
+    ``/proc/<pid>/task/<tid>/schedstat`` files of the running threads. Those files are kept open while their thread
+    runs.
+    """
+
+    required_modules = ["resource"]
+
+    _BUFFER_SIZE = 4096
+
+    def _on_modules_load(self):
+        self._pid = None
+        self._stat_fd = None
+        try:
+            self._clock_ticks = float(os.sysconf("SC_CLK_TCK"))
+            self._page_size = os.sysconf("SC_PAGE_SIZE")
+            self._open()
+        except (AttributeError, OSError, ValueError):
+            self.enabled = False
+            log.warning("Could not read process metrics from /proc for %s. Disabling collector.", self, exc_info=True)
+
+    def _open(self):
+        self.close()
+        pid = os.getpid()
+        path = "/proc/%d/" % pid
+        self._stat_fd = os.open(path + "stat", os.O_RDONLY)
+        # The kernel might not be built with scheduler statistics
+        self._task_path = path + "task/" if os.path.exists(path + "schedstat") else None
+        self._fd_path = path + "fd"
+        self._pid = pid
+        self._reset()
+
+    def close(self):
+        fds = list(getattr(self, "_sched_fds", {}).values())
+        self._sched_fds = {}
+        fd = getattr(self, "_stat_fd", None)
+        if fd is not None:
+            self._stat_fd = None
+            fds.append(fd)
+        for fd in fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _reset(self):
+        # Totals of the previous collection, used to report deltas
+        self._cpu_time_sys_total = 0
+        self._cpu_time_user_total = 0
+        self._ctx_switch_voluntary_total = 0
+        self._ctx_switch_involuntary_total = 0
+        self._page_faults_minor_total = 0
+        self._page_faults_major_total = 0
+        # Keys are thread ids, values are the time spent by the thread waiting for a CPU, in nanoseconds
+        self._sched_wait_times = {}
+        self._last_collect_time = None
+
+    def __del__(self):
+        self.close()
+
+    def _read(self, fd):
+        data = _pread(fd, self._BUFFER_SIZE, 0)
+        if len(data) < self._BUFFER_SIZE:
+            return data
+        chunks = [data]
+        while len(chunks[-1]) == self._BUFFER_SIZE:
+            chunks.append(_pread(fd, self._BUFFER_SIZE, self._BUFFER_SIZE * len(chunks)))
+        return b"".join(chunks)
+
+    def _sched_wait_time(self):
+        """Return the time spent by the threads waiting for a CPU since the previous collection, in seconds."""
+        fds = self._sched_fds
+        tids = os.listdir(self._task_path)
+        # Close the files of the threads that exited
+        for tid in set(fds) - set(tids):
+            os.close(fds.pop(tid))
+        wait_times = {}
+        for tid in tids:
+            fd = fds.get(tid)
+            try:
+                if fd is None:
+                    fd = fds[tid] = os.open(self._task_path + tid + "/schedstat", os.O_RDONLY)
+                wait_times[tid] = int(self._read(fd).split()[1])
+            except OSError:
+                # The thread exited since the threads were listed
+                fd = fds.pop(tid, None)
+                if fd is not None:
+                    os.close(fd)
+            except (IndexError, ValueError):
+                pass
+        previous = self._sched_wait_times
+        self._sched_wait_times = wait_times
+        # The threads that exited are not listed anymore: sum the increase of each running thread
+        return sum(max(0, wait_time - previous.get(tid, 0)) for tid, wait_time in wait_times.items()) / 1e9
+
+    def collect_fn(self, keys):
+        if os.getpid() != self._pid:
+            # The files opened by the parent process describe the parent process
+            self._open()
+
+        now = compat.monotonic()
+
+        stat = self._read(self._stat_fd)
+        # The command name is between parentheses and can contain spaces and parentheses itself: fields are numbered
+        # from 1 in proc(5) and the first field after the command name is the 3rd.
+        fields_start = stat.rindex(b")") + 2
+        fields = stat[fields_start:].split()
+        page_faults_minor_total = int(fields[7])
+        page_faults_major_total = int(fields[9])
+        cpu_time_user_total = int(fields[11]) / self._clock_ticks
+        cpu_time_sys_total = int(fields[12]) / self._clock_ticks
+        num_threads = int(fields[17])
+        rss = int(fields[21]) * self._page_size
+
+        # Includes the threads that exited
+        rusage = self.modules["resource"].getrusage(self.modules["resource"].RUSAGE_SELF)
+        ctx_switch_voluntary_total = rusage.ru_nvcsw
+        ctx_switch_involuntary_total = rusage.ru_nivcsw
+
+        cpu_time_sys = cpu_time_sys_total - self._cpu_time_sys_total
+        cpu_time_user = cpu_time_user_total - self._cpu_time_user_total
+
+        # Same computation as psutil: 0 on the first collection, then the CPU time used since the previous collection
+        # over the time elapsed, so a process using several CPUs can go over 100%.
+        if self._last_collect_time is None or now == self._last_collect_time:
+            cpu_percent = 0.0
+        else:
+            cpu_percent = round((cpu_time_sys + cpu_time_user) / (now - self._last_collect_time) * 100, 1)
+
+        metrics = [
+            (THREAD_COUNT, num_threads),
+            (MEM_RSS, rss),
+            (CTX_SWITCH_VOLUNTARY, ctx_switch_voluntary_total - self._ctx_switch_voluntary_total),
+            (CTX_SWITCH_INVOLUNTARY, ctx_switch_involuntary_total - self._ctx_switch_involuntary_total),
+            (CPU_TIME_SYS, cpu_time_sys),
+            (CPU_TIME_USER, cpu_time_user),
+            (CPU_PERCENT, cpu_percent),
+            (PAGE_FAULTS_MINOR, page_faults_minor_total - self._page_faults_minor_total),
+            (PAGE_FAULTS_MAJOR, page_faults_major_total - self._page_faults_major_total),
+        ]
+
+        # Listing the threads or the file descriptors costs a few system calls: skip it when the metric is not wanted
+        if self._task_path is not None and (not keys or CPU_SCHED_WAIT_TIME in keys):
+            metrics.append((CPU_SCHED_WAIT_TIME, self._sched_wait_time()))
+
+        if not keys or FD_COUNT in keys:
+            metrics.append((FD_COUNT, len(os.listdir(self._fd_path))))
+
+        self._cpu_time_sys_total = cpu_time_sys_total
+        self._cpu_time_user_total = cpu_time_user_total
+        self._ctx_switch_voluntary_total = ctx_switch_voluntary_total
+        self._ctx_switch_involuntary_total = ctx_switch_involuntary_total
+        self._page_faults_minor_total = page_faults_minor_total
+        self._page_faults_major_total = page_faults_major_total
+        self._last_collect_time = now
+
+        return metrics
+
+
+class AsyncioRuntimeMetricCollector(RuntimeMetricCollector):
+    """Collector for asyncio event loop metrics.
+
+    It is disabled unless ``DD_RUNTIME_METRICS_ASYNCIO_ENABLED`` is set. Once enabled, every callback run by an
+    asyncio event loop is timed by patching `asyncio.Handle`:
+
+    - the delay of the timer callbacks (e.g. `asyncio.sleep`) is reported as the loop lag. A timer is scheduled every
+      second on each loop to measure the lag when the application has no timer;
+    - the callbacks running for longer than ``DD_RUNTIME_METRICS_ASYNCIO_SLOW_CALLBACK_THRESHOLD`` seconds (0.1 by
+      default) are counted and logged with their code location;
+    - the number of pending tasks of the loops is reported.
+
+    The lag over the threshold and the slowest callback of a trace are set on its local root span when it is activated
+    with the default context provider.
+
+    Only one collector, the last one created, patches asyncio at a time. Loops that do not use `asyncio.Handle`, like
+    uvloop, are not measured.
+    """
+
+    required_modules = ["asyncio"]
+
+    # Maximum number of lags and slow callback durations reported per collection, randomly sampled beyond
+    MAX_VALUES = 128
+
+    # Interval at which the lag of each loop is measured, in seconds
+    PROBE_INTERVAL = 1.0
+
+    # The collector patching asyncio
+    _patched = None
+
+    def __init__(self, enabled=None, periodic=None, required_modules=None):
+        if enabled is None:
+            enabled = asbool(get_env("runtime_metrics", "asyncio", "enabled", default=False))
+        if not enabled:
+            # Do not import asyncio for nothing
+            required_modules = []
+        super(AsyncioRuntimeMetricCollector, self).__init__(enabled, periodic, required_modules)
+
+    def _on_modules_load(self):
+        if not self.enabled:
+            return
+        self.slow_callback_threshold = float(
+            get_env("runtime_metrics", "asyncio", "slow_callback_threshold", default=0.1)
+        )
+        self._lags = Reservoir(self.MAX_VALUES)
+        self._slow_callback_durations = Reservoir(self.MAX_VALUES)
+        # Pending tasks of each loop, updated by the probes
+        self._pending_tasks = weakref.WeakKeyDictionary()
+        self._pending_tasks_lock = threading.Lock()
+        self._patch()
+
+    def _patch(self):
+        asyncio = self.modules["asyncio"]
+        previous = AsyncioRuntimeMetricCollector._patched
+        if previous is not None:
+            previous.close()
+
+        self._original_run = original_run = asyncio.Handle._run
+        timer_handle_type = asyncio.TimerHandle
+        collector = self
+        threshold = self.slow_callback_threshold
+        monotonic = compat.monotonic
+
+        def _run(handle):
+            loop = handle._loop
+            # DEV: the attribute is faster to check than a weak set
+            if getattr(loop, "_dd_runtime_metrics_probe", None) is not collector:
+                collector._start_probe(loop)
+
+            if type(handle) is timer_handle_type:
+                lag = loop.time() - handle._when
+                # The loop runs the timers due within its clock resolution
+                if lag > 0:
+                    collector._lags.add(lag)
+                    if lag >= threshold:
+                        collector._on_lag(handle, lag)
+
+            start = monotonic()
+            try:
+                return original_run(handle)
+            finally:
+                duration = monotonic() - start
+                if duration >= threshold:
+                    collector._on_slow_callback(handle, duration)
+
+        asyncio.Handle._run = _run
+        AsyncioRuntimeMetricCollector._patched = self
+
+    def close(self):
+        if AsyncioRuntimeMetricCollector._patched is self:
+            AsyncioRuntimeMetricCollector._patched = None
+            self.modules["asyncio"].Handle._run = self._original_run
+
+    def _start_probe(self, loop):
+        loop._dd_runtime_metrics_probe = self
+        self._probe(loop)
+
+    def _probe(self, loop):
+        if AsyncioRuntimeMetricCollector._patched is not self or loop.is_closed():
+            return
+        # Running on the loop: the tasks can be listed safely
+        asyncio = self.modules["asyncio"]
+        all_tasks = getattr(asyncio, "all_tasks", None)
+        if all_tasks is None:
+            # Python < 3.7
+            pending_tasks = sum(1 for t in asyncio.Task.all_tasks(loop) if not t.done())
+        else:
+            pending_tasks = len(all_tasks(loop))
+        with self._pending_tasks_lock:
+            self._pending_tasks[loop] = pending_tasks
+        # The lag of the probe is measured like the one of any timer
+        loop.call_later(self.PROBE_INTERVAL, self._probe, loop)
+
+    @staticmethod
+    def _get_root_span(handle):
+        # The trace context of the callback, as activated by the default context provider. Handles have no context
+        # before Python 3.7.
+        context = getattr(handle, "_context", None)
+        if context is None:
+            return None
+        ctx = context.get(_DD_CONTEXTVAR)
+        if ctx is None:
+            return None
+        return ctx.get_current_root_span()
+
+    def _callback_location(self, callback):
+        # Tasks run their coroutine step by step
+        task = getattr(callback, "__self__", None)
+        if isinstance(task, self.modules["asyncio"].Task):
+            coro = task._coro
+            code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None)
+        else:
+            while isinstance(callback, functools.partial):
+                callback = callback.func
+            code = getattr(callback, "__code__", None)
+        if code is None:
+            return repr(callback)
+        return "%s:%d:%s" % (code.co_filename, code.co_firstlineno, code.co_name)
+
+    def _on_lag(self, handle, lag):
+        span = self._get_root_span(handle)
+        if span is not None and lag > span.metrics.get(SPAN_ASYNCIO_LOOP_LAG, 0):
+            span.metrics[SPAN_ASYNCIO_LOOP_LAG] = lag
+
+    def _on_slow_callback(self, handle, duration):
+        self._slow_callback_durations.add(duration)
+        location = self._callback_location(handle._callback)
+        log.warning("Executing asyncio callback %s took %.3f seconds", location, duration)
+        span = self._get_root_span(handle)
+        if span is not None and duration > span.metrics.get(SPAN_ASYNCIO_SLOW_CALLBACK_DURATION, 0):
+            span.metrics[SPAN_ASYNCIO_SLOW_CALLBACK_DURATION] = duration
+            span.meta[SPAN_ASYNCIO_SLOW_CALLBACK] = location
+
+    def collect_fn(self, keys):
+        if AsyncioRuntimeMetricCollector._patched is not self:
+            return []
+
+        with self._pending_tasks_lock:
+            pending_tasks = sum(self._pending_tasks.values())
+
+        slow_callback_count = self._slow_callback_durations.count
+        return [
+            (ASYNCIO_LOOP_LAG, self._lags.pop()),
+            (ASYNCIO_PENDING_TASKS, pending_tasks),
+            (ASYNCIO_SLOW_CALLBACKS, slow_callback_count),
+            (ASYNCIO_SLOW_CALLBACK_DURATION, self._slow_callback_durations.pop()),
+        ]
@@ -1,14 +1,18 @@
 import itertools
-
+import sys
 
 from ... import _worker
+from ..dogstatsd import aggregating
 from ..logger import get_logger
 from .constants import (
     DEFAULT_RUNTIME_METRICS,
     DEFAULT_RUNTIME_TAGS,
+    HISTOGRAM_RUNTIME_METRICS,
 )
 from .metric_collectors import (
+    AsyncioRuntimeMetricCollector,
     GCRuntimeMetricCollector,
+    ProcRuntimeMetricCollector,
     PSUtilRuntimeMetricCollector,
 )
 from .tag_collectors import (
@@ -29,6 +33,11 @@ class RuntimeCollectorsIterable(object):
         collected = (collector.collect(self._enabled) for collector in self._collectors)
         return itertools.chain.from_iterable(collected)
 
+    def close(self):
+        """Release the resources held by the collectors."""
+        for collector in self._collectors:
+            collector.close()
+
     def __repr__(self):
         return "{}(enabled={})".format(
             self.__class__.__name__,
@@ -48,30 +57,41 @@ class RuntimeMetrics(RuntimeCollectorsIterable):
     ENABLED = DEFAULT_RUNTIME_METRICS
     COLLECTORS = [
         GCRuntimeMetricCollector,
-        PSUtilRuntimeMetricCollector,
+        ProcRuntimeMetricCollector if sys.platform.startswith("linux") else PSUtilRuntimeMetricCollector,
+        AsyncioRuntimeMetricCollector,
     ]
 
 
 class RuntimeWorker(_worker.PeriodicWorkerThread):
     """Worker thread for collecting and writing runtime metrics to a DogStatsd
     client.
+
+    The metrics are aggregated until they are flushed: a client that cannot be flushed is wrapped in a
+    :class:`ddtrace.internal.dogstatsd.AggregatingDogStatsd`.
     """
 
     FLUSH_INTERVAL = 10
 
     def __init__(self, statsd_client, flush_interval=FLUSH_INTERVAL):
         super(RuntimeWorker, self).__init__(interval=flush_interval, name=self.__class__.__name__)
-        self._statsd_client = statsd_client
+        self._statsd_client = aggregating(statsd_client)
         self._runtime_metrics = RuntimeMetrics()
 
     def flush(self):
-        with self._statsd_client:
-            for key, value in self._runtime_metrics:
-                log.debug("Writing metric %s:%s", key, value)
+        for key, value in self._runtime_metrics:
+            log.debug("Writing metric %s:%s", key, value)
+            if key in HISTOGRAM_RUNTIME_METRICS:
+                for v in value:
+                    self._statsd_client.histogram(key, v)
+            else:
                 self._statsd_client.gauge(key, value)
+        self._statsd_client.flush()
 
     run_periodic = flush
-    on_shutdown = flush
+
+    def on_shutdown(self):
+        self.flush()
+        self._runtime_metrics.close()
 
     def __repr__(self):
         return "{}(runtime_metrics={})".format(
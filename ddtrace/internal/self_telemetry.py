@@ -0,0 +1,261 @@
+"""
+Measure the time spent in the instrumentation itself.
+
+Once enabled, the hot paths of the tracer (starting and finishing spans, closing them in their context, writing and
+filtering traces) and the integrations using `ddtrace.contrib.trace_utils.with_traced_module` record their duration
+in in-process histograms. The histograms are reported in the health metrics of the writer and can be read as JSON
+from a debug endpoint listening on localhost.
+
+The other integrations, all but Django for now, wrap their functions with wrapt directly: they go through no common
+code path and are not measured.
+"""
+import functools
+import json
+import threading
+
+from ddtrace.compat import monotonic_ns
+
+from .logger import get_logger
+
+
+log = get_logger(__name__)
+
+
+__all__ = [
+    "enabled",
+    "enable",
+    "disable",
+    "record",
+    "measure_integration",
+    "snapshot",
+    "report",
+    "DebugServer",
+]
+
+
+# Checked by the hot paths before measuring anything
+enabled = False
+
+# The percentiles reported for each histogram
+PERCENTILES = (50, 95, 99)
+
+# Histograms recording since the last report, keyed by operation
+_histograms = {}
+# Histograms of all the previous reports, keyed by operation
+_reported = {}
+_debug_server = None
+_lock = threading.Lock()
+
+
+class Histogram(object):
+    """Histogram of durations in nanoseconds with log-linear buckets.
+
+    Each power of 2 is split in 4 buckets, so a value is known with a precision of 25%. Recording a value takes a few
+    additions without any lock: some values might be lost when several threads record at the same time, which does not
+    matter for a latency histogram.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    NBUCKETS = 256
+
+    def __init__(self):
+        self.counts = [0] * self.NBUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _bucket(value):
+        if value < 8:
+            return max(0, value)
+        nbits = value.bit_length()
+        return min((nbits - 2) * 4 + ((value >> (nbits - 3)) & 3), Histogram.NBUCKETS - 1)
+
+    @staticmethod
+    def _bucket_upper_bound(index):
+        index += 1
+        if index < 8:
+            return index
+        return (4 + index % 4) << (index // 4 - 1)
+
+    def record(self, value):
+        self.counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for i, count in enumerate(other.counts):
+            if count:
+                self.counts[i] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Return an upper bound of the given percentile of the values, in nanoseconds."""
+        if not self.count:
+            return 0
+        rank = self.count * pct / 100.0
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self._bucket_upper_bound(i), self.max)
+        return self.max
+
+    def to_dict(self):
+        d = {
+            "count": self.count,
+            "mean_ns": self.total // self.count if self.count else 0,
+            "max_ns": self.max,
+        }
+        for pct in PERCENTILES:
+            d["p%d_ns" % pct] = self.percentile(pct)
+        return d
+
+
+def enable(debug_port=None):
+    """Start measuring the instrumentation.
+
+    :param debug_port: The port of the debug endpoint, which is only started if given.
+    """
+    global enabled, _debug_server
+    enabled = True
+
+    if debug_port is not None and _debug_server is None:
+        try:
+            _debug_server = DebugServer(int(debug_port))
+        except Exception:
+            log.warning("Failed to start the instrumentation debug endpoint on port %s", debug_port, exc_info=True)
+        else:
+            _debug_server.start()
+
+
+def disable():
+    """Stop measuring the instrumentation and forget the measures."""
+    global enabled, _debug_server
+    enabled = False
+    with _lock:
+        _histograms.clear()
+        _reported.clear()
+    if _debug_server is not None:
+        _debug_server.stop()
+        _debug_server = None
+
+
+def record(operation, duration_ns):
+    """Record the duration of an operation.
+
+    :param operation: The name of the operation.
+    :param duration_ns: The duration in nanoseconds.
+    """
+    try:
+        histogram = _histograms[operation]
+    except KeyError:
+        histogram = _histograms.setdefault(operation, Histogram())
+    histogram.record(duration_ns)
+
+
+def measure_integration(integration, func, *args):
+    """Call an integration wrapper and record the time it spent out of the function it wraps.
+
+    :param integration: The name of the integration.
+    :param func: The wrapper, called as ``func(module, pin, wrapped, instance, args, kwargs)``.
+    """
+    mod, pin, wrapped, instance, wrapped_args, wrapped_kwargs = args
+    wrapped_duration = [0]
+
+    @functools.wraps(wrapped)
+    def timed_wrapped(*args, **kwargs):
+        start = monotonic_ns()
+        try:
+            return wrapped(*args, **kwargs)
+        finally:
+            wrapped_duration[0] += monotonic_ns() - start
+
+    start = monotonic_ns()
+    try:
+        return func(mod, pin, timed_wrapped, instance, wrapped_args, wrapped_kwargs)
+    finally:
+        record("integration." + integration, monotonic_ns() - start - wrapped_duration[0])
+
+
+def _swap():
+    # Start new histograms and return the ones recorded since the last report. A value recorded by another thread
+    # while swapping might be lost.
+    global _histograms
+    recorded, _histograms = _histograms, {}
+    return recorded
+
+
+def snapshot():
+    """Return the histograms of all the measures as a dict."""
+    with _lock:
+        merged = {}
+        for histograms in (_reported, _histograms):
+            for operation, histogram in list(histograms.items()):
+                merged.setdefault(operation, Histogram()).merge(histogram)
+    return dict((operation, histogram.to_dict()) for operation, histogram in merged.items())
+
+
+def report(dogstatsd):
+    """Send the histograms recorded since the last report as health metrics.
+
+    :param dogstatsd: The DogStatsD client to send the metrics to.
+    """
+    with _lock:
+        recorded = _swap()
+        for operation, histogram in recorded.items():
+            _reported.setdefault(operation, Histogram()).merge(histogram)
+
+    for operation, histogram in recorded.items():
+        tags = ["operation:%s" % operation]
+        dogstatsd.increment("datadog.tracer.instrumentation.count", histogram.count, tags=tags)
+        dogstatsd.gauge("datadog.tracer.instrumentation.duration.max", histogram.max, tags=tags)
+        for pct in PERCENTILES:
+            dogstatsd.gauge(
+                "datadog.tracer.instrumentation.duration.%dpercentile" % pct, histogram.percentile(pct), tags=tags
+            )
+
+
+class DebugServer(object):
+    """HTTP server returning the histograms as JSON on every GET request."""
+
+    def __init__(self, port, host="127.0.0.1"):
+        """
+        :param port: The port to listen to, 0 to pick a free one.
+        :param host: The address to listen to, only localhost by default.
+        """
+        # DEV: only import the HTTP server when needed
+        from ddtrace.vendor.six.moves import BaseHTTPServer
+
+        class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(snapshot(), sort_keys=True).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                log.debug(format, *args)
+
+        self._server = BaseHTTPServer.HTTPServer((host, port), RequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.__class__.__name__)
+        self._thread.daemon = True
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,164 @@
+"""Relative-error quantile sketch compatible with the Datadog DDSketch format.
+
+A :class:`DDSketch` maps every positive value to a bucket whose boundaries grow logarithmically, so that any quantile
+computed from the sketch is within ``relative_accuracy`` of the exact value. The bucket counts are serialized with
+the protobuf layout expected by the Datadog Agent (``DDSketch``, ``IndexMapping`` and ``Store`` messages).
+"""
+import math
+import struct
+import sys
+
+
+class DDSketch(object):
+    """Logarithmically bucketed quantile sketch."""
+
+    __slots__ = (
+        "relative_accuracy",
+        "gamma",
+        "_multiplier",
+        "_min_indexable_value",
+        "max_bins",
+        "bins",
+        "count",
+        "zero_count",
+    )
+
+    DEFAULT_RELATIVE_ACCURACY = 0.01
+    DEFAULT_MAX_BINS = 2048
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_bins=DEFAULT_MAX_BINS):
+        """
+        :param relative_accuracy: The relative accuracy guaranteed for any quantile of the sketch.
+        :type relative_accuracy: :obj:`float` greater than 0.0 and lesser than 1.0
+        :param max_bins: The maximum number of bins to keep. Once reached, the lowest bins are collapsed together.
+        :type max_bins: :obj:`int`
+        """
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be greater than 0 and lesser than 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self.gamma)
+        # Values smaller than this can not be mapped to a bucket; count them as zeros
+        self._min_indexable_value = sys.float_info.min * self.gamma
+        self.max_bins = max_bins
+        self.bins = {}
+        self.count = 0
+        self.zero_count = 0
+
+    def _key(self, value):
+        return int(math.ceil(math.log(value) * self._multiplier))
+
+    def _value(self, key):
+        # Return the value in the middle of the bucket, which is at most `relative_accuracy` from any value
+        # mapped to that key
+        return math.pow(self.gamma, key) * 2 / (1 + self.gamma)
+
+    def add(self, value):
+        """Add a value to the sketch.
+
+        :param value: A positive value (e.g. a duration in nanoseconds).
+        """
+        self.count += 1
+
+        if value < self._min_indexable_value:
+            self.zero_count += 1
+            return
+
+        key = self._key(value)
+        bins = self.bins
+        if key in bins:
+            bins[key] += 1
+        else:
+            bins[key] = 1
+            if len(bins) > self.max_bins:
+                self._collapse()
+
+    def _collapse(self):
+        # Fold the lowest bins into a single one so that we keep at most `max_bins` bins:
+        # precision is lost on the lowest quantiles only.
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins + 1
+        target = keys[excess]
+        self.bins[target] += sum(self.bins.pop(key) for key in keys[:excess])
+
+    def get_quantile_value(self, quantile):
+        """Return the approximated value at the given quantile.
+
+        :param quantile: The quantile to compute.
+        :type quantile: :obj:`float` between 0.0 and 1.0 included
+        :return: The value or `None` if the sketch is empty.
+        """
+        if self.count == 0 or not 0.0 <= quantile <= 1.0:
+            return None
+
+        rank = quantile * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        total = self.zero_count
+        for key in sorted(self.bins):
+            total += self.bins[key]
+            if total > rank:
+                return self._value(key)
+
+        return self._value(max(self.bins))
+
+    def to_proto(self):
+        """Serialize the sketch using the protobuf format of the `DDSketch` message.
+
+        :rtype: bytes
+        """
+        mapping = bytearray()
+        mapping += _encode_tag(1, _WIRE_FIXED64) + _DOUBLE.pack(self.gamma)
+        # indexOffset and interpolation are left to their default values (0 and NONE)
+
+        store = bytearray()
+        if self.bins:
+            offset = min(self.bins)
+            contiguous = [0.0] * (max(self.bins) - offset + 1)
+            for key, count in self.bins.items():
+                contiguous[key - offset] = float(count)
+            packed = b"".join(_DOUBLE.pack(c) for c in contiguous)
+            store += _encode_tag(2, _WIRE_LENGTH_DELIMITED) + _encode_varint(len(packed)) + packed
+            store += _encode_tag(3, _WIRE_VARINT) + _encode_varint(_zigzag(offset))
+
+        sketch = bytearray()
+        sketch += _encode_tag(1, _WIRE_LENGTH_DELIMITED) + _encode_varint(len(mapping)) + mapping
+        sketch += _encode_tag(2, _WIRE_LENGTH_DELIMITED) + _encode_varint(len(store)) + store
+        if self.zero_count:
+            sketch += _encode_tag(4, _WIRE_FIXED64) + _DOUBLE.pack(float(self.zero_count))
+        return bytes(sketch)
+
+    def __repr__(self):
+        return "{}(relative_accuracy={!r}, count={!r}, zero_count={!r}, bins={!r})".format(
+            self.__class__.__name__, self.relative_accuracy, self.count, self.zero_count, len(self.bins)
+        )
+
+
+_DOUBLE = struct.Struct("<d")
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+
+
+def _zigzag(value):
+    # sint32 encoding
+    return (value << 1) ^ (value >> 31)
+
+
+def _encode_varint(value):
+    buf = bytearray()
+    while True:
+        towrite = value & 0x7F
+        value >>= 7
+        if value:
+            buf.append(towrite | 0x80)
+        else:
+            buf.append(towrite)
+            return buf
+
+
+def _encode_tag(field_number, wire_type):
+    return _encode_varint((field_number << 3) | wire_type)
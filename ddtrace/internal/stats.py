@@ -0,0 +1,164 @@
+"""Client-side computation of the trace statistics.
+
+The Datadog Agent computes hits, errors and latency distributions from every trace it receives. When those statistics
+are computed by the tracer, the traces themselves are no longer needed by the Agent to produce accurate metrics.
+"""
+import threading
+
+import ddtrace
+from .. import compat
+from ..constants import SPAN_MEASURED_KEY
+from ..ext import http
+from ..settings import config
+from . import hostname
+from . import sketch
+from .runtime import get_runtime_id
+
+
+class _SpanAggregation(object):
+    """Statistics aggregated for a single aggregation key."""
+
+    __slots__ = ("hits", "top_level_hits", "errors", "duration", "ok_distribution", "error_distribution")
+
+    def __init__(self):
+        self.hits = 0
+        self.top_level_hits = 0
+        self.errors = 0
+        self.duration = 0
+        self.ok_distribution = sketch.DDSketch()
+        self.error_distribution = sketch.DDSketch()
+
+    def add(self, duration_ns, is_error, is_top_level):
+        self.hits += 1
+        self.duration += duration_ns
+        if is_top_level:
+            self.top_level_hits += 1
+        if is_error:
+            self.errors += 1
+            self.error_distribution.add(duration_ns)
+        else:
+            self.ok_distribution.add(duration_ns)
+
+
+def _http_status_code(span):
+    status_code = span.meta.get(http.STATUS_CODE)
+    if status_code is None:
+        return 0
+    try:
+        return int(status_code)
+    except ValueError:
+        return 0
+
+
+class SpanStatsConcentrator(object):
+    """Aggregate top-level and measured spans into time buckets of statistics.
+
+    Spans are aggregated by service, name, resource, type and HTTP status code into buckets of ``bucket_size_ns``
+    nanoseconds, based on the time they finished. Buckets are flushed once they are over.
+    """
+
+    DEFAULT_BUCKET_SIZE_NS = int(10 * 1e9)
+
+    def __init__(self, bucket_size_ns=DEFAULT_BUCKET_SIZE_NS):
+        """
+        :param bucket_size_ns: The duration of a time bucket in nanoseconds.
+        """
+        self.bucket_size_ns = bucket_size_ns
+        # Keys are bucket start times, values are dicts of aggregation key to `_SpanAggregation`
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    @staticmethod
+    def _is_top_level(span, services):
+        # A span is top-level if it is the local root or if its parent belongs to another service.
+        # A parent that is not part of the trace (e.g. distributed or partially flushed trace) has no service.
+        return span.parent_id is None or services.get(span.parent_id) != span.service
+
+    def add_trace(self, trace):
+        """Aggregate the finished spans of a trace.
+
+        :param trace: A list of spans.
+        """
+        services = {span.span_id: span.service for span in trace}
+        with self._lock:
+            for span in trace:
+                if span.duration_ns is None:
+                    continue
+
+                is_top_level = self._is_top_level(span, services)
+                if not is_top_level and not span.metrics.get(SPAN_MEASURED_KEY):
+                    continue
+
+                end_ns = span.start_ns + span.duration_ns
+                bucket_start = end_ns - end_ns % self.bucket_size_ns
+                try:
+                    bucket = self._buckets[bucket_start]
+                except KeyError:
+                    bucket = self._buckets[bucket_start] = {}
+
+                key = (span.service, span.name, span.resource, span.span_type, _http_status_code(span))
+                try:
+                    aggregation = bucket[key]
+                except KeyError:
+                    aggregation = bucket[key] = _SpanAggregation()
+
+                aggregation.add(span.duration_ns, bool(span.error), is_top_level)
+
+    def _serialize_bucket(self, bucket_start, bucket):
+        return {
+            "Start": bucket_start,
+            "Duration": self.bucket_size_ns,
+            "Stats": [
+                {
+                    "Service": service or "",
+                    "Name": name or "",
+                    "Resource": resource or "",
+                    "Type": span_type or "",
+                    "HTTPStatusCode": http_status_code,
+                    "Hits": aggregation.hits,
+                    "TopLevelHits": aggregation.top_level_hits,
+                    "Errors": aggregation.errors,
+                    "Duration": aggregation.duration,
+                    "OkSummary": aggregation.ok_distribution.to_proto(),
+                    "ErrorSummary": aggregation.error_distribution.to_proto(),
+                }
+                for (service, name, resource, span_type, http_status_code), aggregation in bucket.items()
+            ],
+        }
+
+    def flush(self, now_ns=None, force=False):
+        """Return the statistics of all the buckets that are over.
+
+        :param now_ns: The current time in nanoseconds.
+        :param force: Whether to flush all the buckets, including the current one (e.g. on shutdown).
+        :return: The statistics payload to send to the Agent or `None` if there is nothing to flush.
+        """
+        if now_ns is None:
+            now_ns = compat.time_ns()
+
+        with self._lock:
+            to_flush = [
+                bucket_start for bucket_start in self._buckets if force or bucket_start + self.bucket_size_ns <= now_ns
+            ]
+            if not to_flush:
+                return None
+
+            buckets = [self._serialize_bucket(start, self._buckets.pop(start)) for start in sorted(to_flush)]
+            self._sequence += 1
+            sequence = self._sequence
+
+        return {
+            "Hostname": hostname.get_hostname() if config.report_hostname else "",
+            "Env": config.env or "",
+            "Version": config.version or "",
+            "Lang": "python",
+            "TracerVersion": ddtrace.__version__,
+            "RuntimeID": get_runtime_id(),
+            "Sequence": sequence,
+            "Stats": buckets,
+        }
+
+    def __len__(self):
+        """Return the number of buckets waiting to be flushed."""
+        return len(self._buckets)
@@ -8,12 +8,17 @@ import time
 from .. import api
 from .. import compat
 from .. import _worker
+from ..filters import _process_traces
 from ..internal.logger import get_logger
 from ..sampler import BasePrioritySampler
 from ..settings import config
 from ..encoding import JSONEncoderV2
 from ..payload import PayloadFull
 from . import _queue
+from . import dogstatsd as _dogstatsd
+from . import processor
+from . import self_telemetry
+from . import stats
 
 log = get_logger(__name__)
 
@@ -23,9 +28,11 @@ LOG_ERR_INTERVAL = 60
 
 
 class LogWriter:
-    def __init__(self, out=sys.stdout, sampler=None, priority_sampler=None):
+    def __init__(self, out=sys.stdout, sampler=None, priority_sampler=None, filters=None, processors=None):
         self._sampler = sampler
         self._priority_sampler = priority_sampler
+        self._filters = filters or []
+        self._processors = processor.processors if processors is None else processors
         self.encoder = JSONEncoderV2()
         self.out = out
 
@@ -35,7 +42,13 @@ class LogWriter:
         :rtype: :class:`LogWriter`
         :returns: A new :class:`LogWriter` instance
         """
-        writer = self.__class__(out=self.out, sampler=self._sampler, priority_sampler=self._priority_sampler)
+        writer = self.__class__(
+            out=self.out,
+            sampler=self._sampler,
+            priority_sampler=self._priority_sampler,
+            filters=self._filters,
+            processors=self._processors,
+        )
         return writer
 
     def write(self, spans=None, services=None):
@@ -43,7 +56,13 @@ class LogWriter:
         if not spans:
             return
 
-        encoded = self.encoder.encode_traces([spans])
+        traces = [spans]
+        self._processors.process_traces(traces)
+        traces = _process_traces(self._filters, traces)
+        if not traces:
+            return
+
+        encoded = self.encoder.encode_traces(traces)
         self.out.write(encoded + "\n")
         self.out.flush()
 
@@ -63,6 +82,8 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         sampler=None,
         priority_sampler=None,
         dogstatsd=None,
+        filters=None,
+        processors=None,
     ):
         super(AgentWriter, self).__init__(
             interval=self.QUEUE_PROCESSING_INTERVAL, exit_timeout=shutdown_timeout, name=self.__class__.__name__
@@ -72,10 +93,22 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         self._trace_queue = _queue.TraceQueue(maxsize=maxsize)
         self._sampler = sampler
         self._priority_sampler = priority_sampler
+        self._filters = filters or []
+        self._processors = processor.processors if processors is None else processors
         self._last_error_ts = 0
+        self._last_rate_by_service_body = None
         self.dogstatsd = dogstatsd
+        if config._compute_stats:
+            self._stats_concentrator = stats.SpanStatsConcentrator()
+        else:
+            self._stats_concentrator = None
         self.api = api.API(
-            hostname, port, uds_path=uds_path, https=https, priority_sampling=priority_sampler is not None
+            hostname,
+            port,
+            uds_path=uds_path,
+            https=https,
+            priority_sampling=priority_sampler is not None,
+            client_computed_stats=self._stats_concentrator is not None,
         )
         if hasattr(time, "thread_time"):
             self._last_thread_time = time.thread_time()
@@ -96,9 +129,20 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             shutdown_timeout=self.exit_timeout,
             priority_sampler=self._priority_sampler,
             dogstatsd=self.dogstatsd,
+            filters=self._filters,
+            processors=self._processors,
         )
         return writer
 
+    @property
+    def dogstatsd(self):
+        """The DogStatsD client used to send the health metrics, which are aggregated until the periodic run ends."""
+        return self._dogstatsd
+
+    @dogstatsd.setter
+    def dogstatsd(self, client):
+        self._dogstatsd = _dogstatsd.aggregating(client)
+
     @property
     def _send_stats(self):
         """Determine if we're sending stats or not."""
@@ -126,33 +170,48 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             traces_queue_length = len(traces)
             traces_queue_spans = sum(map(len, traces))
 
-        # If we have data, let's try to send it.
-        traces_responses = self.api.send_traces(traces)
-        for response in traces_responses:
-            if not isinstance(response, PayloadFull):
-                if isinstance(response, Exception) or response.status >= 400:
-                    self._log_error_status(response)
-                elif self._priority_sampler or isinstance(self._sampler, BasePrioritySampler):
-                    result_traces_json = response.get_json()
-                    if result_traces_json and "rate_by_service" in result_traces_json:
-                        if self._priority_sampler:
-                            self._priority_sampler.update_rate_by_service_sample_rates(
-                                result_traces_json["rate_by_service"],
-                            )
-                        if isinstance(self._sampler, BasePrioritySampler):
-                            self._sampler.update_rate_by_service_sample_rates(
-                                result_traces_json["rate_by_service"],
-                            )
+        # Processors and filters are applied on the whole batch here rather than on each trace in the application
+        # threads. Processors run first so that filters see the final spans.
+        processors_durations = self._processors.process_traces(traces)
+        if self_telemetry.enabled:
+            filters_start_ns = compat.monotonic_ns()
+            traces = _process_traces(self._filters, traces)
+            self_telemetry.record("writer.filters", compat.monotonic_ns() - filters_start_ns)
+        else:
+            traces = _process_traces(self._filters, traces)
+
+        # Every trace might have been filtered out: the health metrics of the flush are still sent
+        if traces:
+            # Compute statistics before sending: they must account for every trace, even the ones that fail to be sent
+            if self._stats_concentrator is not None:
+                for trace in traces:
+                    self._stats_concentrator.add_trace(trace)
+
+            # If we have data, let's try to send it.
+            traces_responses = self.api.send_traces(traces)
+            for response in traces_responses:
+                if not isinstance(response, PayloadFull):
+                    if isinstance(response, Exception) or response.status >= 400:
+                        self._log_error_status(response)
+                    elif self._priority_sampler or isinstance(self._sampler, BasePrioritySampler):
+                        self._update_rate_by_service_sample_rates(response)
+        else:
+            traces_responses = []
 
         # Dump statistics
-        # NOTE: Do not use the buffering of dogstatsd as it's not thread-safe
-        # https://github.com/DataDog/datadogpy/issues/439
+        # NOTE: they are aggregated by the dogstatsd client and sent once the periodic run is done
         if self._send_stats:
             # Statistics about the queue length, size and number of spans
             self.dogstatsd.increment("datadog.tracer.flushes")
             self._histogram_with_total("datadog.tracer.flush.traces", traces_queue_length)
             self._histogram_with_total("datadog.tracer.flush.spans", traces_queue_spans)
 
+            # Statistics about the span processors
+            for span_processor, duration in processors_durations:
+                self.dogstatsd.histogram(
+                    "datadog.tracer.processor.duration", duration, tags=["processor:%s" % span_processor.name]
+                )
+
             # Statistics about API
             self._histogram_with_total("datadog.tracer.api.requests", len(traces_responses))
 
@@ -181,6 +240,43 @@ class AgentWriter(_worker.PeriodicWorkerThread):
                 self._last_thread_time = new_thread_time
                 self.dogstatsd.histogram("datadog.tracer.writer.cpu_time", diff)
 
+    def _update_rate_by_service_sample_rates(self, response):
+        # The Agent replies with the same rates most of the time: don't parse them again if the body did not change
+        body = response.body
+        if body and body == self._last_rate_by_service_body:
+            return
+
+        result_traces_json = response.get_json()
+        if result_traces_json and "rate_by_service" in result_traces_json:
+            if self._priority_sampler:
+                self._priority_sampler.update_rate_by_service_sample_rates(
+                    result_traces_json["rate_by_service"],
+                )
+            if isinstance(self._sampler, BasePrioritySampler):
+                self._sampler.update_rate_by_service_sample_rates(
+                    result_traces_json["rate_by_service"],
+                )
+            self._last_rate_by_service_body = body
+
+    def flush_stats(self, force=False):
+        """Send the trace statistics of the time buckets that are over.
+
+        :param force: Whether to send all the statistics, including the ones of the current time bucket.
+        """
+        if self._stats_concentrator is None:
+            return
+
+        payload = self._stats_concentrator.flush(force=force)
+        if payload is None:
+            return
+
+        response = self.api.send_stats(payload)
+        if isinstance(response, Exception) or response.status >= 400:
+            self._log_error_status(response, "stats")
+
+        if self._send_stats:
+            self.dogstatsd.increment("datadog.tracer.stats.flushes")
+
     def _histogram_with_total(self, name, value, tags=None):
         """Helper to add metric as a histogram and with a `.total` counter"""
         self.dogstatsd.histogram(name, value, tags=tags)
@@ -192,6 +288,7 @@ class AgentWriter(_worker.PeriodicWorkerThread):
 
         try:
             self.flush_queue()
+            self.flush_stats()
         finally:
             if not self._send_stats:
                 return
@@ -203,22 +300,30 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             self.dogstatsd.increment("datadog.tracer.queue.enqueued.traces", enqueued)
             self.dogstatsd.increment("datadog.tracer.queue.enqueued.spans", enqueued_lengths)
 
+            # Statistics about the time spent in the instrumentation
+            if self_telemetry.enabled:
+                self_telemetry.report(self.dogstatsd)
+
+            self.dogstatsd.flush()
+
     def on_shutdown(self):
         try:
             self.run_periodic()
+            self.flush_stats(force=True)
         finally:
             if not self._send_stats:
                 return
 
             self.dogstatsd.increment("datadog.tracer.shutdown")
+            self.dogstatsd.flush()
 
-    def _log_error_status(self, response):
+    def _log_error_status(self, response, payload_type="traces"):
         log_level = log.debug
         now = compat.monotonic()
         if now > self._last_error_ts + LOG_ERR_INTERVAL:
             log_level = log.error
             self._last_error_ts = now
-        prefix = "Failed to send traces to Datadog Agent at %s: "
+        prefix = "Failed to send " + payload_type + " to Datadog Agent at %s: "
         if isinstance(response, api.Response):
             log_level(
                 prefix + "HTTP error status %s, reason %s, message %s",
@@ -0,0 +1,126 @@
+"""Ring buffers of events.
+
+The slots of a buffer are allocated as events are pushed, up to its maximum length, and kept until the buffer is
+cleared. Pushing events only stores references in those slots and runs no Python code, so it is atomic with regard to
+the other threads holding the GIL and it never triggers the garbage collector.
+"""
+from cpython.dict cimport PyDict_GetItem
+from cpython.object cimport PyObject
+
+
+cdef class RingBuffer(object):
+    """A fixed-size buffer of events.
+
+    Once full, pushing an event overwrites the oldest one, like a `collections.deque` with a `maxlen`.
+    """
+
+    cdef readonly Py_ssize_t maxlen
+    cdef list _slots
+    # Index of the oldest event
+    cdef Py_ssize_t _start
+    cdef Py_ssize_t _len
+
+    def __init__(self, maxlen):
+        if maxlen < 0:
+            raise ValueError("maxlen must be non-negative")
+        self.maxlen = maxlen
+        # Grown on demand: most event types never fill their buffer
+        self._slots = []
+        self._start = 0
+        self._len = 0
+
+    cdef inline void _append(self, event):
+        cdef Py_ssize_t idx
+
+        if self._len < self.maxlen:
+            idx = self._start + self._len
+            if idx >= self.maxlen:
+                idx -= self.maxlen
+            if idx == len(self._slots):
+                self._slots.append(event)
+            else:
+                self._slots[idx] = event
+            self._len += 1
+        elif self.maxlen:
+            self._slots[self._start] = event
+            self._start += 1
+            if self._start == self.maxlen:
+                self._start = 0
+
+    cpdef append(self, event):
+        self._append(event)
+
+    cpdef extend(self, events):
+        cdef list events_list
+
+        if type(events) is list:
+            events_list = <list>events
+            for event in events_list:
+                self._append(event)
+        else:
+            for event in events:
+                self._append(event)
+
+    cpdef pop(self):
+        """Remove and return the most recent event."""
+        cdef Py_ssize_t idx
+
+        if self._len == 0:
+            raise IndexError("pop from an empty buffer")
+
+        self._len -= 1
+        idx = self._start + self._len
+        if idx >= self.maxlen:
+            idx -= self.maxlen
+        event = self._slots[idx]
+        self._slots[idx] = None
+        return event
+
+    cpdef clear(self):
+        self._slots = []
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, Py_ssize_t index):
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError("buffer index out of range")
+        index += self._start
+        if index >= self.maxlen:
+            index -= self.maxlen
+        return self._slots[index]
+
+    def __iter__(self):
+        # Iterate from the oldest to the most recent event
+        cdef Py_ssize_t end = self._start + self._len
+
+        if end <= self.maxlen:
+            return iter(self._slots[self._start:end])
+        return iter(self._slots[self._start:] + self._slots[:end - self.maxlen])
+
+    def __repr__(self):
+        return "%s(maxlen=%d, len=%d)" % (self.__class__.__name__, self.maxlen, self._len)
+
+
+cpdef bint push_events(recorder, events):
+    """Push events in the ring buffer of a recorder without holding its lock.
+
+    The events dictionary of the recorder is read and the events are written in a single step: the recorder can not be
+    reset in the middle of it.
+
+    :param recorder: The `ddtrace.profiling.recorder.Recorder` to push the events to.
+    :param events: The events to push, all of the same type.
+    :return: Whether the events have been pushed. They are not if the recorder has no ring buffer for this type of
+             events yet.
+    """
+    cdef PyObject* buf = PyDict_GetItem(recorder.events, type(events[0]))
+
+    if buf == NULL or type(<object>buf) is not RingBuffer:
+        return False
+
+    (<RingBuffer>buf).extend(events)
+    return True
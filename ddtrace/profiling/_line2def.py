@@ -1,5 +1,9 @@
 # -*- encoding: utf-8 -*-
 import ast
+import dis
+import os
+import sys
+import types
 
 import intervaltree
 
@@ -41,17 +45,141 @@ else:
     _DEFS = (ast.FunctionDef, ast.ClassDef)
 
 
-@lru_cache(maxsize=256)
-def file_to_tree(filename):
+def _ast_intervals(filename):
+    """Return the line intervals of the functions and classes defined in a file by parsing its source."""
     # Use tokenize.open to detect encoding
     with source_open(filename) as f:
         parsed = ast.parse(f.read(), filename=filename)
-    tree = intervaltree.IntervalTree()
+    intervals = []
     for node in ast.walk(parsed):
         if isinstance(node, _DEFS):
             start, end = _compute_interval(node)
-            tree[start:end] = node
-    return tree
+            intervals.append((start, end, node.name))
+    return intervals
+
+
+def _code_intervals(code, filename):
+    """Return the line intervals of a code object and of the functions defined in it."""
+    intervals = []
+    # Lambdas, comprehensions and module bodies are not function definitions
+    if code.co_filename == filename and not code.co_name.startswith("<"):
+        linenos = [lineno for _, lineno in dis.findlinestarts(code)]
+        linenos.append(code.co_firstlineno)
+        intervals.append((min(linenos), max(linenos) + 1, code.co_name))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            intervals.extend(_code_intervals(const, filename))
+    return intervals
+
+
+def _object_intervals(obj, filename, seen):
+    """Return the line intervals of the functions and classes reachable from an object."""
+    if id(obj) in seen:
+        return []
+    seen.add(id(obj))
+
+    try:
+        if isinstance(obj, (staticmethod, classmethod)):
+            return _object_intervals(obj.__func__, filename, seen)
+
+        if isinstance(obj, property):
+            intervals = []
+            for func in (obj.fget, obj.fset, obj.fdel):
+                if func is not None:
+                    intervals.extend(_object_intervals(func, filename, seen))
+            return intervals
+
+        if isinstance(obj, type):
+            intervals = []
+            for value in list(vars(obj).values()):
+                intervals.extend(_object_intervals(value, filename, seen))
+            if intervals:
+                # The class body code object is not kept around: the class interval spans its methods
+                intervals.append(
+                    (min(start for start, _, _ in intervals), max(end for _, end, _ in intervals), obj.__name__)
+                )
+            return intervals
+
+        intervals = []
+        code = getattr(obj, "__code__", None)
+        if isinstance(code, types.CodeType):
+            intervals.extend(_code_intervals(code, filename))
+        # Decorated functions
+        wrapped = getattr(obj, "__wrapped__", None)
+        if wrapped is not None:
+            intervals.extend(_object_intervals(wrapped, filename, seen))
+        return intervals
+    except Exception:
+        # Objects can do anything on attribute access, ignore the ones that fail
+        return []
+
+
+# The loaded modules indexed by their source file, and the number of loaded modules when they were indexed
+_modules_by_filename = {}
+_indexed_modules_count = 0
+
+
+def _get_module(filename):
+    """Return the loaded module of a file, if any."""
+    global _modules_by_filename, _indexed_modules_count
+
+    modules = sys.modules
+    # DEV: only index the modules again if some have been loaded since, not for every file
+    if filename not in _modules_by_filename and len(modules) != _indexed_modules_count:
+        index = {}
+        for module in list(modules.values()):
+            try:
+                module_file = module.__file__
+            except Exception:
+                continue
+            if not module_file:
+                continue
+            if module_file.endswith((".pyc", ".pyo")):
+                module_file = module_file[:-1]
+            index[module_file] = module
+        _modules_by_filename = index
+        _indexed_modules_count = len(modules)
+    return _modules_by_filename.get(filename)
+
+
+def _module_code(module):
+    """Return the code object of the body of a module if its bytecode is cached, `None` otherwise."""
+    try:
+        # DEV: do not compile the source, it costs as much as parsing it
+        if not os.path.exists(module.__cached__):
+            return None
+        return module.__loader__.get_code(module.__name__)
+    except Exception:
+        return None
+
+
+def _module_intervals(module, filename):
+    """Return the line intervals of the functions and classes defined in a file from its loaded module."""
+    # The code of the module body holds the code of every function and class defined in the file, even the ones that
+    # are not reachable from the module, e.g. if a decorator does not return the function it decorates. Without it,
+    # only the functions reachable from the module are resolved.
+    code = _module_code(module)
+    if isinstance(code, types.CodeType):
+        return _code_intervals(code, filename)
+    seen = set()
+    intervals = []
+    for value in list(vars(module).values()):
+        intervals.extend(_object_intervals(value, filename, seen))
+    return intervals
+
+
+@lru_cache(maxsize=1024)
+def file_to_tree(filename):
+    """Return an interval tree of the function names defined in a file, indexed by line number.
+
+    Function names are resolved from the code objects of the module if it is loaded, otherwise by parsing the source.
+    """
+    module = _get_module(filename)
+    if module is not None:
+        intervals = _module_intervals(module, filename)
+    else:
+        intervals = _ast_intervals(filename)
+    return intervaltree.IntervalTree.from_tuples(intervals)
 
 
 def default_def(filename, lineno):
@@ -68,6 +196,6 @@ def filename_and_lineno_to_def(filename, lineno):
     except (IOError, OSError, SyntaxError):
         return default_def(filename, lineno)
     if matches:
-        return min(matches, key=lambda i: i.length()).data.name
+        return min(matches, key=lambda i: i.length()).data
 
     return default_def(filename, lineno)
@@ -0,0 +1,299 @@
+"""CPU timer sampling.
+
+A ``SIGPROF`` signal is delivered by the kernel every time the process consumed a given amount of CPU time
+(``setitimer(ITIMER_PROF)``). The signal is handled by the thread that was running on the CPU: the handler records the
+code objects, last instructions and line numbers of its Python stack in a lock-free ring buffer, without allocating
+anything. The buffer is drained by the stack collector.
+
+The frames of a thread are only modified by the thread itself, which is interrupted by the handler: they can be read
+safely, but they might have been freed by the time the buffer is drained. When the interrupted thread holds the GIL, no
+other thread touches any reference count, so the handler takes a reference on the code objects of the sample, which
+are released once drained. Otherwise, only the code object addresses are recorded and the collector checks that the
+code object it resolves for an address has the line number recorded, since the address might have been reused.
+
+This is only available on Linux.
+"""
+IF UNAME_SYSNAME == "Linux":
+    AVAILABLE = True
+
+    from cpython.object cimport PyObject
+
+    cdef extern from *:
+        """
+        #include <errno.h>
+        #include <pthread.h>
+        #include <signal.h>
+        #include <string.h>
+        #include <sys/time.h>
+        #include <time.h>
+
+        #include <frameobject.h>
+
+        #define CPUTIMER_MAX_FRAMES 64
+        /* Safety net in case a frame chain is being modified while it is read */
+        #define CPUTIMER_MAX_WALK 65536
+        #define CPUTIMER_BUFFER_SIZE 512
+
+        /* The thread state of the thread holding the GIL, read without checking it is not NULL */
+        #if PY_MAJOR_VERSION >= 3
+        #define CPUTIMER_GIL_TSTATE() _PyThreadState_UncheckedGet()
+        #else
+        #define CPUTIMER_GIL_TSTATE() _PyThreadState_Current
+        #endif
+
+        typedef struct
+        {
+            /* Set by the signal handler once the sample is written, reset by the consumer once it is read */
+            int ready;
+            unsigned long thread_id;
+            /* Wall clock time of the sample, in nanoseconds */
+            long long timestamp_ns;
+            /* Total number of frames of the stack */
+            int nframes;
+            /* Number of frames stored in the sample */
+            int depth;
+            /* Whether the sample holds a reference on its code objects */
+            int owned;
+            PyCodeObject* code[CPUTIMER_MAX_FRAMES];
+            int lasti[CPUTIMER_MAX_FRAMES];
+            int lineno[CPUTIMER_MAX_FRAMES];
+        } cputimer_sample_t;
+
+        static cputimer_sample_t cputimer_buffer[CPUTIMER_BUFFER_SIZE];
+        /* Samples from tail to head are reserved by the signal handlers, the ring buffer is full when
+           head - tail == CPUTIMER_BUFFER_SIZE.
+           There are multiple producers (any thread can handle the signal) and a single consumer (the collector, which
+           holds the GIL). */
+        static unsigned long cputimer_head = 0;
+        static unsigned long cputimer_tail = 0;
+        static unsigned long cputimer_dropped = 0;
+        static int cputimer_max_frames = CPUTIMER_MAX_FRAMES;
+        static struct sigaction cputimer_old_action;
+
+        static void
+        cputimer_handler(int signum)
+        {
+            int saved_errno = errno;
+            unsigned long head;
+            cputimer_sample_t* sample;
+            PyFrameObject* frame;
+            PyCodeObject* code;
+            struct timespec now;
+            int nframes = 0, depth = 0, owned;
+            /* This is the thread state of the thread handling the signal, not the one of the thread holding the GIL */
+            PyThreadState* tstate = PyGILState_GetThisThreadState();
+
+            (void)signum;
+
+            if (tstate == NULL || tstate->frame == NULL)
+                goto end;
+
+            owned = CPUTIMER_GIL_TSTATE() == tstate;
+
+            head = __atomic_load_n(&cputimer_head, __ATOMIC_RELAXED);
+            do {
+                if (head - __atomic_load_n(&cputimer_tail, __ATOMIC_ACQUIRE) >= CPUTIMER_BUFFER_SIZE) {
+                    __atomic_fetch_add(&cputimer_dropped, 1, __ATOMIC_RELAXED);
+                    goto end;
+                }
+            } while (!__atomic_compare_exchange_n(
+              &cputimer_head, &head, head + 1, 1, __ATOMIC_ACQ_REL, __ATOMIC_RELAXED));
+
+            sample = &cputimer_buffer[head % CPUTIMER_BUFFER_SIZE];
+            sample->thread_id = (unsigned long)pthread_self();
+            /* clock_gettime is async-signal-safe */
+            if (clock_gettime(CLOCK_REALTIME, &now) == 0)
+                sample->timestamp_ns = (long long)now.tv_sec * 1000000000LL + now.tv_nsec;
+            else
+                sample->timestamp_ns = 0;
+            sample->owned = owned;
+            /* The thread is interrupted: its frames and their code objects stay alive until the handler returns.
+               Stop at anything that is not a frame or a code object rather than reading garbage. */
+            for (frame = tstate->frame; frame != NULL && nframes < CPUTIMER_MAX_WALK; frame = frame->f_back) {
+                if (Py_TYPE(frame) != &PyFrame_Type)
+                    break;
+                if (depth < cputimer_max_frames) {
+                    code = frame->f_code;
+                    if (code == NULL || Py_TYPE(code) != &PyCode_Type)
+                        break;
+                    /* Only this thread touches reference counts while it holds the GIL */
+                    if (owned)
+                        Py_INCREF(code);
+                    sample->code[depth] = code;
+                    sample->lasti[depth] = frame->f_lasti;
+                    sample->lineno[depth] = PyCode_Addr2Line(code, frame->f_lasti);
+                    depth++;
+                }
+                nframes++;
+            }
+            sample->nframes = nframes;
+            sample->depth = depth;
+            __atomic_store_n(&sample->ready, 1, __ATOMIC_RELEASE);
+
+        end:
+            errno = saved_errno;
+        }
+
+        static int
+        cputimer_start(long interval_us, int max_frames)
+        {
+            struct sigaction action;
+            struct itimerval timer;
+
+            cputimer_max_frames = max_frames < CPUTIMER_MAX_FRAMES ? max_frames : CPUTIMER_MAX_FRAMES;
+
+            memset(&action, 0, sizeof(action));
+            action.sa_handler = cputimer_handler;
+            /* Do not interrupt the system calls of the application */
+            action.sa_flags = SA_RESTART;
+            sigemptyset(&action.sa_mask);
+            if (sigaction(SIGPROF, &action, &cputimer_old_action) != 0)
+                return -1;
+
+            timer.it_interval.tv_sec = interval_us / 1000000;
+            timer.it_interval.tv_usec = interval_us % 1000000;
+            timer.it_value = timer.it_interval;
+            if (setitimer(ITIMER_PROF, &timer, NULL) != 0) {
+                sigaction(SIGPROF, &cputimer_old_action, NULL);
+                return -1;
+            }
+
+            return 0;
+        }
+
+        static int
+        cputimer_stop(void)
+        {
+            struct itimerval timer;
+
+            memset(&timer, 0, sizeof(timer));
+            if (setitimer(ITIMER_PROF, &timer, NULL) != 0)
+                return -1;
+
+            /* A signal might still be pending: ignore it rather than letting the default action kill the process */
+            if (cputimer_old_action.sa_handler == SIG_DFL && !(cputimer_old_action.sa_flags & SA_SIGINFO))
+                cputimer_old_action.sa_handler = SIG_IGN;
+            return sigaction(SIGPROF, &cputimer_old_action, NULL);
+        }
+
+        static cputimer_sample_t*
+        cputimer_peek(void)
+        {
+            cputimer_sample_t* sample;
+
+            if (cputimer_tail == __atomic_load_n(&cputimer_head, __ATOMIC_ACQUIRE))
+                return NULL;
+
+            sample = &cputimer_buffer[cputimer_tail % CPUTIMER_BUFFER_SIZE];
+            /* The slot might be reserved but not written yet */
+            if (!__atomic_load_n(&sample->ready, __ATOMIC_ACQUIRE))
+                return NULL;
+
+            return sample;
+        }
+
+        static void
+        cputimer_pop(cputimer_sample_t* sample)
+        {
+            sample->ready = 0;
+            __atomic_store_n(&cputimer_tail, cputimer_tail + 1, __ATOMIC_RELEASE);
+        }
+
+        static unsigned long
+        cputimer_reset_dropped(void)
+        {
+            return __atomic_exchange_n(&cputimer_dropped, 0, __ATOMIC_RELAXED);
+        }
+        """
+        ctypedef struct cputimer_sample_t:
+            unsigned long thread_id
+            long long timestamp_ns
+            int nframes
+            int depth
+            int owned
+            PyObject* code[64]
+            int lasti[64]
+            int lineno[64]
+
+        int cputimer_start(long interval_us, int max_frames)
+        int cputimer_stop()
+        cputimer_sample_t* cputimer_peek()
+        void cputimer_pop(cputimer_sample_t* sample)
+        unsigned long cputimer_reset_dropped()
+
+    from cpython.exc cimport PyErr_SetFromErrno
+    from cpython.ref cimport Py_DECREF
+    from libc.stdint cimport uintptr_t
+
+    cdef bint _running = False
+
+    def start(interval, max_nframes):
+        """Start the CPU timer.
+
+        :param interval: The CPU time between two samples, in seconds.
+        :param max_nframes: The maximum number of frames recorded per sample.
+        """
+        global _running
+        if _running:
+            raise RuntimeError("The CPU timer is already running")
+        # Release the code objects of the samples left by the previous run
+        drain()
+        if cputimer_start(max(1, int(interval * 1e6)), max_nframes) != 0:
+            PyErr_SetFromErrno(OSError)
+        _running = True
+
+    def stop():
+        """Stop the CPU timer.
+
+        The samples recorded until then can still be drained.
+        """
+        global _running
+        if not _running:
+            return
+        _running = False
+        if cputimer_stop() != 0:
+            PyErr_SetFromErrno(OSError)
+
+    def drain():
+        """Return the samples recorded since the last call.
+
+        :return: A tuple with the list of samples and the number of samples dropped because the buffer was full. A sample
+                 is a tuple of (thread id, wall clock time in nanoseconds, number of frames, list of frames), the most
+                 recent frame first. The time is 0 if the clock could not be read. A frame is a
+                 tuple of (code object, code object address, last instruction, line number). The code object is `None`
+                 if the thread handling the signal did not hold the GIL: its address might then point to another code
+                 object or to freed memory.
+        """
+        cdef cputimer_sample_t* sample
+        cdef int i
+        cdef list samples = []
+        cdef list frames
+
+        while True:
+            sample = cputimer_peek()
+            if sample == NULL:
+                break
+            frames = []
+            for i in range(sample.depth):
+                if sample.owned:
+                    code = <object>sample.code[i]
+                    # Release the reference taken by the signal handler, `code` holds its own
+                    Py_DECREF(code)
+                else:
+                    code = None
+                frames.append((code, <uintptr_t>sample.code[i], sample.lasti[i], sample.lineno[i]))
+            samples.append((sample.thread_id, sample.timestamp_ns, sample.nframes, frames))
+            cputimer_pop(sample)
+
+        return samples, cputimer_reset_dropped()
+ELSE:
+    AVAILABLE = False
+
+    def start(interval, max_nframes):
+        raise RuntimeError("The CPU timer is only available on Linux")
+
+    def stop():
+        pass
+
+    def drain():
+        return [], 0
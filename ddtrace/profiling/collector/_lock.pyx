@@ -0,0 +1,258 @@
+"""Profiled locks.
+
+The sampling decision is taken before anything else: the acquire and release calls that are not sampled go straight to
+the wrapped lock, without reading the clock nor capturing the stack.
+"""
+from __future__ import absolute_import
+
+import sys
+import threading
+
+from ddtrace import compat
+from ddtrace.profiling import event
+from ddtrace.profiling.collector import _traceback
+from ddtrace.vendor import attr
+from ddtrace.vendor.six.moves import _thread
+
+
+@event.event_class
+class LockEventBase(event.StackBasedEvent):
+    """Base Lock event."""
+
+    lock_name = attr.ib(default=None)
+    sampling_pct = attr.ib(default=None)
+
+
+@event.event_class
+class LockAcquireEvent(LockEventBase):
+    """A lock has been acquired."""
+
+    wait_time_ns = attr.ib(default=None)
+
+
+@event.event_class
+class LockReleaseEvent(LockEventBase):
+    """A lock has been released."""
+
+    locked_for_ns = attr.ib(default=None)
+
+
+def _current_thread():
+    # This is a custom version of `threading.current_thread`
+    # that does not try # to create a `DummyThread` on `KeyError`.
+    ident = _thread.get_ident()
+    try:
+        thread = threading._active[ident]
+    except KeyError:
+        name = None
+    else:
+        name = thread.name
+    return ident, name
+
+
+cdef class LockSampler(object):
+    """Decide which lock operations are sampled and record them.
+
+    A single sampler is shared by all the locks of a collector, like its capture sampler.
+    """
+
+    cdef readonly object recorder
+    cdef readonly object tracer
+    cdef readonly int max_nframes
+    cdef readonly double capture_pct
+    cdef double _counter
+    # Ids of the threads recording an event: recording an event can use profiled locks, e.g. the lock of the tracer
+    # context, which must not be sampled. Other threads keep being sampled.
+    cdef set _recording_threads
+
+    def __init__(self, recorder, tracer, max_nframes, capture_pct):
+        if capture_pct < 0 or capture_pct > 100:
+            raise ValueError("Capture percentage should be between 0 and 100 included")
+        self.recorder = recorder
+        self.tracer = tracer
+        self.max_nframes = max_nframes
+        self.capture_pct = capture_pct
+        self._counter = 0
+        self._recording_threads = set()
+
+    cpdef bint capture(self):
+        # DEV: only look up the current thread while some thread is recording
+        if self._recording_threads and _thread.get_ident() in self._recording_threads:
+            return False
+        self._counter += self.capture_pct
+        if self._counter >= 100:
+            self._counter -= 100
+            return True
+        return False
+
+    cdef tuple _get_trace_and_span_ids(self):
+        """Return current trace and span ids."""
+        if self.tracer is None:
+            return (None, None)
+
+        ctxt = self.tracer.get_call_context()
+        # DEV: do not use the `trace_id` and `span_id` properties, they acquire the lock of the context which might be
+        #      the lock being profiled
+        trace_id = ctxt._parent_trace_id
+        span_id = ctxt._parent_span_id
+        return (
+            None if trace_id is None else {trace_id},
+            None if span_id is None else {span_id},
+        )
+
+    cpdef push_acquire(self, lock_name, frame, wait_time_ns):
+        """Record a sampled lock acquisition.
+
+        :param lock_name: The name of the lock.
+        :param frame: The frame acquiring the lock.
+        :param wait_time_ns: The time spent waiting for the lock.
+        """
+        thread_id, thread_name = _current_thread()
+        self._recording_threads.add(thread_id)
+        try:
+            frames, nframes = _traceback.pyframe_to_frames(frame, self.max_nframes)
+            trace_ids, span_ids = self._get_trace_and_span_ids()
+            self.recorder.push_event(
+                LockAcquireEvent(
+                    lock_name=lock_name,
+                    frames=frames,
+                    nframes=nframes,
+                    thread_id=thread_id,
+                    thread_name=thread_name,
+                    trace_ids=trace_ids,
+                    span_ids=span_ids,
+                    wait_time_ns=wait_time_ns,
+                    sampling_pct=self.capture_pct,
+                )
+            )
+        finally:
+            self._recording_threads.discard(thread_id)
+
+    cpdef push_release(self, lock_name, frame, locked_for_ns):
+        """Record the release of a lock whose acquisition was sampled.
+
+        :param lock_name: The name of the lock.
+        :param frame: The frame releasing the lock.
+        :param locked_for_ns: The time the lock was held.
+        """
+        thread_id, thread_name = _current_thread()
+        self._recording_threads.add(thread_id)
+        try:
+            frames, nframes = _traceback.pyframe_to_frames(frame, self.max_nframes)
+            trace_ids, span_ids = self._get_trace_and_span_ids()
+            self.recorder.push_event(
+                LockReleaseEvent(
+                    lock_name=lock_name,
+                    frames=frames,
+                    nframes=nframes,
+                    thread_id=thread_id,
+                    thread_name=thread_name,
+                    trace_ids=trace_ids,
+                    span_ids=span_ids,
+                    locked_for_ns=locked_for_ns,
+                    sampling_pct=self.capture_pct,
+                )
+            )
+        finally:
+            self._recording_threads.discard(thread_id)
+
+
+cdef class ProfiledLock(object):
+    """Wrapper of a `threading.Lock` or `threading.RLock` object.
+
+    Any attribute that is not profiled is read from the wrapped lock, including `__class__` so that `isinstance` checks
+    against the type of the wrapped lock keep working.
+    """
+
+    cdef readonly object __wrapped__
+    cdef readonly object name
+    cdef LockSampler _sampler
+    # Acquisition times of the lock while it is held and one of its acquisitions was sampled, `None` otherwise. The
+    # acquisitions that are not sampled are 0. A `RLock` can be acquired several times by the thread holding it, each
+    # release matches the last acquisition.
+    cdef list _acquired_at
+    cdef object __weakref__
+
+    def __init__(self, wrapped, LockSampler sampler, name):
+        self.__wrapped__ = wrapped
+        self._sampler = sampler
+        self.name = name
+        self._acquired_at = None
+
+    @property
+    def __class__(self):
+        return self.__wrapped__.__class__
+
+    def acquire(self, *args, **kwargs):
+        cdef list acquired_at
+
+        if not self._sampler.capture():
+            if self._acquired_at is None:
+                return self.__wrapped__.acquire(*args, **kwargs)
+            # A sampled acquisition is held: record this one so the releases match their acquisition
+            acquired = self.__wrapped__.acquire(*args, **kwargs)
+            if acquired:
+                acquired_at = self._acquired_at
+                if acquired_at is not None:
+                    acquired_at.append(0)
+            return acquired
+
+        start = compat.monotonic_ns()
+        acquired = False
+        try:
+            acquired = self.__wrapped__.acquire(*args, **kwargs)
+            return acquired
+        finally:
+            if acquired:
+                try:
+                    end = compat.monotonic_ns()
+                    # DEV: only the thread holding the lock updates the acquisitions
+                    if self._acquired_at is None:
+                        self._acquired_at = [end]
+                    else:
+                        self._acquired_at.append(end)
+                    # DEV: this method does not have a Python frame, the current frame is the one of the caller
+                    self._sampler.push_acquire(self.name, sys._getframe(0), end - start)
+                except Exception:
+                    pass
+
+    def release(self, *args, **kwargs):
+        cdef list acquired_at_list = self._acquired_at
+        cdef long long acquired_at
+
+        if acquired_at_list is None:
+            return self.__wrapped__.release(*args, **kwargs)
+
+        # DEV: update the acquisitions before releasing, another thread might acquire the lock right after
+        acquired_at = acquired_at_list.pop() if acquired_at_list else 0
+        if not acquired_at_list:
+            self._acquired_at = None
+
+        if acquired_at == 0:
+            return self.__wrapped__.release(*args, **kwargs)
+
+        try:
+            return self.__wrapped__.release(*args, **kwargs)
+        finally:
+            try:
+                self._sampler.push_release(self.name, sys._getframe(0), compat.monotonic_ns() - acquired_at)
+            except Exception:
+                pass
+
+    def acquire_lock(self, *args, **kwargs):
+        return self.acquire(*args, **kwargs)
+
+    def release_lock(self, *args, **kwargs):
+        return self.release(*args, **kwargs)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __getattr__(self, name):
+        return getattr(self.__wrapped__, name)
+
+    def __repr__(self):
+        return "<%s %s for %r>" % (self.__class__.__name__, self.name, self.__wrapped__)
@@ -6,6 +6,7 @@
 #include <Python.h>
 #include <frameobject.h>
 
+#include "_memalloc_heap.h"
 #include "_memalloc_tb.h"
 #include "_pymacro.h"
 
@@ -24,6 +25,19 @@ static memalloc_context_t global_memalloc_ctx;
 
 static traceback_list_t* global_traceback_list;
 
+/* Only used in heap tracking mode */
+static heap_tracker_t global_heap_tracker;
+
+#ifdef _MSC_VER
+#define MEMALLOC_THREAD_LOCAL __declspec(thread)
+#else
+#define MEMALLOC_THREAD_LOCAL __thread
+#endif
+
+/* Number of bytes allocated by the current thread since the module has been started. The allocator of the object
+   domain is always called with the GIL held, so this is only updated by the thread owning it. */
+static MEMALLOC_THREAD_LOCAL uint64_t thread_allocated_bytes;
+
 static uint64_t
 random_range(uint64_t max)
 {
@@ -63,6 +77,16 @@ memalloc_add_event(memalloc_context_t* ctx, void* ptr, size_t size)
     }
 }
 
+static void
+memalloc_heap_add_event(memalloc_context_t* ctx, void* ptr, size_t size)
+{
+    if (memalloc_heap_should_sample(&global_heap_tracker, size)) {
+        traceback_t* tb = memalloc_get_traceback(ctx->max_nframe, ptr, size);
+        if (tb)
+            memalloc_heap_track(&global_heap_tracker, tb);
+    }
+}
+
 static void
 memalloc_free(void* ctx, void* ptr)
 {
@@ -71,6 +95,8 @@ memalloc_free(void* ctx, void* ptr)
     if (ptr == NULL)
         return;
 
+    memalloc_heap_untrack(&global_heap_tracker, ptr);
+
     alloc->free(alloc->ctx, ptr);
 }
 
@@ -85,8 +111,11 @@ memalloc_alloc(int use_calloc, void* ctx, size_t nelem, size_t elsize)
     else
         ptr = memalloc_ctx->pymem_allocator_obj.malloc(memalloc_ctx->pymem_allocator_obj.ctx, nelem * elsize);
 
-    if (ptr)
+    if (ptr) {
+        thread_allocated_bytes += nelem * elsize;
         memalloc_add_event(memalloc_ctx, ptr, nelem * elsize);
+        memalloc_heap_add_event(memalloc_ctx, ptr, nelem * elsize);
+    }
 
     return ptr;
 }
@@ -109,8 +138,16 @@ memalloc_realloc(void* ctx, void* ptr, size_t new_size)
     memalloc_context_t* memalloc_ctx = (memalloc_context_t*)ctx;
     void* ptr2 = memalloc_ctx->pymem_allocator_obj.realloc(memalloc_ctx->pymem_allocator_obj.ctx, ptr, new_size);
 
-    if (ptr2)
+    if (ptr2) {
+        /* The size of the previous memory block is unknown: only count the memory blocks that are newly allocated,
+           not the ones resized in place */
+        if (ptr2 != ptr)
+            thread_allocated_bytes += new_size;
         memalloc_add_event(memalloc_ctx, ptr2, new_size);
+        /* The previous memory block is either freed or resized */
+        memalloc_heap_untrack(&global_heap_tracker, ptr);
+        memalloc_heap_add_event(memalloc_ctx, ptr2, new_size);
+    }
 
     return ptr2;
 }
@@ -133,13 +170,16 @@ traceback_list_free(traceback_list_t* tb_list)
 }
 
 PyDoc_STRVAR(memalloc_start__doc__,
-             "start($module, max_nframe, max_events)\n"
+             "start($module, max_nframe, max_events, heap_sample_size=0)\n"
              "--\n"
              "\n"
              "Start tracing Python memory allocations.\n"
              "\n"
              "Sets the maximum number of frames stored in the traceback of a\n"
-             "trace to max_nframe and the maximum number of events to max_events.");
+             "trace to max_nframe and the maximum number of events to max_events.\n"
+             "\n"
+             "If heap_sample_size is not 0, also track an allocation every\n"
+             "heap_sample_size bytes allocated on average until it is freed.");
 static PyObject*
 memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
 {
@@ -149,9 +189,10 @@ memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
     }
 
     long max_nframe, max_events;
+    unsigned long long heap_sample_size = 0;
 
     /* Store short int in long so we're sure they fit */
-    if (!PyArg_ParseTuple(args, "ll", &max_nframe, &max_events))
+    if (!PyArg_ParseTuple(args, "ll|K", &max_nframe, &max_events, &heap_sample_size))
         return NULL;
 
     if (max_nframe < 1 || max_nframe > TRACEBACK_MAX_NFRAME) {
@@ -168,6 +209,9 @@ memalloc_start(PyObject* Py_UNUSED(module), PyObject* args)
 
     global_memalloc_ctx.max_events = (uint16_t)max_events;
 
+    if (heap_sample_size && !memalloc_heap_tracker_init(&global_heap_tracker, heap_sample_size))
+        return PyErr_NoMemory();
+
     PyMemAllocatorEx alloc;
 
     alloc.malloc = memalloc_malloc;
@@ -193,9 +237,17 @@ traceback_to_tuple(traceback_t* tb)
     /* Convert stack into a tuple of tuple */
     PyObject* stack = PyTuple_New(tb->nframe);
 
+    if (stack == NULL)
+        return NULL;
+
     for (uint16_t nframe = 0; nframe < tb->nframe; nframe++) {
         PyObject* frame_tuple = PyTuple_New(3);
 
+        if (frame_tuple == NULL) {
+            Py_DECREF(stack);
+            return NULL;
+        }
+
         frame_t* frame = &tb->frames[nframe];
 
         PyTuple_SET_ITEM(frame_tuple, 0, frame->filename);
@@ -205,17 +257,62 @@ traceback_to_tuple(traceback_t* tb)
         Py_INCREF(frame->name);
 
         PyTuple_SET_ITEM(stack, nframe, frame_tuple);
+
+        if (PyTuple_GET_ITEM(frame_tuple, 1) == NULL) {
+            Py_DECREF(stack);
+            return NULL;
+        }
     }
 
     PyObject* tuple = PyTuple_New(3);
 
+    if (tuple == NULL) {
+        Py_DECREF(stack);
+        return NULL;
+    }
+
     PyTuple_SET_ITEM(tuple, 0, stack);
     PyTuple_SET_ITEM(tuple, 1, PyLong_FromUnsignedLong(tb->total_nframe));
     PyTuple_SET_ITEM(tuple, 2, PyLong_FromUnsignedLong(tb->thread_id));
 
+    if (PyTuple_GET_ITEM(tuple, 1) == NULL || PyTuple_GET_ITEM(tuple, 2) == NULL) {
+        Py_DECREF(tuple);
+        return NULL;
+    }
+
     return tuple;
 }
 
+/* Return a tuple of (traceback tuple, size) or NULL with an exception set */
+static PyObject*
+traceback_and_size_to_tuple(traceback_t* tb)
+{
+    PyObject* tb_tuple = traceback_to_tuple(tb);
+
+    if (tb_tuple == NULL)
+        return NULL;
+
+    PyObject* size = PyLong_FromSize_t(tb->size);
+
+    if (size == NULL) {
+        Py_DECREF(tb_tuple);
+        return NULL;
+    }
+
+    PyObject* tb_and_size = PyTuple_New(2);
+
+    if (tb_and_size == NULL) {
+        Py_DECREF(tb_tuple);
+        Py_DECREF(size);
+        return NULL;
+    }
+
+    PyTuple_SET_ITEM(tb_and_size, 0, tb_tuple);
+    PyTuple_SET_ITEM(tb_and_size, 1, size);
+
+    return tb_and_size;
+}
+
 static void
 traceback_list_free_tracebacks(traceback_list_t* tb_list)
 {
@@ -239,6 +336,7 @@ memalloc_stop(PyObject* Py_UNUSED(module), PyObject* Py_UNUSED(args))
     }
 
     PyMem_SetAllocator(PYMEM_DOMAIN_OBJ, &global_memalloc_ctx.pymem_allocator_obj);
+    memalloc_heap_tracker_deinit(&global_heap_tracker);
     memalloc_tb_deinit();
     traceback_list_free_tracebacks(global_traceback_list);
     traceback_list_free(global_traceback_list);
@@ -247,6 +345,74 @@ memalloc_stop(PyObject* Py_UNUSED(module), PyObject* Py_UNUSED(args))
     Py_RETURN_NONE;
 }
 
+PyDoc_STRVAR(memalloc_heap__doc__,
+             "heap($module, /)\n"
+             "--\n"
+             "\n"
+             "Return a tuple of the tracked memory allocations that have not been freed.\n"
+             "\n"
+             "Each item is a tuple of ((stack, nframes, thread_id), size).");
+static PyObject*
+memalloc_heap(PyObject* Py_UNUSED(module), PyObject* Py_UNUSED(args))
+{
+    if (!global_traceback_list) {
+        PyErr_SetString(PyExc_RuntimeError, "the memalloc module was not started");
+        return NULL;
+    }
+
+    if (global_heap_tracker.entries == NULL)
+        return PyTuple_New(0);
+
+    /* Creating Python objects goes through the allocator, which updates the heap tracker: take a snapshot of the
+       tracked tracebacks first. */
+    uint32_t count = 0;
+    traceback_t** snapshot = PyMem_RawMalloc(sizeof(traceback_t*) * (global_heap_tracker.count + 1));
+    if (snapshot == NULL)
+        return PyErr_NoMemory();
+
+    for (uint32_t i = 0; i < global_heap_tracker.capacity; i++) {
+        if (global_heap_tracker.entries[i].ptr) {
+            traceback_t* tb = traceback_copy(global_heap_tracker.entries[i].tb);
+            if (tb)
+                snapshot[count++] = tb;
+        }
+    }
+
+    PyObject* heap = PyTuple_New(count);
+
+    for (uint32_t i = 0; i < count; i++) {
+        /* Keep freeing the snapshot if the tuple could not be built */
+        if (heap) {
+            PyObject* tb_and_size = traceback_and_size_to_tuple(snapshot[i]);
+            if (tb_and_size == NULL)
+                Py_CLEAR(heap);
+            else
+                PyTuple_SET_ITEM(heap, i, tb_and_size);
+        }
+        traceback_free(snapshot[i]);
+    }
+
+    PyMem_RawFree(snapshot);
+
+    return heap;
+}
+
+PyDoc_STRVAR(memalloc_thread_allocated_bytes__doc__,
+             "thread_allocated_bytes($module, /)\n"
+             "--\n"
+             "\n"
+             "Return the number of bytes allocated by the current thread while the module was started.\n"
+             "\n"
+             "Return None if the module is not started.");
+static PyObject*
+memalloc_thread_allocated_bytes(PyObject* Py_UNUSED(module), PyObject* Py_UNUSED(args))
+{
+    if (!global_traceback_list)
+        Py_RETURN_NONE;
+
+    return PyLong_FromUnsignedLongLong(thread_allocated_bytes);
+}
+
 typedef struct
 {
     PyObject_HEAD traceback_list_t* traceback_list;
@@ -303,11 +469,8 @@ iterevents_next(IterEventsState* iestate)
         traceback_t* tb = iestate->traceback_list->tracebacks[iestate->seq_index];
         iestate->seq_index++;
 
-        PyObject* tb_and_size = PyTuple_New(2);
-        PyTuple_SET_ITEM(tb_and_size, 0, traceback_to_tuple(tb));
-        PyTuple_SET_ITEM(tb_and_size, 1, PyLong_FromSize_t(tb->size));
-
-        return tb_and_size;
+        /* NULL with an exception set if the tuple could not be built */
+        return traceback_and_size_to_tuple(tb);
     }
 
     /* Returning NULL in this case is enough. The next() builtin will raise the
@@ -374,6 +537,11 @@ static PyTypeObject MemallocIterEvents_Type = {
 
 static PyMethodDef module_methods[] = { { "start", (PyCFunction)memalloc_start, METH_VARARGS, memalloc_start__doc__ },
                                         { "stop", (PyCFunction)memalloc_stop, METH_NOARGS, memalloc_stop__doc__ },
+                                        { "heap", (PyCFunction)memalloc_heap, METH_NOARGS, memalloc_heap__doc__ },
+                                        { "thread_allocated_bytes",
+                                          (PyCFunction)memalloc_thread_allocated_bytes,
+                                          METH_NOARGS,
+                                          memalloc_thread_allocated_bytes__doc__ },
                                         /* sentinel */
                                         { NULL, NULL, 0, NULL } };
 
@@ -401,5 +569,10 @@ PyInit__memalloc(void)
     PyModule_AddObject(m, "iter_events", (PyObject*)&MemallocIterEvents_Type);
 #endif
 
+    if (PyModule_AddIntConstant(m, "HEAP_MAX_COUNT", HEAP_TRACKER_MAX_COUNT) < 0) {
+        Py_DECREF(m);
+        return NULL;
+    }
+
     return m;
 }
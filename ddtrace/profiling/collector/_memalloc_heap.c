@@ -0,0 +1,125 @@
+#include <stdlib.h>
+#include <string.h>
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "_memalloc_heap.h"
+
+/* The hash table is never more than half full */
+#define HEAP_TRACKER_CAPACITY (HEAP_TRACKER_MAX_COUNT * 2)
+
+static uint64_t
+heap_tracker_next_sample_size(uint64_t sample_size)
+{
+    /* Pick a random number of bytes in [0; 2 * sample_size[, so the sampled allocations are not always the same ones
+       in a deterministic allocation pattern, while allocating on average sample_size bytes between samples. */
+    return (uint64_t)((double)rand() / ((double)RAND_MAX + 1) * 2 * sample_size);
+}
+
+static uint32_t
+heap_tracker_slot(void* ptr)
+{
+    /* Fibonacci hashing: the low bits of pointers are always the same because of memory alignment */
+    return (uint32_t)(((uint64_t)(uintptr_t)ptr * UINT64_C(11400714819323198485)) >> 32) & (HEAP_TRACKER_CAPACITY - 1);
+}
+
+bool
+memalloc_heap_tracker_init(heap_tracker_t* heap_tracker, uint64_t sample_size)
+{
+    heap_tracker->capacity = HEAP_TRACKER_CAPACITY;
+    heap_tracker->count = 0;
+    heap_tracker->sample_size = sample_size;
+    heap_tracker->next_sample = heap_tracker_next_sample_size(sample_size);
+    heap_tracker->entries = PyMem_RawCalloc(HEAP_TRACKER_CAPACITY, sizeof(heap_tracker->entries[0]));
+    return heap_tracker->entries != NULL;
+}
+
+void
+memalloc_heap_tracker_deinit(heap_tracker_t* heap_tracker)
+{
+    if (heap_tracker->entries == NULL)
+        return;
+
+    for (uint32_t i = 0; i < heap_tracker->capacity; i++)
+        if (heap_tracker->entries[i].ptr)
+            traceback_free(heap_tracker->entries[i].tb);
+
+    PyMem_RawFree(heap_tracker->entries);
+    heap_tracker->entries = NULL;
+    heap_tracker->count = 0;
+}
+
+bool
+memalloc_heap_should_sample(heap_tracker_t* heap_tracker, size_t size)
+{
+    if (heap_tracker->entries == NULL)
+        return false;
+
+    if (size < heap_tracker->next_sample) {
+        heap_tracker->next_sample -= size;
+        return false;
+    }
+
+    heap_tracker->next_sample = heap_tracker_next_sample_size(heap_tracker->sample_size);
+
+    /* Keep the memory overhead bounded: the allocation is not sampled if the table is full */
+    return heap_tracker->count < HEAP_TRACKER_MAX_COUNT;
+}
+
+void
+memalloc_heap_track(heap_tracker_t* heap_tracker, traceback_t* tb)
+{
+    uint32_t slot = heap_tracker_slot(tb->ptr);
+
+    while (heap_tracker->entries[slot].ptr) {
+        if (heap_tracker->entries[slot].ptr == tb->ptr) {
+            /* The memory block has been reallocated in place */
+            traceback_free(heap_tracker->entries[slot].tb);
+            heap_tracker->entries[slot].tb = tb;
+            return;
+        }
+        slot = (slot + 1) & (heap_tracker->capacity - 1);
+    }
+
+    heap_tracker->entries[slot].ptr = tb->ptr;
+    heap_tracker->entries[slot].tb = tb;
+    heap_tracker->count++;
+}
+
+void
+memalloc_heap_untrack(heap_tracker_t* heap_tracker, void* ptr)
+{
+    if (ptr == NULL || heap_tracker->count == 0)
+        return;
+
+    uint32_t mask = heap_tracker->capacity - 1;
+    uint32_t slot = heap_tracker_slot(ptr);
+
+    while (heap_tracker->entries[slot].ptr != ptr) {
+        if (heap_tracker->entries[slot].ptr == NULL)
+            /* Not tracked */
+            return;
+        slot = (slot + 1) & mask;
+    }
+
+    traceback_t* tb = heap_tracker->entries[slot].tb;
+
+    /* Backward shift deletion: move back the next entries of the cluster that would not be found anymore */
+    uint32_t hole = slot;
+    for (uint32_t next = (hole + 1) & mask; heap_tracker->entries[next].ptr; next = (next + 1) & mask) {
+        uint32_t home = heap_tracker_slot(heap_tracker->entries[next].ptr);
+        /* Move the entry if its home slot is not in the cyclic range ]hole; next] */
+        if (((next - home) & mask) >= ((next - hole) & mask)) {
+            heap_tracker->entries[hole] = heap_tracker->entries[next];
+            hole = next;
+        }
+    }
+    heap_tracker->entries[hole].ptr = NULL;
+    heap_tracker->entries[hole].tb = NULL;
+    heap_tracker->count--;
+
+    /* Free the traceback last: it releases references to Python objects, which can free memory and re-enter the
+       allocator */
+    traceback_free(tb);
+}
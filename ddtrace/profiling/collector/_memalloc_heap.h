@@ -0,0 +1,43 @@
+#ifndef _DDTRACE_MEMALLOC_HEAP_H
+#define _DDTRACE_MEMALLOC_HEAP_H
+
+#include <stdbool.h>
+#include <stdint.h>
+
+#include "_memalloc_tb.h"
+
+/* The maximum number of live allocations tracked at the same time */
+#define HEAP_TRACKER_MAX_COUNT 4096
+
+/* Sampled allocations that have not been freed yet */
+typedef struct
+{
+    /* Open addressing hash table indexed by memory pointer, with linear probing */
+    struct
+    {
+        void* ptr;
+        traceback_t* tb;
+    } * entries;
+    /* Number of slots of the hash table, a power of 2 */
+    uint32_t capacity;
+    /* Number of allocations tracked */
+    uint32_t count;
+    /* Average number of bytes allocated between two sampled allocations */
+    uint64_t sample_size;
+    /* Number of bytes to allocate before sampling the next allocation */
+    uint64_t next_sample;
+} heap_tracker_t;
+
+bool
+memalloc_heap_tracker_init(heap_tracker_t* heap_tracker, uint64_t sample_size);
+void
+memalloc_heap_tracker_deinit(heap_tracker_t* heap_tracker);
+
+bool
+memalloc_heap_should_sample(heap_tracker_t* heap_tracker, size_t size);
+void
+memalloc_heap_track(heap_tracker_t* heap_tracker, traceback_t* tb);
+void
+memalloc_heap_untrack(heap_tracker_t* heap_tracker, void* ptr);
+
+#endif
@@ -49,6 +49,24 @@ traceback_free(traceback_t* tb)
     PyMem_RawFree(tb);
 }
 
+traceback_t*
+traceback_copy(traceback_t* tb)
+{
+    size_t traceback_size = TRACEBACK_SIZE(tb->nframe);
+    traceback_t* copy = PyMem_RawMalloc(traceback_size);
+
+    if (copy == NULL)
+        return NULL;
+
+    memcpy(copy, tb, traceback_size);
+    for (uint16_t nframe = 0; nframe < copy->nframe; nframe++) {
+        Py_INCREF(copy->frames[nframe].filename);
+        Py_INCREF(copy->frames[nframe].name);
+    }
+
+    return copy;
+}
+
 /* Convert PyFrameObject to a frame_t that we can store in memory */
 static void
 memalloc_convert_frame(PyFrameObject* pyframe, frame_t* frame)
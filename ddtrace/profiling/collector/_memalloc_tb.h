@@ -57,6 +57,8 @@ memalloc_tb_deinit();
 
 void
 traceback_free(traceback_t* tb);
+traceback_t*
+traceback_copy(traceback_t* tb);
 
 traceback_t*
 memalloc_get_traceback(uint16_t max_nframe, void* ptr, size_t size);
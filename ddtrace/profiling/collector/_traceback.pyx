@@ -1,3 +1,138 @@
+from libc.stdint cimport uint64_t, uintptr_t
+from cpython.object cimport PyObject
+
+import weakref
+
+
+cdef extern from "frameobject.h":
+    ctypedef struct PyCodeObject:
+        pass
+
+    ctypedef struct PyFrameObject:
+        PyFrameObject *f_back
+        PyCodeObject *f_code
+        int f_lasti
+
+    int PyCode_Addr2Line(PyCodeObject *co, int addrq)
+
+
+# Cache of the serialized frames.
+# The line number of a frame only depends on its code object and its last instruction, so the same frame tuple is
+# reused by every sample instead of being built again.
+# Keys are the code object address and the last instruction packed in a single integer.
+cdef dict _frames_cache = {}
+# Keys are code object ids, values are a tuple of (weak reference to the code object, list of keys in _frames_cache).
+# The frames of a code object are removed from the cache when it is deallocated, before its address can be reused.
+cdef dict _code_keys = {}
+
+# The maximum number of frames in the cache. Once reached, the frames of the code objects cached first are evicted.
+DEF _MAX_CACHED_FRAMES = 65536
+
+# Code objects are at least 8-byte aligned: 3 bits of their address are always 0.
+DEF _CODE_ALIGN_BITS = 3
+DEF _LASTI_BITS = 20
+DEF _CODE_BITS = 64 - _LASTI_BITS
+cdef uint64_t _MAX_LASTI = 1 << _LASTI_BITS
+cdef uint64_t _MAX_CODE = (<uint64_t>1) << _CODE_BITS
+
+
+class _CodeEvictor(object):
+    __slots__ = ("code_id",)
+
+    def __init__(self, code_id):
+        self.code_id = code_id
+
+    def __call__(self, ref):
+        _, keys = _code_keys.pop(self.code_id, (None, ()))
+        for key in keys:
+            _frames_cache.pop(key, None)
+
+
+cdef object _code_key(uintptr_t code_address, int lasti):
+    cdef uint64_t code = (<uint64_t>code_address) >> _CODE_ALIGN_BITS
+    if lasti < 0 or <uint64_t>lasti >= _MAX_LASTI or code >= _MAX_CODE:
+        return None
+    return (code << _LASTI_BITS) | <uint64_t>lasti
+
+
+cdef object _evict_code():
+    # DEV: dicts keep their insertion order on Python >= 3.7, so this is the code object cached first
+    code_id = next(iter(_code_keys))
+    _, keys = _code_keys.pop(code_id)
+    for key in keys:
+        _frames_cache.pop(key, None)
+
+
+cdef object _cache_frame(code, key, serialized):
+    # Evict before looking up the keys of the code object, which might be the one evicted
+    while len(_frames_cache) >= _MAX_CACHED_FRAMES and _code_keys:
+        _evict_code()
+
+    code_id = id(code)
+    try:
+        code_keys = (<tuple>_code_keys[code_id])[1]
+    except KeyError:
+        try:
+            ref = weakref.ref(code, _CodeEvictor(code_id))
+        except TypeError:
+            # This code object can't be weakly referenced: don't cache its frames
+            return
+        code_keys = []
+        _code_keys[code_id] = (ref, code_keys)
+    code_keys.append(key)
+    _frames_cache[key] = serialized
+
+
+cdef object _serialize_frame(PyFrameObject* frame):
+    key = _code_key(<uintptr_t>frame.f_code, frame.f_lasti)
+    if key is not None:
+        try:
+            return _frames_cache[key]
+        except KeyError:
+            pass
+
+    code = <object>(<PyObject*>frame.f_code)
+    serialized = (code.co_filename, (<object>(<PyObject*>frame)).f_lineno, code.co_name)
+
+    if key is not None:
+        _cache_frame(code, key, serialized)
+
+    return serialized
+
+
+cpdef code_address_to_frame(uintptr_t code_address, int lasti):
+    """Serialize an instruction of a code object into a tuple of (filename, lineno, function_name).
+
+    The code object is identified by its address. Only the code objects known by the frame cache can be resolved,
+    as the address of any other code object might not point to a live object.
+
+    :param code_address: The address of the code object.
+    :param lasti: The index of the instruction in the code object.
+    :return: The serialized frame or `None` if the code object is unknown.
+    """
+    key = _code_key(code_address, lasti)
+    if key is None:
+        return None
+
+    try:
+        return _frames_cache[key]
+    except KeyError:
+        pass
+
+    try:
+        ref = (<tuple>_code_keys[code_address])[0]
+    except KeyError:
+        return None
+
+    code = ref()
+    if code is None:
+        return None
+
+    serialized = (code.co_filename, PyCode_Addr2Line(<PyCodeObject*>code, lasti), code.co_name)
+    _cache_frame(code, key, serialized)
+    return serialized
+
+
 cpdef traceback_to_frames(traceback, max_nframes):
     """Serialize a Python traceback object into a list of tuple of (filename, lineno, function_name).
 
@@ -10,9 +145,7 @@ cpdef traceback_to_frames(traceback, max_nframes):
     nframes = 0
     while tb is not None:
         if nframes < max_nframes:
-            frame = tb.tb_frame
-            code = frame.f_code
-            frames.insert(0, (code.co_filename, frame.f_lineno, code.co_name))
+            frames.insert(0, _serialize_frame(<PyFrameObject*>tb.tb_frame))
         nframes += 1
         tb = tb.tb_next
     return frames, nframes
@@ -24,12 +157,19 @@ cpdef pyframe_to_frames(frame, max_nframes):
     :param frame: The frame object to serialize.
     :param max_nframes: The maximum number of frames to return.
     :return: The serialized frames and the number of frames present in the original traceback."""
-    frames = []
-    nframes = 0
-    while frame is not None:
-        nframes += 1
-        if len(frames) < max_nframes:
-            code = frame.f_code
-            frames.append((code.co_filename, frame.f_lineno, code.co_name))
-        frame = frame.f_back
-    return frames, nframes
+    cdef PyFrameObject* f
+    cdef Py_ssize_t max_frames = max_nframes
+    cdef Py_ssize_t n = 0
+    cdef list frames = []
+
+    if frame is None:
+        return frames, 0
+
+    # DEV: `frame` holds a reference to all its parents, so the whole chain stays alive while we walk it
+    f = <PyFrameObject*>frame
+    while f != NULL:
+        if n < max_frames:
+            frames.append(_serialize_frame(f))
+        n += 1
+        f = f.f_back
+    return frames, n
@@ -0,0 +1,97 @@
+from __future__ import absolute_import
+
+import asyncio
+import sys
+
+from ddtrace import compat
+from ddtrace.profiling import _attr
+from ddtrace.profiling import collector
+from ddtrace.profiling.collector import _lock
+from ddtrace.profiling.collector import threading
+from ddtrace.vendor import attr
+
+
+class _ProfiledAsyncioLock(asyncio.Lock):
+    """Profiled `asyncio.Lock`.
+
+    This is a subclass rather than a proxy so `isinstance` checks against `asyncio.Lock` keep working.
+    """
+
+    # Set by the subclass created by the collector
+    _dd_sampler = None
+
+    def __init__(self, *args, **kwargs):
+        super(_ProfiledAsyncioLock, self).__init__(*args, **kwargs)
+        self._dd_name = threading._lock_name(sys._getframe(1))
+        self._dd_acquired_at = 0
+
+    def _dd_acquire(self, frame):
+        if not self._dd_sampler.capture():
+            return super(_ProfiledAsyncioLock, self).acquire()
+        return self._dd_acquire_sampled(frame)
+
+    async def _dd_acquire_sampled(self, frame):
+        start = compat.monotonic_ns()
+        try:
+            return await super(_ProfiledAsyncioLock, self).acquire()
+        finally:
+            try:
+                end = self._dd_acquired_at = compat.monotonic_ns()
+                self._dd_sampler.push_acquire(self._dd_name, frame, end - start)
+            except Exception:
+                pass
+
+    def _dd_release(self, frame):
+        acquired_at = self._dd_acquired_at
+
+        if acquired_at == 0:
+            return super(_ProfiledAsyncioLock, self).release()
+
+        self._dd_acquired_at = 0
+        try:
+            return super(_ProfiledAsyncioLock, self).release()
+        finally:
+            try:
+                self._dd_sampler.push_release(self._dd_name, frame, compat.monotonic_ns() - acquired_at)
+            except Exception:
+                pass
+
+    def acquire(self):
+        return self._dd_acquire(sys._getframe(1))
+
+    def release(self):
+        return self._dd_release(sys._getframe(1))
+
+    async def __aenter__(self):
+        await self._dd_acquire(sys._getframe(1))
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._dd_release(sys._getframe(1))
+
+
+@attr.s
+class AsyncioLockCollector(collector.CaptureSamplerCollector):
+    """Record `asyncio.Lock` usage."""
+
+    nframes = attr.ib(factory=_attr.from_env("DD_PROFILING_MAX_FRAMES", 64, int))
+    tracer = attr.ib(default=None)
+
+    def start(self):
+        """Start collecting `asyncio.Lock` usage."""
+        super(AsyncioLockCollector, self).start()
+        self.patch()
+
+    def stop(self):
+        """Stop collecting `asyncio.Lock` usage."""
+        self.unpatch()
+        super(AsyncioLockCollector, self).stop()
+
+    def patch(self):
+        """Patch the asyncio module for tracking lock allocation."""
+        self.original = asyncio.Lock
+        sampler = _lock.LockSampler(self.recorder, self.tracer, self.nframes, self.capture_pct)
+        asyncio.Lock = type("Lock", (_ProfiledAsyncioLock,), {"_dd_sampler": sampler})
+
+    def unpatch(self):
+        """Unpatch the asyncio module for tracking lock allocation."""
+        asyncio.Lock = self.original
@@ -5,6 +5,7 @@ try:
 except ImportError:
     _memalloc = None
 
+from ddtrace import compat
 from ddtrace.profiling import _attr
 from ddtrace.profiling import collector
 from ddtrace.profiling import event
@@ -30,12 +31,28 @@ class MemoryAllocSampleEvent(event.StackBasedEvent):
     """The total number of allocation events sampled."""
 
 
+@event.event_class
+class MemoryHeapSampleEvent(event.StackBasedEvent):
+    """A sample storing a memory allocation that has not been freed yet.
+
+    All the samples of a heap snapshot share the same timestamp.
+    """
+
+    size = attr.ib(default=None)
+    """Allocation size in bytes."""
+
+    sample_size = attr.ib(default=None)
+    """The average number of bytes allocated between two samples."""
+
+
 @attr.s
 class MemoryCollector(collector.PeriodicCollector):
     """Memory allocation collector."""
 
     _DEFAULT_MAX_EVENTS = 32
     _DEFAULT_INTERVAL = 0.5
+    # The maximum number of allocations tracked in the heap
+    _HEAP_MAX_EVENTS = _memalloc.HEAP_MAX_COUNT if _memalloc is not None else 0
 
     # Arbitrary interval to empty the _memalloc event buffer
     _interval = attr.ib(default=_DEFAULT_INTERVAL, repr=False)
@@ -44,12 +61,18 @@ class MemoryCollector(collector.PeriodicCollector):
     _max_events = attr.ib(factory=_attr.from_env("_DD_PROFILING_MEMORY_EVENTS_BUFFER", _DEFAULT_MAX_EVENTS, int))
     max_nframe = attr.ib(factory=_attr.from_env("DD_PROFILING_MAX_FRAMES", 64, int))
     ignore_profiler = attr.ib(factory=_attr.from_env("DD_PROFILING_IGNORE_PROFILER", True, formats.asbool))
+    # 0 disables the heap tracking
+    heap_sample_size = attr.ib(factory=_attr.from_env("DD_PROFILING_HEAP_SAMPLE_SIZE", 0, int))
+    # Interval between two snapshots of the live heap
+    _heap_interval = attr.ib(factory=_attr.from_env("_DD_PROFILING_HEAP_INTERVAL", 10.0, float), repr=False)
+    _last_heap_snapshot = attr.ib(default=None, init=False, repr=False)
 
     def start(self):
         """Start collecting memory profiles."""
         if _memalloc is None:
             raise RuntimeError("memalloc is unavailable")
-        _memalloc.start(self.max_nframe, self._max_events)
+        _memalloc.start(self.max_nframe, self._max_events, self.heap_sample_size)
+        self._last_heap_snapshot = None
         super(MemoryCollector, self).start()
 
     def stop(self):
@@ -60,27 +83,53 @@ class MemoryCollector(collector.PeriodicCollector):
                 pass
             super(MemoryCollector, self).stop()
 
+    def _is_ignored(self, stack):
+        # TODO: this should be implemented in _memalloc directly so we have more space for samples
+        # not coming from the profiler
+        return self.ignore_profiler and any(frame[0].startswith(_MODULE_TOP_DIR) for frame in stack)
+
+    def _heap_events(self):
+        now = compat.monotonic()
+        if self._last_heap_snapshot is not None and now - self._last_heap_snapshot < self._heap_interval:
+            return ()
+        self._last_heap_snapshot = now
+        # Use the same timestamp for all the samples so the exporter can tell the snapshots apart
+        timestamp = compat.time_ns()
+        return tuple(
+            MemoryHeapSampleEvent(
+                timestamp=timestamp,
+                thread_id=thread_id,
+                thread_name=_threading.get_thread_name(thread_id),
+                thread_native_id=_threading.get_thread_native_id(thread_id),
+                frames=stack,
+                nframes=nframes,
+                size=size,
+                sample_size=self.heap_sample_size,
+            )
+            for (stack, nframes, thread_id), size in _memalloc.heap()
+            if not self._is_ignored(stack)
+        )
+
     def collect(self):
         events, count, alloc_count = _memalloc.iter_events()
         capture_pct = 100 * count / alloc_count
         # TODO: The event timestamp is slightly off since it's going to be the time we copy the data from the
         # _memalloc buffer to our Recorder. This is fine for now, but we might want to store the nanoseconds
         # timestamp in C and then return it via iter_events.
-        return (
-            tuple(
-                MemoryAllocSampleEvent(
-                    thread_id=thread_id,
-                    thread_name=_threading.get_thread_name(thread_id),
-                    thread_native_id=_threading.get_thread_native_id(thread_id),
-                    frames=stack,
-                    nframes=nframes,
-                    size=size,
-                    capture_pct=capture_pct,
-                    nevents=alloc_count,
-                )
-                for (stack, nframes, thread_id), size in events
-                # TODO: this should be implemented in _memalloc directly so we have more space for samples
-                # not coming from the profiler
-                if not self.ignore_profiler or not any(frame[0].startswith(_MODULE_TOP_DIR) for frame in stack)
-            ),
+        alloc_events = tuple(
+            MemoryAllocSampleEvent(
+                thread_id=thread_id,
+                thread_name=_threading.get_thread_name(thread_id),
+                thread_native_id=_threading.get_thread_native_id(thread_id),
+                frames=stack,
+                nframes=nframes,
+                size=size,
+                capture_pct=capture_pct,
+                nevents=alloc_count,
+            )
+            for (stack, nframes, thread_id), size in events
+            if not self._is_ignored(stack)
         )
+        if self.heap_sample_size:
+            return alloc_events, self._heap_events()
+        return (alloc_events,)
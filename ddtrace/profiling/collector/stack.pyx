@@ -1,17 +1,17 @@
 """CPU profiling collector."""
 from __future__ import absolute_import
 
-import collections
 import sys
 import threading
-import weakref
 
 from ddtrace import compat
+from ddtrace.internal import active_spans
 from ddtrace.profiling import _attr
 from ddtrace.profiling import _periodic
 from ddtrace.profiling import _nogevent
 from ddtrace.profiling import collector
 from ddtrace.profiling import event
+from ddtrace.profiling.collector import _cputimer
 from ddtrace.profiling.collector import _threading
 from ddtrace.profiling.collector import _traceback
 from ddtrace.utils import formats
@@ -28,6 +28,7 @@ FEATURES = {
     "cpu-time": False,
     "stack-exceptions": False,
     "gevent-tasks": False,
+    "cpu-timer": _cputimer.AVAILABLE,
 }
 
 
@@ -155,6 +156,33 @@ class StackSampleEvent(event.StackBasedEvent):
     wall_time_ns = attr.ib(default=0)
     # CPU time in nanoseconds
     cpu_time_ns = attr.ib(default=0)
+    # Number of samples aggregated in this event
+    nsamples = attr.ib(default=1)
+
+    @property
+    def aggregation_key(self):
+        # The exporter only uses the lowest trace and span ids
+        return (
+            self.thread_id,
+            self.thread_native_id,
+            self.thread_name,
+            self.task_id,
+            self.task_name,
+            min(self.trace_ids) if self.trace_ids else None,
+            min(self.span_ids) if self.span_ids else None,
+            tuple(self.frames),
+            self.nframes,
+        )
+
+    def aggregate(self, other):
+        """Fold another sample with the same aggregation key into this event."""
+        nsamples = self.nsamples + other.nsamples
+        self.sampling_period = (
+            self.sampling_period * self.nsamples + other.sampling_period * other.nsamples
+        ) // nsamples
+        self.nsamples = nsamples
+        self.wall_time_ns += other.wall_time_ns
+        self.cpu_time_ns += other.cpu_time_ns
 
 
 @event.event_class
@@ -249,7 +277,7 @@ cdef get_task(thread_id):
     return task_id, task_name
 
 
-cdef collect_threads(ignore_profiler, thread_time, thread_span_links) with gil:
+cdef collect_threads(ignore_profiler, thread_time, with_spans) with gil:
     cdef dict current_exceptions = {}
 
     IF UNAME_SYSNAME != "Windows" and PY_MAJOR_VERSION >= 3 and PY_MINOR_VERSION >= 7:
@@ -301,7 +329,7 @@ cdef collect_threads(ignore_profiler, thread_time, thread_span_links) with gil:
             _threading.get_thread_name(pthread_id),
             running_threads[pthread_id],
             current_exceptions.get(pthread_id),
-            thread_span_links.get_active_leaf_spans_from_thread_id(pthread_id) if thread_span_links else set(),
+            active_spans.get(pthread_id) if with_spans else None,
             cpu_time,
         )
         for (pthread_id, native_thread_id), cpu_time in cpu_times.items()
@@ -310,18 +338,18 @@ cdef collect_threads(ignore_profiler, thread_time, thread_span_links) with gil:
 
 
 
-cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_time, thread_span_links):
+cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_time, with_spans):
 
-    running_threads = collect_threads(ignore_profiler, thread_time, thread_span_links)
+    running_threads = collect_threads(ignore_profiler, thread_time, with_spans)
 
-    if thread_span_links:
+    if with_spans:
         # FIXME also use native thread id
-        thread_span_links.clear_threads(tuple(thread[0] for thread in running_threads))
+        active_spans.clear_threads(set(thread[0] for thread in running_threads))
 
     stack_events = []
     exc_events = []
 
-    for thread_id, thread_native_id, thread_name, frame, exception, spans, cpu_time in running_threads:
+    for thread_id, thread_native_id, thread_name, frame, exception, span, cpu_time in running_threads:
         frames, nframes = _traceback.pyframe_to_frames(frame, max_nframes)
 
         task_id, task_name = get_task(thread_id)
@@ -333,8 +361,8 @@ cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_tim
                 thread_name=thread_name,
                 task_id=task_id,
                 task_name=task_name,
-                trace_ids=set(span.trace_id for span in spans),
-                span_ids=set(span.span_id for span in spans),
+                trace_ids=set() if span is None else {span.trace_id},
+                span_ids=set() if span is None else {span.span_id},
                 nframes=nframes, frames=frames,
                 wall_time_ns=wall_time,
                 cpu_time_ns=cpu_time,
@@ -362,72 +390,6 @@ cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_tim
     return stack_events, exc_events
 
 
-@attr.s(slots=True, eq=False)
-class _ThreadSpanLinks(object):
-
-    # Keys is a thread_id
-    # Value is a set of weakrefs to spans
-    _thread_id_to_spans = attr.ib(factory=lambda: collections.defaultdict(set), repr=False, init=False)
-    _lock = attr.ib(factory=_nogevent.Lock, repr=False, init=False)
-
-    def link_span(self, span):
-        """Link a span to its running environment.
-
-        Track threads, tasks, etc.
-        """
-        # Since we're going to iterate over the set, make sure it's locked
-        with self._lock:
-            self._thread_id_to_spans[_nogevent.thread_get_ident()].add(weakref.ref(span))
-
-    def clear_threads(self, existing_thread_ids):
-        """Clear the stored list of threads based on the list of existing thread ids.
-
-        If any thread that is part of this list was stored, its data will be deleted.
-
-        :param existing_thread_ids: A set of thread ids to keep.
-        """
-        with self._lock:
-            # Iterate over a copy of the list of keys since it's mutated during our iteration.
-            for thread_id in list(self._thread_id_to_spans.keys()):
-                if thread_id not in existing_thread_ids:
-                    del self._thread_id_to_spans[thread_id]
-
-    def get_active_leaf_spans_from_thread_id(self, thread_id):
-        """Return the latest active spans for a thread.
-
-        In theory this should return a single span, though if multiple children span are active without being finished,
-        there can be several spans returned.
-
-        :param thread_id: The thread id.
-        :return: A set with the active spans.
-        """
-        alive_spans = set()
-
-        with self._lock:
-            span_list = self._thread_id_to_spans.get(thread_id, ())
-            dead_spans = set()
-            for span_ref in span_list:
-                span = span_ref()
-                if span is None:
-                    dead_spans.add(span_ref)
-                else:
-                    alive_spans.add(span)
-
-            # Clean the set from the dead spans
-            for dead_span in dead_spans:
-                span_list.remove(dead_span)
-
-        # Iterate over a copy so we can modify the original
-        for span in alive_spans.copy():
-            if not span.finished:
-                try:
-                    alive_spans.remove(span._parent)
-                except KeyError:
-                    pass
-
-        return {span for span in alive_spans if not span.finished}
-
-
 def _default_min_interval_time():
     if six.PY2:
         return 0.01
@@ -450,7 +412,6 @@ class StackCollector(collector.PeriodicCollector):
     tracer = attr.ib(default=None)
     _thread_time = attr.ib(init=False, repr=False)
     _last_wall_time = attr.ib(init=False, repr=False)
-    _thread_span_links = attr.ib(default=None, init=False, repr=False)
 
     @max_time_usage_pct.validator
     def _check_max_time_usage(self, attribute, value):
@@ -461,8 +422,8 @@ class StackCollector(collector.PeriodicCollector):
         self._thread_time = _ThreadTime()
         self._last_wall_time = compat.monotonic_ns()
         if self.tracer is not None:
-            self._thread_span_links = _ThreadSpanLinks()
-            self.tracer.on_start_span(self._thread_span_links.link_span)
+            # The active span of each thread is read when sampling it rather than tracking every span started
+            active_spans.enable(_nogevent.thread_get_ident)
 
     def start(self):
         # This is split in its own function to ease testing
@@ -472,7 +433,7 @@ class StackCollector(collector.PeriodicCollector):
     def stop(self):
         super(StackCollector, self).stop()
         if self.tracer is not None:
-            self.tracer.deregister_on_start_span(self._thread_span_links.link_span)
+            active_spans.disable()
 
     def _compute_new_interval(self, used_wall_time_ns):
         interval = (used_wall_time_ns / (self.max_time_usage_pct / 100.0)) - used_wall_time_ns
@@ -485,10 +446,117 @@ class StackCollector(collector.PeriodicCollector):
         self._last_wall_time = now
 
         all_events = stack_collect(
-            self.ignore_profiler, self._thread_time, self.nframes, self.interval, wall_time, self._thread_span_links,
+            self.ignore_profiler, self._thread_time, self.nframes, self.interval, wall_time, self.tracer is not None,
         )
 
         used_wall_time_ns = compat.monotonic_ns() - now
         self.interval = self._compute_new_interval(used_wall_time_ns)
 
         return all_events
+
+
+def _no_thread_time(pthread_ids):
+    return {(pthread_id, _threading.get_thread_native_id(pthread_id)): 0 for pthread_id in pthread_ids}
+
+
+# Frame used for the code objects that the frame cache does not know
+_UNKNOWN_FRAME = ("", 0, "<unknown>")
+
+
+def _cpu_timer_frame(code, code_address, lasti, lineno):
+    """Serialize a frame recorded by the CPU timer into a tuple of (filename, lineno, function_name)."""
+    if code is not None:
+        return (code.co_filename, lineno, code.co_name)
+
+    # The code object might have been freed since and its address reused by another one, which the frame cache might
+    # know: it is only trusted if it has the line number recorded by the signal handler.
+    frame = _traceback.code_address_to_frame(code_address, lasti)
+    if frame is None or frame[1] != lineno:
+        return _UNKNOWN_FRAME
+    return frame
+
+
+@attr.s(slots=True)
+class CPUTimerStackCollector(StackCollector):
+    """Execution stacks collector with CPU time sampled by a CPU timer.
+
+    The wall time is sampled like `StackCollector` does. The CPU time is sampled by a ``SIGPROF`` signal handler, run
+    by the thread consuming the CPU each time the process consumed `cpu_timer_interval` seconds of CPU, no matter how
+    long the collector thread waits for the GIL. This is only available on Linux.
+    """
+
+    cpu_timer_interval = attr.ib(factory=_attr.from_env("DD_PROFILING_CPU_TIMER_INTERVAL", 0.01, float))
+
+    def _init(self):
+        super(CPUTimerStackCollector, self)._init()
+        # The CPU time is only reported by the CPU timer samples
+        self._thread_time = _no_thread_time
+
+    def start(self):
+        if not _cputimer.AVAILABLE:
+            raise RuntimeError("CPU timer is unavailable")
+        super(CPUTimerStackCollector, self).start()
+        _cputimer.start(self.cpu_timer_interval, self.nframes)
+
+    def stop(self):
+        _cputimer.stop()
+        super(CPUTimerStackCollector, self).stop()
+
+    def _cpu_timer_events(self, samples, dropped):
+        if not samples:
+            return []
+
+        # The samples dropped because the buffer was full are accounted for by the ones that were kept
+        cpu_time_ns = int(self.cpu_timer_interval * 1e9 * (len(samples) + dropped) / len(samples))
+        sampling_period = int(self.cpu_timer_interval * 1e9)
+        threads = {}
+        events = []
+
+        for thread_id, timestamp_ns, nframes, code_frames in samples:
+            if self.ignore_profiler and thread_id in _periodic.PERIODIC_THREADS:
+                continue
+
+            try:
+                thread_native_id, thread_name, task_id, task_name, span = threads[thread_id]
+            except KeyError:
+                span = active_spans.get(thread_id) if self.tracer is not None else None
+                task_id, task_name = get_task(thread_id)
+                thread_native_id = _threading.get_thread_native_id(thread_id)
+                thread_name = _threading.get_thread_name(thread_id)
+                threads[thread_id] = thread_native_id, thread_name, task_id, task_name, span
+
+            # The buffer is drained up to an interval after the samples: the span active then might have started
+            # after the sample
+            if span is None or not timestamp_ns or span.start_ns > timestamp_ns:
+                trace_ids = set()
+                span_ids = set()
+            else:
+                trace_ids = {span.trace_id}
+                span_ids = {span.span_id}
+
+            frames = [_cpu_timer_frame(*frame) for frame in code_frames]
+
+            events.append(
+                StackSampleEvent(
+                    timestamp=timestamp_ns or compat.time_ns(),
+                    thread_id=thread_id,
+                    thread_native_id=thread_native_id,
+                    thread_name=thread_name,
+                    task_id=task_id,
+                    task_name=task_name,
+                    trace_ids=trace_ids,
+                    span_ids=span_ids,
+                    nframes=nframes,
+                    frames=frames,
+                    cpu_time_ns=cpu_time_ns,
+                    sampling_period=sampling_period,
+                )
+            )
+
+        return events
+
+    def collect(self):
+        stack_events, exc_events = super(CPUTimerStackCollector, self).collect()
+        # DEV: drain after sampling the stacks so the frame cache knows the code objects that are running
+        stack_events.extend(self._cpu_timer_events(*_cputimer.drain()))
+        return stack_events, exc_events
@@ -4,51 +4,15 @@ import os.path
 import sys
 import threading
 
-from ddtrace.vendor.six.moves import _thread
-
 from ddtrace.vendor import wrapt
 
-from ddtrace import compat
 from ddtrace.profiling import _attr
 from ddtrace.profiling import collector
-from ddtrace.profiling import event
 from ddtrace.vendor import attr
-from ddtrace.profiling.collector import _traceback
-
-
-@event.event_class
-class LockEventBase(event.StackBasedEvent):
-    """Base Lock event."""
-
-    lock_name = attr.ib(default=None)
-    sampling_pct = attr.ib(default=None)
-
-
-@event.event_class
-class LockAcquireEvent(LockEventBase):
-    """A lock has been acquired."""
-
-    wait_time_ns = attr.ib(default=None)
-
-
-@event.event_class
-class LockReleaseEvent(LockEventBase):
-    """A lock has been released."""
-
-    locked_for_ns = attr.ib(default=None)
-
-
-def _current_thread():
-    # This is a custom version of `threading.current_thread`
-    # that does not try # to create a `DummyThread` on `KeyError`.
-    ident = _thread.get_ident()
-    try:
-        thread = threading._active[ident]
-    except KeyError:
-        name = None
-    else:
-        name = thread.name
-    return ident, name
+from ddtrace.profiling.collector import _lock
+from ddtrace.profiling.collector._lock import LockAcquireEvent  # noqa: F401
+from ddtrace.profiling.collector._lock import LockEventBase  # noqa: F401
+from ddtrace.profiling.collector._lock import LockReleaseEvent  # noqa: F401
 
 
 # We need to know if wrapt is compiled in C or not. If it's not using the C module, then the wrappers function will
@@ -65,87 +29,8 @@ else:
         del _w
 
 
-class _ProfiledLock(wrapt.ObjectProxy):
-    def __init__(self, wrapped, recorder, tracer, max_nframes, capture_sampler):
-        wrapt.ObjectProxy.__init__(self, wrapped)
-        self._self_recorder = recorder
-        self._self_tracer = tracer
-        self._self_max_nframes = max_nframes
-        self._self_capture_sampler = capture_sampler
-        frame = sys._getframe(2 if WRAPT_C_EXT else 3)
-        code = frame.f_code
-        self._self_name = "%s:%d" % (os.path.basename(code.co_filename), frame.f_lineno)
-
-    def _get_trace_and_span_ids(self):
-        """Return current trace and span ids."""
-        if self._self_tracer is None:
-            return (None, None)
-
-        ctxt = self._self_tracer.get_call_context()
-        return (
-            None if ctxt.trace_id is None else {ctxt.trace_id},
-            None if ctxt.span_id is None else {ctxt.span_id},
-        )
-
-    def acquire(self, *args, **kwargs):
-        if not self._self_capture_sampler.capture():
-            return self.__wrapped__.acquire(*args, **kwargs)
-
-        start = compat.monotonic_ns()
-        try:
-            return self.__wrapped__.acquire(*args, **kwargs)
-        finally:
-            try:
-                end = self._self_acquired_at = compat.monotonic_ns()
-                thread_id, thread_name = _current_thread()
-                frames, nframes = _traceback.pyframe_to_frames(sys._getframe(1), self._self_max_nframes)
-                trace_ids, span_ids = self._get_trace_and_span_ids()
-                self._self_recorder.push_event(
-                    LockAcquireEvent(
-                        lock_name=self._self_name,
-                        frames=frames,
-                        nframes=nframes,
-                        thread_id=thread_id,
-                        thread_name=thread_name,
-                        trace_ids=trace_ids,
-                        span_ids=span_ids,
-                        wait_time_ns=end - start,
-                        sampling_pct=self._self_capture_sampler.capture_pct,
-                    )
-                )
-            except Exception:
-                pass
-
-    def release(self, *args, **kwargs):
-        try:
-            return self.__wrapped__.release(*args, **kwargs)
-        finally:
-            try:
-                if hasattr(self, "_self_acquired_at"):
-                    try:
-                        end = compat.monotonic_ns()
-                        frames, nframes = _traceback.pyframe_to_frames(sys._getframe(1), self._self_max_nframes)
-                        thread_id, thread_name = _current_thread()
-                        trace_ids, span_ids = self._get_trace_and_span_ids()
-                        self._self_recorder.push_event(
-                            LockReleaseEvent(
-                                lock_name=self._self_name,
-                                frames=frames,
-                                nframes=nframes,
-                                thread_id=thread_id,
-                                thread_name=thread_name,
-                                trace_ids=trace_ids,
-                                span_ids=span_ids,
-                                locked_for_ns=end - self._self_acquired_at,
-                                sampling_pct=self._self_capture_sampler.capture_pct,
-                            )
-                        )
-                    finally:
-                        del self._self_acquired_at
-            except Exception:
-                pass
-
-    acquire_lock = acquire
+def _lock_name(frame):
+    return "%s:%d" % (os.path.basename(frame.f_code.co_filename), frame.f_lineno)
 
 
 class FunctionWrapper(wrapt.FunctionWrapper):
@@ -158,7 +43,10 @@ class FunctionWrapper(wrapt.FunctionWrapper):
 
 @attr.s
 class LockCollector(collector.CaptureSamplerCollector):
-    """Record lock usage."""
+    """Record `threading.Lock` and `threading.RLock` usage.
+
+    `threading.Condition` objects are covered too, as they use a `threading.RLock` by default.
+    """
 
     nframes = attr.ib(factory=_attr.from_env("DD_PROFILING_MAX_FRAMES", 64, int))
     tracer = attr.ib(default=None)
@@ -178,13 +66,17 @@ class LockCollector(collector.CaptureSamplerCollector):
         # We only patch the lock from the `threading` module.
         # Nobody should use locks from `_thread`; if they do so, then it's deliberate and we don't profile.
         self.original = threading.Lock
+        self.original_rlock = threading.RLock
+        sampler = _lock.LockSampler(self.recorder, self.tracer, self.nframes, self.capture_pct)
 
         def _allocate_lock(wrapped, instance, args, kwargs):
             lock = wrapped(*args, **kwargs)
-            return _ProfiledLock(lock, self.recorder, self.tracer, self.nframes, self._capture_sampler)
+            return _lock.ProfiledLock(lock, sampler, _lock_name(sys._getframe(1 if WRAPT_C_EXT else 2)))
 
         threading.Lock = FunctionWrapper(self.original, _allocate_lock)
+        threading.RLock = FunctionWrapper(self.original_rlock, _allocate_lock)
 
     def unpatch(self):
         """Unpatch the threading module for tracking lock allocation."""
         threading.Lock = self.original
+        threading.RLock = self.original_rlock
@@ -45,8 +45,9 @@ class PprofHTTPExporter(pprof.PprofExporter):
     env = attr.ib(default=None)
     version = attr.ib(default=None)
     max_retry_delay = attr.ib(default=None)
-    _container_info = attr.ib(factory=container.get_container_info, repr=False)
+    _container_info = attr.ib(factory=container.get_cached_container_info, repr=False)
     _retry_upload = attr.ib(init=None, default=None)
+    _client = attr.ib(init=False, default=None, repr=False)
     endpoint_path = attr.ib(default="/profiling/v1/input")
 
     def __attrs_post_init__(self):
@@ -62,10 +63,15 @@ class PprofHTTPExporter(pprof.PprofExporter):
 
     @staticmethod
     def _encode_multipart_formdata(fields, tags):
+        """Encode the fields and tags of a profile as a multipart body.
+
+        :return: The content type and the list of the parts of the body to send in order. The profile data is sent as
+                 is rather than copied into a single body.
+        """
         boundary = binascii.hexlify(os.urandom(16))
 
         # The body that is generated is very sensitive and must perfectly match what the server expects.
-        body = (
+        head = (
             b"".join(
                 b"--%s\r\n"
                 b'Content-Disposition: form-data; name="%s"\r\n'
@@ -86,13 +92,11 @@ class PprofHTTPExporter(pprof.PprofExporter):
             + b"\r\n"
             b'Content-Disposition: form-data; name="chunk-data"; filename="profile.pb.gz"\r\n'
             + b"Content-Type: application/octet-stream\r\n\r\n"
-            + fields["chunk-data"]
-            + b"\r\n--%s--\r\n" % boundary
         )
 
         content_type = b"multipart/form-data; boundary=%s" % boundary
 
-        return content_type, body
+        return content_type, [head, fields["chunk-data"], b"\r\n--%s--\r\n" % boundary]
 
     def _get_tags(self, service):
         tags = {
@@ -133,10 +137,9 @@ class PprofHTTPExporter(pprof.PprofExporter):
         if self._container_info and self._container_info.container_id:
             headers["Datadog-Container-Id"] = self._container_info.container_id
 
-        profile = super(PprofHTTPExporter, self).export(events, start_time_ns, end_time_ns)
         s = six.BytesIO()
         with gzip.GzipFile(fileobj=s, mode="wb") as gz:
-            gz.write(profile.SerializeToString())
+            self.write_profile(gz, events, start_time_ns, end_time_ns)
         fields = {
             "runtime-id": runtime.get_runtime_id().encode("ascii"),
             "recording-start": (
@@ -151,7 +154,7 @@ class PprofHTTPExporter(pprof.PprofExporter):
             "chunk-data": s.getvalue(),
         }
 
-        service = self.service or os.path.basename(profile.string_table[profile.mapping[0].filename])
+        service = self.service or os.path.basename(self._get_program_name())
 
         content_type, body = self._encode_multipart_formdata(
             fields,
@@ -159,28 +162,42 @@ class PprofHTTPExporter(pprof.PprofExporter):
         )
         headers["Content-Type"] = content_type
 
-        parsed = urlparse.urlparse(self.endpoint)
-        if parsed.scheme == "https":
-            client = http_client.HTTPSConnection(parsed.hostname, parsed.port, timeout=self.timeout)
-        elif parsed.scheme == "http":
-            client = http_client.HTTPConnection(parsed.hostname, parsed.port, timeout=self.timeout)
-        elif parsed.scheme == "unix":
-            client = uds.UDSHTTPConnection(parsed.path, False, parsed.hostname, parsed.port, timeout=self.timeout)
-        else:
-            raise ValueError("Unknown connection scheme %s" % parsed.scheme)
-
-        self._upload(client, self.endpoint_path, body, headers)
+        self._upload(self._get_client(), self.endpoint_path, body, headers)
+
+    def _get_client(self):
+        # The connection is kept open between exports: the exports are done one after the other by the scheduler
+        if self._client is None:
+            parsed = urlparse.urlparse(self.endpoint)
+            if parsed.scheme == "https":
+                self._client = http_client.HTTPSConnection(parsed.hostname, parsed.port, timeout=self.timeout)
+            elif parsed.scheme == "http":
+                self._client = http_client.HTTPConnection(parsed.hostname, parsed.port, timeout=self.timeout)
+            elif parsed.scheme == "unix":
+                self._client = uds.UDSHTTPConnection(
+                    parsed.path, False, parsed.hostname, parsed.port, timeout=self.timeout
+                )
+            else:
+                raise ValueError("Unknown connection scheme %s" % parsed.scheme)
+        return self._client
 
     def _upload(self, client, path, body, headers):
         self._retry_upload(self._upload_once, client, path, body, headers)
 
     def _upload_once(self, client, path, body, headers):
         try:
-            client.request("POST", path, body=body, headers=headers)
+            client.putrequest("POST", path)
+            for header, value in headers.items():
+                client.putheader(header, value)
+            client.putheader("Content-Length", str(sum(len(part) for part in body)))
+            client.endheaders()
+            for part in body:
+                client.send(part)
             response = client.getresponse()
             response.read()  # reading is mandatory
-        finally:
+        except Exception:
+            # The connection is reopened by the next request
             client.close()
+            raise
 
         if 200 <= response.status < 300:
             return
@@ -1,3 +1,5 @@
+from libc.stdint cimport int64_t, uint64_t
+
 import collections
 import itertools
 import operator
@@ -17,11 +19,9 @@ from ddtrace.profiling.collector import memalloc
 from ddtrace.profiling.collector import memory
 from ddtrace.profiling.collector import stack
 from ddtrace.profiling.collector import threading
-from ddtrace.profiling.exporter import pprof_pb2
 
 _ITEMGETTER_ZERO = operator.itemgetter(0)
 _ITEMGETTER_ONE = operator.itemgetter(1)
-_ATTRGETTER_ID = operator.attrgetter("id")
 
 
 @attr.s
@@ -59,12 +59,55 @@ class _StringTable(object):
         return len(self._strings)
 
 
+cdef object _write_varint(bytearray buf, uint64_t value):
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+cdef object _write_int_field(bytearray buf, uint64_t field, int64_t value):
+    # Scalar fields set to their default value are not serialized in proto3
+    if value:
+        _write_varint(buf, field << 3)
+        # Negative integers are encoded as their 64-bit two's complement
+        _write_varint(buf, <uint64_t>value)
+
+
+cdef object _write_bytes_field(bytearray buf, uint64_t field, data):
+    _write_varint(buf, (field << 3) | 2)
+    _write_varint(buf, len(data))
+    buf += data
+
+
+cdef object _write_packed_field(bytearray buf, uint64_t field, values):
+    cdef bytearray packed
+    if values:
+        packed = bytearray()
+        for value in values:
+            _write_varint(packed, <uint64_t><int64_t>value)
+        _write_bytes_field(buf, field, packed)
+
+
+cdef bytearray _value_type(int64_t type_, int64_t unit):
+    cdef bytearray msg = bytearray()
+    _write_int_field(msg, 1, type_)
+    _write_int_field(msg, 2, unit)
+    return msg
+
+
+# Size of the encoded data buffered before being written to the output file
+cdef Py_ssize_t _WRITE_BUFFER_SIZE = 64 * 1024
+
+
 @attr.s
 class _PprofConverter(object):
     """Convert stacks generated by a Profiler to pprof format."""
 
-    # Those attributes will be serialize in a `pprof_pb2.Profile`
+    # Those attributes will be serialize in a pprof `Profile`
+    # Keys are (filename, funcname), values are (function id, name string id, filename string id)
     _functions = attr.ib(init=False, factory=dict)
+    # Keys are (filename, lineno, funcname), values are (location id, function id, lineno)
     _locations = attr.ib(init=False, factory=dict)
     _string_table = attr.ib(init=False, factory=_StringTable)
 
@@ -75,49 +118,41 @@ class _PprofConverter(object):
     # This dict has sample-type (e.g. "cpu-time") as key and the numeric value.
     _location_values = attr.ib(factory=lambda: collections.defaultdict(dict), init=False, repr=False)
 
-    def _to_Function(self, filename, funcname):
+    def _to_function_id(self, filename, funcname):
         try:
-            return self._functions[(filename, funcname)]
+            return self._functions[(filename, funcname)][0]
         except KeyError:
-            func = pprof_pb2.Function(
-                id=self._last_func_id.generate(),
-                name=self._str(funcname),
-                filename=self._str(filename),
-            )
-            self._functions[(filename, funcname)] = func
-            return func
+            func_id = self._last_func_id.generate()
+            self._functions[(filename, funcname)] = (func_id, self._str(funcname), self._str(filename))
+            return func_id
 
-    def _to_Location(self, filename, lineno, funcname=None):
+    def _to_location_id(self, filename, lineno, funcname=None):
         try:
-            return self._locations[(filename, lineno, funcname)]
+            return self._locations[(filename, lineno, funcname)][0]
         except KeyError:
             if funcname is None:
                 real_funcname = _line2def.filename_and_lineno_to_def(filename, lineno)
             else:
                 real_funcname = funcname
-            location = pprof_pb2.Location(
-                id=self._last_location_id.generate(),
-                line=[
-                    pprof_pb2.Line(
-                        function_id=self._to_Function(filename, real_funcname).id,
-                        line=lineno,
-                    ),
-                ],
+            location_id = self._last_location_id.generate()
+            self._locations[(filename, lineno, funcname)] = (
+                location_id,
+                self._to_function_id(filename, real_funcname),
+                lineno,
             )
-            self._locations[(filename, lineno, funcname)] = location
-            return location
+            return location_id
 
     def _str(self, string):
         """Convert a string to an id from the string table."""
         return self._string_table.to_id(str(string))
 
     def _to_locations(self, frames, nframes):
-        locations = [self._to_Location(filename, lineno, funcname).id for filename, lineno, funcname in frames]
+        locations = [self._to_location_id(filename, lineno, funcname) for filename, lineno, funcname in frames]
 
         omitted = nframes - len(frames)
         if omitted:
             locations.append(
-                self._to_Location("", 0, "<%d frame%s omitted>" % (omitted, ("s" if omitted > 1 else ""))).id
+                self._to_location_id("", 0, "<%d frame%s omitted>" % (omitted, ("s" if omitted > 1 else "")))
             )
 
         return tuple(locations)
@@ -136,7 +171,7 @@ class _PprofConverter(object):
             ),
         )
 
-        self._location_values[location_key]["cpu-samples"] = len(samples)
+        self._location_values[location_key]["cpu-samples"] = sum(s.nsamples for s in samples)
         self._location_values[location_key]["cpu-time"] = sum(s.cpu_time_ns for s in samples)
         self._location_values[location_key]["wall-time"] = sum(s.wall_time_ns for s in samples)
 
@@ -159,6 +194,20 @@ class _PprofConverter(object):
         self._location_values[location_key]["alloc-samples"] = nevents
         self._location_values[location_key]["alloc-space"] = round(number_of_alloc * average_alloc_size)
 
+    def convert_memalloc_heap_event(self, thread_id, thread_native_id, thread_name, frames, nframes, events):
+        location_key = (
+            self._to_locations(frames, nframes),
+            (
+                ("thread id", str(thread_id)),
+                ("thread native id", str(thread_native_id)),
+                ("thread name", thread_name),
+            ),
+        )
+
+        # An allocation smaller than the sample size is sampled with a probability of size / sample_size: it stands for
+        # sample_size bytes of allocations.
+        self._location_values[location_key]["heap-space"] = sum(max(event.size, event.sample_size) for event in events)
+
     def convert_lock_acquire_event(
         self, lock_name, thread_id, thread_name, trace_id, span_id, frames, nframes, events, sampling_ratio
     ):
@@ -215,12 +264,24 @@ class _PprofConverter(object):
         self._location_values[location_key]["exception-samples"] = len(events)
 
     def convert_memory_event(self, stats, sampling_ratio):
-        location = tuple(self._to_Location(frame.filename, frame.lineno).id for frame in reversed(stats.traceback))
+        location = tuple(self._to_location_id(frame.filename, frame.lineno) for frame in reversed(stats.traceback))
         location_key = (location, tuple())
         self._location_values[location_key]["alloc-samples"] = int(stats.count / sampling_ratio)
         self._location_values[location_key]["alloc-space"] = int(stats.size / sampling_ratio)
 
+    def _sorted_samples(self, sample_types):
+        for (locations, labels), values in sorted(six.iteritems(self._location_values), key=_ITEMGETTER_ZERO):
+            yield (
+                locations,
+                [values.get(sample_type_name, 0) for sample_type_name, unit in sample_types],
+                [(self._str(key), self._str(s)) for key, s in labels],
+            )
+
     def _build_profile(self, start_time_ns, duration_ns, period, sample_types, program_name):
+        """Build a `pprof_pb2.Profile` message."""
+        # DEV: the protobuf runtime is only needed to build message objects, the exporters use `_write_profile`
+        from ddtrace.profiling.exporter import pprof_pb2
+
         pprof_sample_type = [
             pprof_pb2.ValueType(type=self._str(type_), unit=self._str(unit)) for type_, unit in sample_types
         ]
@@ -228,10 +289,10 @@ class _PprofConverter(object):
         sample = [
             pprof_pb2.Sample(
                 location_id=locations,
-                value=[values.get(sample_type_name, 0) for sample_type_name, unit in sample_types],
-                label=[pprof_pb2.Label(key=self._str(key), str=self._str(s)) for key, s in labels],
+                value=values,
+                label=[pprof_pb2.Label(key=key, str=s) for key, s in labels],
             )
-            for (locations, labels), values in sorted(six.iteritems(self._location_values), key=_ITEMGETTER_ZERO)
+            for locations, values, labels in self._sorted_samples(sample_types)
         ]
 
         period_type = pprof_pb2.ValueType(type=self._str("time"), unit=self._str("nanoseconds"))
@@ -248,8 +309,14 @@ class _PprofConverter(object):
                 ),
             ],
             # Sort location and function by id so the output is reproducible
-            location=sorted(self._locations.values(), key=_ATTRGETTER_ID),
-            function=sorted(self._functions.values(), key=_ATTRGETTER_ID),
+            location=[
+                pprof_pb2.Location(id=location_id, line=[pprof_pb2.Line(function_id=function_id, line=lineno)])
+                for location_id, function_id, lineno in sorted(self._locations.values())
+            ],
+            function=[
+                pprof_pb2.Function(id=function_id, name=name, filename=filename)
+                for function_id, name, filename in sorted(self._functions.values())
+            ],
             string_table=list(self._string_table),
             time_nanos=start_time_ns,
             duration_nanos=duration_ns,
@@ -257,6 +324,74 @@ class _PprofConverter(object):
             period_type=period_type,
         )
 
+    def _write_profile(self, fileobj, start_time_ns, duration_ns, period, sample_types, program_name):
+        """Serialize the profile in the pprof protobuf wire format to a file object.
+
+        The messages are encoded directly, in the same order and with the same content as
+        `_build_profile(...).SerializeToString()`, and written to `fileobj` in chunks.
+        """
+        cdef bytearray buf = bytearray()
+        cdef bytearray msg
+
+        # Profile.sample_type
+        for type_, unit in sample_types:
+            _write_bytes_field(buf, 1, _value_type(self._str(type_), self._str(unit)))
+
+        # Profile.sample
+        for locations, values, labels in self._sorted_samples(sample_types):
+            msg = bytearray()
+            _write_packed_field(msg, 1, locations)
+            _write_packed_field(msg, 2, values)
+            for key, s in labels:
+                # Label.key and Label.str are encoded like ValueType.type and ValueType.unit
+                _write_bytes_field(msg, 3, _value_type(key, s))
+            _write_bytes_field(buf, 2, msg)
+            if len(buf) >= _WRITE_BUFFER_SIZE:
+                fileobj.write(bytes(buf))
+                buf = bytearray()
+
+        period_type = _value_type(self._str("time"), self._str("nanoseconds"))
+
+        # Profile.mapping
+        msg = bytearray()
+        _write_int_field(msg, 1, 1)
+        _write_int_field(msg, 5, self._str(program_name))
+        _write_bytes_field(buf, 3, msg)
+
+        # Profile.location, sorted by id so the output is reproducible
+        for location_id, function_id, lineno in sorted(self._locations.values()):
+            msg = bytearray()
+            _write_int_field(msg, 1, location_id)
+            line = bytearray()
+            _write_int_field(line, 1, function_id)
+            _write_int_field(line, 2, lineno)
+            _write_bytes_field(msg, 4, line)
+            _write_bytes_field(buf, 4, msg)
+
+        # Profile.function, sorted by id so the output is reproducible
+        for function_id, name, filename in sorted(self._functions.values()):
+            msg = bytearray()
+            _write_int_field(msg, 1, function_id)
+            _write_int_field(msg, 2, name)
+            _write_int_field(msg, 4, filename)
+            _write_bytes_field(buf, 5, msg)
+
+        # WARNING: no code should use _str() after this, the string table is serialized below
+        # Profile.string_table
+        for string in self._string_table:
+            _write_bytes_field(buf, 6, string.encode("utf-8"))
+            if len(buf) >= _WRITE_BUFFER_SIZE:
+                fileobj.write(bytes(buf))
+                buf = bytearray()
+
+        _write_int_field(buf, 9, start_time_ns)
+        _write_int_field(buf, 10, duration_ns)
+        _write_bytes_field(buf, 11, period_type)
+        if period is not None:
+            _write_int_field(buf, 12, period)
+
+        fileobj.write(bytes(buf))
+
 
 class PprofExporter(exporter.Exporter):
     """Export recorder events to pprof format."""
@@ -394,6 +529,23 @@ class PprofExporter(exporter.Exporter):
         :param end_time_ns: The end time of recording.
         :return: A protobuf Profile object.
         """
+        converter, profile = self._convert(events, start_time_ns, end_time_ns)
+        return converter._build_profile(**profile)
+
+    def write_profile(self, fileobj, events, start_time_ns, end_time_ns):
+        """Convert events to pprof format and write the serialized profile to a file object.
+
+        The profile is encoded directly in the protobuf wire format, without building protobuf messages.
+
+        :param fileobj: The file object to write the serialized profile to.
+        :param events: The event dictionary from a `ddtrace.profiling.recorder.Recorder`.
+        :param start_time_ns: The start time of recording.
+        :param end_time_ns: The end time of recording.
+        """
+        converter, profile = self._convert(events, start_time_ns, end_time_ns)
+        converter._write_profile(fileobj, **profile)
+
+    def _convert(self, events, start_time_ns, end_time_ns):
         program_name = self._get_program_name()
 
         sum_period = 0
@@ -405,8 +557,8 @@ class PprofExporter(exporter.Exporter):
         stack_events = []
         for event in events.get(stack.StackSampleEvent, []):
             stack_events.append(event)
-            sum_period += event.sampling_period
-            nb_event += 1
+            sum_period += event.sampling_period * event.nsamples
+            nb_event += event.nsamples
 
         for (
             (thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes),
@@ -498,6 +650,23 @@ class PprofExporter(exporter.Exporter):
                     list(memalloc_events),
                 )
 
+            heap_events = events.get(memalloc.MemoryHeapSampleEvent, [])
+            if heap_events:
+                # Only the most recent snapshot of the heap is exported
+                last_snapshot = max(event.timestamp for event in heap_events)
+                for (
+                    (thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes),
+                    heap_snapshot_events,
+                ) in self._group_stack_events(event for event in heap_events if event.timestamp == last_snapshot):
+                    converter.convert_memalloc_heap_event(
+                        thread_id,
+                        thread_native_id,
+                        thread_name,
+                        frames,
+                        nframes,
+                        list(heap_snapshot_events),
+                    )
+
         # Compute some metadata
         if nb_event:
             period = int(sum_period / nb_event)
@@ -517,9 +686,10 @@ class PprofExporter(exporter.Exporter):
             ("lock-release-hold", "nanoseconds"),
             ("alloc-samples", "count"),
             ("alloc-space", "bytes"),
+            ("heap-space", "bytes"),
         )
 
-        return converter._build_profile(
+        return converter, dict(
             start_time_ns=start_time_ns,
             duration_ns=duration_ns,
             period=period,
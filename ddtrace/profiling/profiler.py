@@ -10,6 +10,7 @@ from ddtrace.profiling import scheduler
 from ddtrace.utils import deprecation
 from ddtrace.utils import formats
 from ddtrace.vendor import attr
+from ddtrace.vendor import six
 from ddtrace.profiling.collector import memalloc
 from ddtrace.profiling.collector import memory
 from ddtrace.profiling.collector import stack
@@ -18,6 +19,11 @@ from ddtrace.profiling import exporter
 from ddtrace.profiling.exporter import file
 from ddtrace.profiling.exporter import http
 
+if six.PY3:
+    from ddtrace.profiling.collector import asyncio
+else:
+    asyncio = None
+
 
 LOG = logging.getLogger(__name__)
 
@@ -245,6 +251,8 @@ class _ProfilerInstance(object):
                 memalloc.MemoryAllocSampleEvent: int(
                     (memalloc.MemoryCollector._DEFAULT_MAX_EVENTS / memalloc.MemoryCollector._DEFAULT_INTERVAL) * 60
                 ),
+                # Only the last heap snapshot is exported
+                memalloc.MemoryHeapSampleEvent: memalloc.MemoryCollector._HEAP_MAX_EVENTS,
             },
             default_max_events=int(os.environ.get("DD_PROFILING_MAX_EVENTS", recorder.Recorder._DEFAULT_MAX_EVENTS)),
         )
@@ -254,12 +262,24 @@ class _ProfilerInstance(object):
         else:
             mem_collector = memory.MemoryCollector(r)
 
+        if formats.asbool(os.environ.get("DD_PROFILING_CPU_TIMER", "false")):
+            if stack.FEATURES["cpu-timer"]:
+                stack_collector = stack.CPUTimerStackCollector(r, tracer=self.tracer)
+            else:
+                LOG.warning("The CPU timer is only available on Linux, using the default stack collector")
+                stack_collector = stack.StackCollector(r, tracer=self.tracer)
+        else:
+            stack_collector = stack.StackCollector(r, tracer=self.tracer)
+
         self._collectors = [
-            stack.StackCollector(r, tracer=self.tracer),
+            stack_collector,
             mem_collector,
             threading.LockCollector(r, tracer=self.tracer),
         ]
 
+        if asyncio is not None:
+            self._collectors.append(asyncio.AsyncioLockCollector(r, tracer=self.tracer))
+
         exporters = self._build_default_exporters(self.tracer, self.url, self.service, self.env, self.version)
 
         if exporters:
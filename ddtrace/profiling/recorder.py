@@ -1,7 +1,7 @@
 # -*- encoding: utf-8 -*-
-import collections
 import os
 
+from ddtrace.profiling import _buffer
 from ddtrace.profiling import _nogevent
 from ddtrace.vendor import attr
 
@@ -19,6 +19,45 @@ class _defaultdictkey(dict):
         raise KeyError(key)
 
 
+class _AggregatedEvents(object):
+    """A container folding the events sharing the same aggregation key into a single event.
+
+    Event classes stored in this container must provide an ``aggregation_key`` attribute and an ``aggregate(event)``
+    method. The memory used is proportional to the number of different keys rather than to the number of events.
+    """
+
+    __slots__ = ("maxlen", "_events")
+
+    def __init__(self, maxlen=None):
+        """
+        :param maxlen: The maximum number of different keys to store. Events with a new key are dropped once reached.
+        """
+        self.maxlen = maxlen
+        self._events = {}
+
+    def extend(self, events):
+        aggregated = self._events
+        for event in events:
+            key = event.aggregation_key
+            try:
+                aggregated[key].aggregate(event)
+            except KeyError:
+                if self.maxlen is None or len(aggregated) < self.maxlen:
+                    aggregated[key] = event
+
+    def pop(self):
+        try:
+            return self._events.popitem()[1]
+        except KeyError:
+            raise IndexError("pop from an empty container")
+
+    def __iter__(self):
+        return iter(list(self._events.values()))
+
+    def __len__(self):
+        return len(self._events)
+
+
 @attr.s(slots=True, eq=False)
 class Recorder(object):
     """An object that records program activity."""
@@ -58,16 +97,22 @@ class Recorder(object):
         # 1. the process has forked
         # 2. we don't know the state of _events_lock and it might be unusable — we'd deadlock
         if events and os.getpid() == self._pid:
+            # Writing in an existing ring buffer does not need the lock
+            if _buffer.push_events(self, events):
+                return
             event_type = events[0].__class__
             with self._events_lock:
                 q = self.events[event_type]
                 q.extend(events)
 
-    def _get_deque_for_event_type(self, event_type):
-        return collections.deque(maxlen=self.max_events.get(event_type, self.default_max_events))
+    def _get_buffer_for_event_type(self, event_type):
+        maxlen = self.max_events.get(event_type, self.default_max_events)
+        if hasattr(event_type, "aggregate"):
+            return _AggregatedEvents(maxlen)
+        return _buffer.RingBuffer(maxlen)
 
     def _reset_events(self):
-        self.events = _defaultdictkey(self._get_deque_for_event_type)
+        self.events = _defaultdictkey(self._get_buffer_for_event_type)
 
     def reset(self):
         """Reset the recorder.
@@ -7,19 +7,27 @@ from ddtrace.profiling import _periodic
 from ddtrace.profiling import _traceback
 from ddtrace.profiling import exporter
 from ddtrace.vendor import attr
+from ddtrace.vendor.six.moves import queue
 
 LOG = logging.getLogger(__name__)
 
 
 @attr.s
 class Scheduler(_periodic.PeriodicService):
-    """Schedule export of recorded data."""
+    """Schedule export of recorded data.
+
+    Once started, the profiles are exported by a dedicated worker so a slow exporter never delays the next flush. At
+    most `max_pending_exports` profiles wait to be exported: the oldest one is dropped when another one is flushed.
+    """
 
     recorder = attr.ib()
     exporters = attr.ib()
     _interval = attr.ib(factory=_attr.from_env("DD_PROFILING_UPLOAD_INTERVAL", 60, float))
+    _max_pending_exports = attr.ib(factory=_attr.from_env("_DD_PROFILING_MAX_PENDING_EXPORTS", 2, int), repr=False)
     _configured_interval = attr.ib(init=False)
     _last_export = attr.ib(init=False, default=None)
+    _export_queue = attr.ib(init=False, default=None, repr=False)
+    _export_worker = attr.ib(init=False, default=None, repr=False)
 
     def __attrs_post_init__(self):
         # Copy the value to use it later since we're going to adjust the real interval
@@ -30,8 +38,20 @@ class Scheduler(_periodic.PeriodicService):
         LOG.debug("Starting scheduler")
         super(Scheduler, self).start()
         self._last_export = compat.time_ns()
+        self._export_queue = queue.Queue(max(1, self._max_pending_exports))
+        self._export_worker = _periodic.PeriodicThread(
+            0,
+            target=self._export_next,
+            name="%s:%s:export" % (self.__class__.__module__, self.__class__.__name__),
+        )
+        self._export_worker.start()
         LOG.debug("Scheduler started")
 
+    def join(self, timeout=None):
+        super(Scheduler, self).join(timeout)
+        if self._export_worker:
+            self._export_worker.join(timeout)
+
     def flush(self):
         """Flush events from recorder to exporters."""
         LOG.debug("Flushing events")
@@ -39,16 +59,44 @@ class Scheduler(_periodic.PeriodicService):
             events = self.recorder.reset()
             start = self._last_export
             self._last_export = compat.time_ns()
-            for exp in self.exporters:
+            if self._export_worker is None:
+                self._export(events, start, self._last_export)
+            else:
+                self._enqueue_export((events, start, self._last_export))
+
+    def _enqueue_export(self, profile):
+        while True:
+            try:
+                self._export_queue.put_nowait(profile)
+            except queue.Full:
                 try:
-                    exp.export(events, start, self._last_export)
-                except exporter.ExportError as e:
-                    LOG.error("Unable to export profile: %s. Ignoring.", _traceback.format_exception(e))
-                except Exception:
-                    LOG.exception(
-                        "Unexpected error while exporting events. "
-                        "Please report this bug to https://github.com/DataDog/dd-trace-py/issues"
-                    )
+                    self._export_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    LOG.warning("Exporters are too slow, dropping the oldest pending profile")
+            else:
+                return
+
+    def _export_next(self):
+        profile = self._export_queue.get()
+        if profile is None:
+            # The scheduler has been stopped and all the profiles before this one have been exported
+            self._export_worker.stop()
+        else:
+            self._export(*profile)
+
+    def _export(self, events, start, end):
+        for exp in self.exporters:
+            try:
+                exp.export(events, start, end)
+            except exporter.ExportError as e:
+                LOG.error("Unable to export profile: %s. Ignoring.", _traceback.format_exception(e))
+            except Exception:
+                LOG.exception(
+                    "Unexpected error while exporting events. "
+                    "Please report this bug to https://github.com/DataDog/dd-trace-py/issues"
+                )
 
     def periodic(self):
         start_time = compat.monotonic()
@@ -57,4 +105,7 @@ class Scheduler(_periodic.PeriodicService):
         finally:
             self.interval = max(0, self._configured_interval - (compat.monotonic() - start_time))
 
-    on_shutdown = flush
+    def on_shutdown(self):
+        self.flush()
+        if self._export_worker is not None:
+            self._export_queue.put(None)
@@ -8,6 +8,7 @@ from .compat import iteritems, pattern_type
 from .constants import ENV_KEY
 from .constants import SAMPLING_AGENT_DECISION, SAMPLING_RULE_DECISION, SAMPLING_LIMIT_DECISION
 from .ext.priority import AUTO_KEEP, AUTO_REJECT
+from .internal import _sampling
 from .internal.logger import get_logger
 from .internal.rate_limiter import RateLimiter
 from .utils.formats import get_env
@@ -18,6 +19,7 @@ log = get_logger(__name__)
 MAX_TRACE_ID = 2 ** 64
 
 # Has to be the same factor and key as the Agent to allow chained sampling
+# DEV: the sampling decisions are computed by `ddtrace.internal._sampling` with these values
 KNUTH_FACTOR = 1111111111111111111
 
 
@@ -60,10 +62,10 @@ class RateSampler(BaseSampler):
 
     def set_sample_rate(self, sample_rate):
         self.sample_rate = float(sample_rate)
-        self.sampling_id_threshold = self.sample_rate * MAX_TRACE_ID
+        self.sampling_id_threshold = _sampling.threshold(self.sample_rate)
 
     def sample(self, span):
-        return ((span.trace_id * KNUTH_FACTOR) % MAX_TRACE_ID) <= self.sampling_id_threshold
+        return _sampling.sample(span.trace_id, self.sampling_id_threshold)
 
 
 class RateByServiceSampler(BaseSampler, BasePrioritySampler):
@@ -82,27 +84,43 @@ class RateByServiceSampler(BaseSampler, BasePrioritySampler):
 
     def __init__(self, sample_rate=1):
         self.sample_rate = sample_rate
+        # DEV: this dict is never updated in place, it is replaced by a new one on each update so that
+        # `sample()` can read it without any lock while the writer updates the rates.
         self._by_service_samplers = self._get_new_by_service_sampler()
 
     def _get_new_by_service_sampler(self):
         return {self._default_key: RateSampler(self.sample_rate)}
 
     def set_sample_rate(self, sample_rate, service="", env=""):
-        self._by_service_samplers[self._key(service, env)] = RateSampler(sample_rate)
+        new_by_service_samplers = self._by_service_samplers.copy()
+        new_by_service_samplers[self._key(service, env)] = RateSampler(sample_rate)
+        self._by_service_samplers = new_by_service_samplers
 
     def sample(self, span):
         tags = span.tracer.tags
         env = tags[ENV_KEY] if ENV_KEY in tags else None
         key = self._key(span.service, env)
 
-        sampler = self._by_service_samplers.get(key, self._by_service_samplers[self._default_key])
+        by_service_samplers = self._by_service_samplers
+        sampler = by_service_samplers.get(key) or by_service_samplers[self._default_key]
         span.set_metric(SAMPLING_AGENT_DECISION, sampler.sample_rate)
         return sampler.sample(span)
 
     def update_rate_by_service_sample_rates(self, rate_by_service):
-        new_by_service_samplers = self._get_new_by_service_sampler()
+        by_service_samplers = self._by_service_samplers
+        new_by_service_samplers = {}
         for key, sample_rate in iteritems(rate_by_service):
-            new_by_service_samplers[key] = RateSampler(sample_rate)
+            # Keep the samplers whose rate did not change
+            sampler = by_service_samplers.get(key)
+            if sampler is None or sampler.sample_rate != sample_rate:
+                sampler = RateSampler(sample_rate)
+            new_by_service_samplers[key] = sampler
+
+        if self._default_key not in new_by_service_samplers:
+            default_sampler = by_service_samplers.get(self._default_key)
+            if default_sampler is None or default_sampler.sample_rate != self.sample_rate:
+                default_sampler = RateSampler(self.sample_rate)
+            new_by_service_samplers[self._default_key] = default_sampler
 
         self._by_service_samplers = new_by_service_samplers
 
@@ -283,7 +301,7 @@ class SamplingRule(BaseSampler):
     @sample_rate.setter
     def sample_rate(self, sample_rate):
         self._sample_rate = sample_rate
-        self._sampling_id_threshold = sample_rate * MAX_TRACE_ID
+        self._sampling_id_threshold = _sampling.threshold(sample_rate)
 
     def _pattern_matches(self, prop, pattern):
         # If the rule is not set, then assume it matches
@@ -345,7 +363,7 @@ class SamplingRule(BaseSampler):
         elif self.sample_rate == 0:
             return False
 
-        return ((span.trace_id * KNUTH_FACTOR) % MAX_TRACE_ID) <= self._sampling_id_threshold
+        return _sampling.sample(span.trace_id, self._sampling_id_threshold)
 
     def _no_rule_or_self(self, val):
         return "NO_RULE" if val is self.NO_RULE else val
@@ -73,6 +73,9 @@ class Config(object):
 
         self.health_metrics_enabled = asbool(get_env("trace", "health_metrics_enabled", default=False))
 
+        # Compute the trace statistics in the tracer rather than in the Datadog Agent
+        self._compute_stats = asbool(get_env("trace", "compute_stats", default=False))
+
     def __getattr__(self, name):
         if name not in self._config:
             self._config[name] = IntegrationConfig(self, name)
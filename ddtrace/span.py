@@ -4,7 +4,7 @@ import traceback
 from typing import Optional, List
 
 from .vendor import six
-from .compat import StringIO, stringify, iteritems, numeric_types, time_ns, is_integer
+from .compat import StringIO, stringify, iteritems, numeric_types, monotonic_ns, time_ns, is_integer
 from .constants import (
     NUMERIC_TAGS,
     MANUAL_DROP_KEY,
@@ -17,6 +17,8 @@ from .constants import (
 from .ext import SpanTypes, errors, priority, net, http
 from .internal.logger import get_logger
 from .internal import _rand
+from .internal import resource_accounting
+from .internal import self_telemetry
 
 log = get_logger(__name__)
 
@@ -44,6 +46,7 @@ class Span(object):
         "_context",
         "_parent",
         "_ignored_exceptions",
+        "_resource_usage",
         "__weakref__",
     ]
 
@@ -107,6 +110,8 @@ class Span(object):
         self._context = context
         self._parent = None
         self._ignored_exceptions = None  # type: Optional[List[Exception]]
+        # Resources used when the span started, only set for the local root spans when resource accounting is enabled
+        self._resource_usage = None
 
     def _ignore_exception(self, exc):
         # type: (Exception) -> None
@@ -169,16 +174,29 @@ class Span(object):
         if self.finished:
             return
 
+        telemetry_start_ns = monotonic_ns() if self_telemetry.enabled else None
+
         if self.duration_ns is None:
             ft = time_ns() if finish_time is None else int(finish_time * 1e9)
             # be defensive so we don't die if start isn't set
             self.duration_ns = ft - (self.start_ns or ft)
 
+        if self._resource_usage is not None:
+            resource_accounting.on_root_span_finish(self)
+
         if self._context:
-            trace, sampled = self._context.close_span(self)
+            if telemetry_start_ns is None:
+                trace, sampled = self._context.close_span(self)
+            else:
+                close_start_ns = monotonic_ns()
+                trace, sampled = self._context.close_span(self)
+                self_telemetry.record("context.close_span", monotonic_ns() - close_start_ns)
             if self.tracer and trace and sampled:
                 self.tracer.write(trace)
 
+        if telemetry_start_ns is not None:
+            self_telemetry.record("span.finish", monotonic_ns() - telemetry_start_ns)
+
     def set_tag(self, key, value=None):
         """Set a tag key/value pair on the span.
 
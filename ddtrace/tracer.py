@@ -9,9 +9,12 @@ from ddtrace.vendor import debtcollector
 from .constants import FILTERS_KEY, SAMPLE_RATE_METRIC_KEY, VERSION_KEY, ENV_KEY
 from .ext import system
 from .ext.priority import AUTO_REJECT, AUTO_KEEP
-from .internal import debug
+from .internal import resource_accounting
+from .internal import processor
+from .internal import self_telemetry
+from .internal.dogstatsd import AggregatingDogStatsd
 from .internal.logger import get_logger, hasHandlers
-from .internal.runtime import RuntimeTags, RuntimeWorker, get_runtime_id
+from .internal.runtime import get_runtime_id
 from .internal.writer import AgentWriter, LogWriter
 from .internal import _rand
 from .provider import DefaultContextProvider
@@ -142,6 +145,15 @@ class Tracer(object):
 
         self.enabled = asbool(get_env("trace", "enabled", default=True))
 
+        # Measure the resources used by each kept trace
+        self._resource_accounting = asbool(get_env("trace", "resource_accounting", "enabled", default=False))
+        if self._resource_accounting:
+            resource_accounting.enable()
+
+        # Measure the time spent in the instrumentation itself
+        if asbool(get_env("trace", "self_telemetry", "enabled", default=False)):
+            self_telemetry.enable(debug_port=get_env("trace", "self_telemetry", "debug_port"))
+
         # Apply the default configuration
         self.configure(
             hostname=hostname,
@@ -178,6 +190,22 @@ class Tracer(object):
         self._hooks.deregister(self.__class__.start_span, func)
         return func
 
+    @property
+    def writer(self):
+        return self._writer
+
+    @writer.setter
+    def writer(self, writer):
+        self._writer = writer
+        self._link_writer_filters()
+
+    def _link_writer_filters(self):
+        # The writers of ddtrace apply the span processors and the filters on each batch of traces they flush, the
+        # tracer applies them on each trace for the other writers.
+        self._writer_processes_traces = isinstance(self._writer, (AgentWriter, LogWriter))
+        if self._writer_processes_traces:
+            self._writer._filters = self._filters
+
     @property
     def debug_logging(self):
         return self.log.isEnabledFor(logging.DEBUG)
@@ -287,6 +315,7 @@ class Tracer(object):
             dogstatsd_kwargs = _parse_dogstatsd_url(dogstatsd_url)
             self.log.debug("Connecting to DogStatsd(%s)", dogstatsd_url)
             self._dogstatsd_client = DogStatsd(**dogstatsd_kwargs)
+            self._dogstatsd_aggregator = AggregatingDogStatsd(self._dogstatsd_client)
 
         if writer:
             self.writer = writer
@@ -319,11 +348,13 @@ class Tracer(object):
                 https=https,
                 sampler=self.sampler,
                 priority_sampler=self.priority_sampler,
-                dogstatsd=self._dogstatsd_client,
+                dogstatsd=self._dogstatsd_aggregator,
             )
 
         # HACK: since we recreated our dogstatsd agent, replace the old write one
-        self.writer.dogstatsd = self._dogstatsd_client
+        self.writer.dogstatsd = self._dogstatsd_aggregator
+        # The filters might have changed without the writer
+        self._link_writer_filters()
 
         if context_provider is not None:
             self.context_provider = context_provider
@@ -344,6 +375,9 @@ class Tracer(object):
             self._start_runtime_worker()
 
         if debug_mode or asbool(environ.get("DD_TRACE_STARTUP_LOGS", False)):
+            # DEV: only import the debug module when needed, it imports pkg_resources
+            from .internal import debug
+
             try:
                 info = debug.collect(self)
             except Exception as e:
@@ -387,6 +421,8 @@ class Tracer(object):
             context = tracer.get_call_context()
             span = tracer.start_span('web.worker', child_of=context)
         """
+        telemetry_start_ns = compat.monotonic_ns() if self_telemetry.enabled else None
+
         new_ctx = self._check_new_process()
 
         if child_of is not None:
@@ -503,6 +539,13 @@ class Tracer(object):
             span.metrics[system.PID] = self._pid or getpid()
             span.meta["runtime-id"] = get_runtime_id()
 
+            if self._resource_accounting:
+                # Only account for the traces that are kept, the other ones are not worth the overhead
+                sampling_priority = context.sampling_priority
+                kept = span.sampled if sampling_priority is None else sampling_priority > 0
+                if kept:
+                    resource_accounting.on_root_span_start(span)
+
         # add it to the current context
         context.add_span(span)
 
@@ -516,17 +559,24 @@ class Tracer(object):
 
         self._hooks.emit(self.__class__.start_span, span)
 
+        if telemetry_start_ns is not None:
+            self_telemetry.record("tracer.start_span", compat.monotonic_ns() - telemetry_start_ns)
+
         return span
 
     def _update_dogstatsd_constant_tags(self):
         """Prepare runtime tags for ddstatsd."""
+        from .internal.runtime.runtime_metrics import RuntimeTags
+
         # DEV: ddstatsd expects tags in the form ['key1:value1', 'key2:value2', ...]
         tags = ["{}:{}".format(k, v) for k, v in RuntimeTags()]
         self.log.debug("Updating constant tags %s", tags)
         self._dogstatsd_client.constant_tags = tags
 
     def _start_runtime_worker(self):
-        self._runtime_worker = RuntimeWorker(self._dogstatsd_client, self._RUNTIME_METRICS_INTERVAL)
+        from .internal.runtime.runtime_metrics import RuntimeWorker
+
+        self._runtime_worker = RuntimeWorker(self._dogstatsd_aggregator, self._RUNTIME_METRICS_INTERVAL)
         self._runtime_worker.start()
 
     def _check_new_process(self):
@@ -560,6 +610,10 @@ class Tracer(object):
         # of the parent.
         self._services = set()
 
+        # The metrics aggregated in the parent must not be sent by the child, and the lock of the
+        # aggregator might have been held while forking
+        self._dogstatsd_aggregator = AggregatingDogStatsd(self._dogstatsd_client)
+
         if self._runtime_worker is not None:
             self._start_runtime_worker()
 
@@ -569,6 +623,7 @@ class Tracer(object):
 
         # Re-create the background writer thread
         self.writer = self.writer.recreate()
+        self.writer.dogstatsd = self._dogstatsd_aggregator
 
         return new_ctx
 
@@ -673,22 +728,30 @@ class Tracer(object):
         if not spans:
             return  # nothing to do
 
+        telemetry_start_ns = compat.monotonic_ns() if self_telemetry.enabled else None
+
         if self.log.isEnabledFor(logging.DEBUG):
             self.log.debug("writing %s spans (enabled:%s)", len(spans), self.enabled)
             for span in spans:
                 self.log.debug("\n%s", span.pprint())
 
-        if self.enabled and self.writer:
-            for filtr in self._filters:
-                try:
-                    spans = filtr.process_trace(spans)
-                except Exception:
-                    log.error("error while applying filter %s to traces", filtr, exc_info=True)
-                else:
-                    if not spans:
-                        return
+        writer = self._writer
+        if self.enabled and writer:
+            if not self._writer_processes_traces:
+                processor.processors.process_traces([spans])
+                for filtr in self._filters:
+                    try:
+                        spans = filtr.process_trace(spans)
+                    except Exception:
+                        log.error("error while applying filter %s to traces", filtr, exc_info=True)
+                    else:
+                        if not spans:
+                            break
+            if spans:
+                writer.write(spans=spans)
 
-            self.writer.write(spans=spans)
+        if telemetry_start_ns is not None:
+            self_telemetry.record("tracer.write", compat.monotonic_ns() - telemetry_start_ns)
 
     @deprecated(message="Manually setting service info is no longer necessary", version="1.0.0")
     def set_service_info(self, *args, **kwargs):
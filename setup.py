@@ -135,7 +135,11 @@ if sys.version_info[:2] >= (3, 4):
     ext_modules = [
         Extension(
             "ddtrace.profiling.collector._memalloc",
-            sources=["ddtrace/profiling/collector/_memalloc.c", "ddtrace/profiling/collector/_memalloc_tb.c"],
+            sources=[
+                "ddtrace/profiling/collector/_memalloc.c",
+                "ddtrace/profiling/collector/_memalloc_tb.c",
+                "ddtrace/profiling/collector/_memalloc_heap.c",
+            ],
             extra_compile_args=debug_compile_args,
         ),
     ]
@@ -206,6 +210,11 @@ setup(
                     libraries=encoding_libraries,
                     define_macros=encoding_macros,
                 ),
+                Cython.Distutils.Extension(
+                    "ddtrace.internal._sampling",
+                    sources=["ddtrace/internal/_sampling.pyx"],
+                    language="c",
+                ),
                 Cython.Distutils.Extension(
                     "ddtrace.internal._queue",
                     sources=["ddtrace/internal/_queue.pyx"],
@@ -222,6 +231,16 @@ setup(
                     sources=["ddtrace/profiling/collector/_traceback.pyx"],
                     language="c",
                 ),
+                Cython.Distutils.Extension(
+                    "ddtrace.profiling.collector._cputimer",
+                    sources=["ddtrace/profiling/collector/_cputimer.pyx"],
+                    language="c",
+                ),
+                Cython.Distutils.Extension(
+                    "ddtrace.profiling.collector._lock",
+                    sources=["ddtrace/profiling/collector/_lock.pyx"],
+                    language="c",
+                ),
                 Cython.Distutils.Extension(
                     "ddtrace.profiling.collector._threading",
                     sources=["ddtrace/profiling/collector/_threading.pyx"],
@@ -232,6 +251,11 @@ setup(
                     sources=["ddtrace/profiling/exporter/pprof.pyx"],
                     language="c",
                 ),
+                Cython.Distutils.Extension(
+                    "ddtrace.profiling._buffer",
+                    sources=["ddtrace/profiling/_buffer.pyx"],
+                    language="c",
+                ),
                 Cython.Distutils.Extension(
                     "ddtrace.profiling._build",
                     sources=["ddtrace/profiling/_build.pyx"],
@@ -13,6 +13,7 @@ from ddtrace.compat import httplib, to_unicode
 from ddtrace.constants import SPAN_MEASURED_KEY
 from ddtrace.encoding import JSONEncoder
 from ddtrace.ext import http
+from ddtrace.filters import _process_traces
 from ddtrace.internal.writer import AgentWriter
 from ddtrace.internal._encoding import MsgpackEncoder
 
@@ -79,6 +80,7 @@ def override_global_config(values):
         "analytics_enabled",
         "report_hostname",
         "health_metrics_enabled",
+        "_compute_stats",
         "env",
         "version",
         "service",
@@ -397,6 +399,11 @@ class DummyWriter(AgentWriter):
             # put spans in a list like we do in the real execution path
             # with both encoders
             trace = [spans]
+            self._processors.process_traces(trace)
+            trace = _process_traces(self._filters, trace)
+            if not trace:
+                return
+            spans = trace[0]
             self.json_encoder.encode_traces(trace)
             self.msgpack_encoder.encode_traces(trace)
             self.spans += spans
@@ -450,12 +457,14 @@ class DummyTracer(Tracer):
                 hostname=self.writer.api.hostname,
                 port=self.writer.api.port,
                 priority_sampler=self.writer._priority_sampler,
+                filters=self._filters,
             )
         else:
             self.writer = DummyWriter(
                 hostname="",
                 port=0,
                 priority_sampler=self.writer._priority_sampler,
+                filters=self._filters,
             )
 
     def configure(self, *args, **kwargs):
@@ -0,0 +1,87 @@
+import pytest
+
+from ddtrace import Tracer
+from ddtrace.internal.writer import AgentWriter
+
+
+class BenchmarkWriter(AgentWriter):
+    """Writer enqueuing the traces like the agent writer, but dropping them instead of sending them."""
+
+    def write(self, spans=None, services=None):
+        if spans:
+            queue = self._trace_queue
+            queue.put(spans)
+            if len(queue) >= queue.maxsize:
+                queue.get()
+
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    tracer.writer = BenchmarkWriter()
+    return tracer
+
+
+@pytest.fixture(params=[False, True], ids=["untraced", "traced"])
+def traced(request):
+    """Run a benchmark without and with the integration, to compare the overhead in the same group."""
+    return request.param
+
+
+# Regressions of the overhead of the integrations found when comparing with a previous run
+_overhead_regressions = []
+
+
+def pytest_addoption(parser):
+    parser.getgroup("benchmark").addoption(
+        "--benchmark-overhead-fail",
+        type=float,
+        metavar="PERCENT",
+        help="Fail when the overhead of an integration, its traced min time over its untraced min time in the same "
+        "run, increased by more than PERCENT since the run given to --benchmark-compare. Unlike the times themselves, "
+        "this ratio does not depend on the speed of the machine running the benchmarks.",
+    )
+
+
+def _overheads(benchmarks):
+    """Return the overheads of the traced benchmarks, keyed by their saved run (None for the current one) and name."""
+    runs = {}
+    for bench in benchmarks:
+        params = bench.get("params") or {}
+        if "traced" not in params:
+            continue
+        others = tuple(sorted((k, str(v)) for k, v in params.items() if k != "traced"))
+        key = (bench["path"], bench["fullname"].split("[")[0], others)
+        runs.setdefault(key, {})[params["traced"]] = bench["min"]
+    return dict((key, times[True] / times[False]) for key, times in runs.items() if len(times) == 2 and times[False])
+
+
+@pytest.hookimpl(hookwrapper=True, optionalhook=True)
+def pytest_benchmark_group_stats(config, benchmarks, group_by):
+    fail = config.getoption("benchmark_overhead_fail")
+    if fail is not None:
+        overheads = _overheads(benchmarks)
+        for (path, name, others), previous in sorted(overheads.items(), key=str):
+            if path is None:
+                continue
+            current = overheads.get((None, name, others))
+            if current is not None and current > previous * (1 + fail / 100.0):
+                if others:
+                    name += "[%s]" % ", ".join("%s=%s" % param for param in others)
+                _overhead_regressions.append("%s: overhead %.2fx, was %.2fx in %s" % (name, current, previous, path))
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_sessionfinish(session, exitstatus):
+    # The benchmarks are compared when pytest-benchmark finishes its session
+    yield
+    if _overhead_regressions:
+        session.exitstatus = 1
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _overhead_regressions:
+        terminalreporter.write_line("The overhead of the integrations has regressed:", red=True)
+        for regression in _overhead_regressions:
+            terminalreporter.write_line("\t" + regression, red=True)
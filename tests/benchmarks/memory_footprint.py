@@ -0,0 +1,212 @@
+"""
+Measure the memory footprint of the tracer in a long-running process.
+
+A synthetic workload creates traces from several threads, first to warm up the tracer, then for the measured duration.
+The tracer is idle when the memory is snapshotted before and after the measured duration, so any memory retained by
+ddtrace in between is a leak: the spans left in contexts, the traces left in the writer queue, the events left in the
+profiler recorder or the services added to the tracer.
+
+Usage::
+
+    python -m tests.benchmarks.memory_footprint --duration 600 --threads 4 --profiler
+
+It reports the RSS of the process, the top allocations of ddtrace modules retained during the measured duration
+according to tracemalloc and the number of ddtrace objects per type. It exits with status 1 if the memory retained per
+span exceeds the budget.
+
+The profiler recorder keeps its events until they are exported, every minute: with ``--profiler``, the duration must
+be a few minutes long for the events kept by the recorder not to count as retained memory.
+"""
+import argparse
+import collections
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import ddtrace
+from ddtrace import Tracer
+from ddtrace.api import Response
+from ddtrace.internal.writer import AgentWriter
+from ddtrace.vendor import psutil
+
+
+# Memory retained by ddtrace per span created during the measured duration, in bytes
+BUDGET = 8
+
+DDTRACE_FILES = os.path.join(os.path.dirname(ddtrace.__file__), "*")
+# Used by the harness to measure the RSS
+PSUTIL_FILES = os.path.join(os.path.dirname(psutil.__file__), "*")
+
+
+class LocalAgentWriter(AgentWriter):
+    """Writer processing the traces in its thread like the agent writer, but not sending them."""
+
+    def __init__(self, *args, **kwargs):
+        super(LocalAgentWriter, self).__init__(*args, **kwargs)
+        self.api._put = lambda *args, **kwargs: Response(status=200)
+
+
+def _trace(tracer, stop, spans):
+    # `spans` is a single-item list only updated by this thread
+    user_id = 0
+    while not stop.is_set():
+        user_id += 1
+        with tracer.trace("web.request", service="web", resource="GET /users/<id>", span_type="web") as span:
+            span.set_tag("http.method", "GET")
+            span.set_tag("http.url", "/users/%d" % user_id)
+            span.set_metric("http.status_code", 200)
+            for _ in range(5):
+                with tracer.trace("db.query", service="db", resource="SELECT * FROM users WHERE id = ?"):
+                    pass
+            with tracer.trace("cache.get", service="cache", resource="GET") as span:
+                span.set_tag("cache.key", "user:%d" % user_id)
+        spans[0] += 7
+
+
+def _run_workload(tracer, duration, nthreads, on_tick=None):
+    """Run the workload, then stop the writer once it processed every trace.
+
+    :return: The number of spans created.
+    """
+    stop = threading.Event()
+    spans = [[0] for _ in range(nthreads)]
+    threads = [threading.Thread(target=_trace, args=(tracer, stop, spans[i])) for i in range(nthreads)]
+    for thread in threads:
+        thread.start()
+
+    end = time.time() + duration
+    while time.time() < end:
+        time.sleep(min(1, max(0, end - time.time())))
+        if on_tick is not None:
+            on_tick()
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    # The writer thread flushes its queue when it stops: flushing it from this thread instead would not wait for the
+    # batch the writer thread might be processing.
+    writer = tracer.writer
+    writer.stop()
+    if writer.started:
+        writer.join()
+    return sum(count for count, in spans)
+
+
+def _count_objects():
+    counts = collections.Counter(
+        "%s.%s" % (type(obj).__module__, type(obj).__name__)
+        for obj in gc.get_objects()
+        if type(obj).__module__.startswith("ddtrace.")
+    )
+    return dict(counts.most_common(20))
+
+
+def _snapshot():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, DDTRACE_FILES), tracemalloc.Filter(False, PSUTIL_FILES)]
+    )
+
+
+def run(duration, nthreads=4, warmup=5, profiler=False, ntop=10):
+    """Measure the memory footprint of the tracer running a synthetic workload.
+
+    :param duration: The measured duration, in seconds.
+    :param nthreads: The number of threads creating traces.
+    :param warmup: The duration of the workload before measuring, in seconds.
+    :param profiler: Whether to run the profiler too.
+    :param ntop: The number of top allocations to report.
+    :return: The report as a dict.
+    """
+    process = psutil.Process()
+    tracer = Tracer()
+    tracer.writer = LocalAgentWriter()
+    if profiler:
+        from ddtrace.profiling import Profiler
+
+        prof = Profiler(tracer=tracer)
+        prof.start(stop_on_exit=False, profile_children=False)
+
+    tracemalloc.start()
+    try:
+        _run_workload(tracer, warmup, nthreads)
+        # The writer of the warmup is stopped: use a new one, created before the snapshot
+        tracer.writer = LocalAgentWriter()
+        before = _snapshot()
+        rss_before = process.memory_info().rss
+
+        rss = [rss_before]
+        nspans = _run_workload(tracer, duration, nthreads, lambda: rss.append(process.memory_info().rss))
+
+        after = _snapshot()
+        rss_after = process.memory_info().rss
+    finally:
+        tracemalloc.stop()
+        if profiler:
+            prof.stop(flush=False)
+        tracer.shutdown()
+
+    stats = after.compare_to(before, "lineno")
+    retained = sum(stat.size_diff for stat in stats)
+    return {
+        "duration": duration,
+        "threads": nthreads,
+        "spans": nspans,
+        "rss": {"before": rss_before, "after": rss_after, "max": max(rss)},
+        "retained_bytes": retained,
+        "retained_bytes_per_span": float(retained) / nspans if nspans else 0.0,
+        "top_allocations": [
+            {"location": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            for stat in stats[:ntop]
+        ],
+        "objects": _count_objects(),
+        "trace_queue_length": len(tracer.writer._trace_queue),
+        "services": len(tracer._services),
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--duration", type=float, default=60, help="Measured duration in seconds (default: 60)")
+    parser.add_argument("--threads", type=int, default=4, help="Number of threads creating traces (default: 4)")
+    parser.add_argument("--warmup", type=float, default=5, help="Warmup duration in seconds (default: 5)")
+    parser.add_argument("--profiler", action="store_true", help="Run the profiler too")
+    parser.add_argument(
+        "--budget", type=float, default=BUDGET, help="Maximum bytes retained per span (default: %d)" % BUDGET
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    options = parser.parse_args(args)
+
+    report = run(options.duration, options.threads, options.warmup, options.profiler)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print("Spans created: %d in %.1fs with %d threads" % (report["spans"], report["duration"], report["threads"]))
+    print("RSS: %(before)d bytes before, %(after)d bytes after, %(max)d bytes max" % report["rss"])
+    print(
+        "Retained by ddtrace: %d bytes, %.2f bytes per span (budget: %.2f)"
+        % (report["retained_bytes"], report["retained_bytes_per_span"], options.budget)
+    )
+    print("Traces left in the writer queue: %d" % report["trace_queue_length"])
+    print("Services: %d" % report["services"])
+    print("Top retained allocations:")
+    for allocation in report["top_allocations"]:
+        print("  %(location)s: %(size_diff)+d bytes, %(count_diff)+d blocks" % allocation)
+    print("Objects:")
+    for name, count in report["objects"].items():
+        print("  %s: %d" % (name, count))
+
+    if report["retained_bytes_per_span"] > options.budget:
+        print("Memory retained per span exceeds the budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from ddtrace.contrib.asgi import TraceMiddleware
+
+
+SCOPE = {
+    "type": "http",
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/users/42",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"localhost"), (b"user-agent", b"benchmark")],
+    "client": ("127.0.0.1", 32767),
+    "server": ("127.0.0.1", 80),
+}
+
+
+async def app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"id": 42}'})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+@pytest.fixture
+def application(tracer, traced):
+    if traced:
+        return TraceMiddleware(app, tracer=tracer)
+    return app
+
+
+@pytest.mark.benchmark(group="integrations.asgi", min_time=0.005)
+def test_request(benchmark, application):
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(lambda: loop.run_until_complete(application(dict(SCOPE), receive, send)))
+    finally:
+        loop.close()
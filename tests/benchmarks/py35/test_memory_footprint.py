@@ -0,0 +1,22 @@
+from tests.benchmarks import memory_footprint
+
+
+def test_memory_footprint():
+    report = memory_footprint.run(duration=2, nthreads=2, warmup=1)
+    assert report["spans"] > 0
+    assert report["retained_bytes_per_span"] <= memory_footprint.BUDGET
+    assert report["rss"]["max"] >= report["rss"]["before"]
+    assert report["trace_queue_length"] == 0
+    assert report["services"] == 3
+
+
+def test_main(tmp_path, capsys):
+    output = tmp_path / "report.json"
+    # A short run without warmup is too short to check the budget: only check the report
+    args = ["--duration", "1", "--warmup", "0", "--output", str(output)]
+    assert memory_footprint.main(args + ["--budget", "1000000"]) == 0
+    assert "bytes per span" in capsys.readouterr().out
+    assert output.exists()
+
+    # Even freeing memory exceeds a negative budget
+    assert memory_footprint.main(["--duration", "1", "--warmup", "0", "--budget", "-1000000"]) == 1
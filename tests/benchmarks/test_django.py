@@ -0,0 +1,62 @@
+import pytest
+
+from ddtrace import Pin
+
+
+django = pytest.importorskip("django")
+
+from django.conf import settings  # noqa: E402
+from django.http import JsonResponse  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from ddtrace.contrib.django import patch  # noqa: E402
+from ddtrace.contrib.django import unpatch  # noqa: E402
+
+
+def user(request, user_id):
+    return JsonResponse(dict(id=int(user_id), name="user%s" % user_id))
+
+
+try:
+    from django.urls import re_path
+except ImportError:
+    # Django < 2.0
+    from django.conf.urls import url as re_path
+
+urlpatterns = [re_path(r"^users/(?P<user_id>[0-9]+)$", user)]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def django_settings():
+    if not settings.configured:
+        settings.configure(
+            DEBUG=False,
+            SECRET_KEY="benchmarks",
+            ALLOWED_HOSTS=["testserver"],
+            ROOT_URLCONF=__name__,
+            INSTALLED_APPS=[],
+            MIDDLEWARE=["django.middleware.common.CommonMiddleware"],
+            MIDDLEWARE_CLASSES=["django.middleware.common.CommonMiddleware"],
+        )
+        django.setup()
+
+
+@pytest.fixture
+def client(tracer, traced):
+    if not traced:
+        yield Client()
+        return
+
+    # DEV: the middleware are loaded on the first request, after patching
+    patch()
+    try:
+        Pin.override(django, tracer=tracer)
+        yield Client()
+    finally:
+        unpatch()
+
+
+@pytest.mark.benchmark(group="integrations.django", min_time=0.005)
+def test_request(benchmark, client):
+    response = benchmark(client.get, "/users/42")
+    assert response.status_code == 200
@@ -0,0 +1,34 @@
+import pytest
+
+from ddtrace import Pin
+
+
+flask = pytest.importorskip("flask")
+
+from ddtrace.contrib.flask import patch  # noqa: E402
+from ddtrace.contrib.flask import unpatch  # noqa: E402
+
+
+@pytest.fixture
+def client(tracer, traced):
+    if traced:
+        patch()
+    try:
+        app = flask.Flask(__name__)
+
+        @app.route("/users/<int:user_id>")
+        def user(user_id):
+            return flask.jsonify(id=user_id, name="user%d" % user_id)
+
+        if traced:
+            Pin.override(app, tracer=tracer)
+        yield app.test_client()
+    finally:
+        if traced:
+            unpatch()
+
+
+@pytest.mark.benchmark(group="integrations.flask", min_time=0.005)
+def test_request(benchmark, client):
+    response = benchmark(client.get, "/users/42")
+    assert response.status_code == 200
@@ -0,0 +1,19 @@
+import re
+import subprocess
+import sys
+
+import pytest
+
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| ddtrace$", re.MULTILINE)
+
+
+@pytest.mark.parametrize("code", ["pass", "import ddtrace"], ids=["python", "ddtrace"])
+@pytest.mark.benchmark(group="import", min_time=0.005)
+def test_import(benchmark, code):
+    benchmark(subprocess.check_call, [sys.executable, "-c", code])
+
+    if sys.version_info >= (3, 7) and code != "pass":
+        # Keep the cumulative import time of ddtrace measured by Python in the saved benchmarks
+        output = subprocess.check_output([sys.executable, "-X", "importtime", "-c", code], stderr=subprocess.STDOUT)
+        benchmark.extra_info["importtime_us"] = int(IMPORT_TIME_RE.search(output.decode()).group(1))
@@ -0,0 +1,148 @@
+import compileall
+import importlib
+import os
+import sys
+import threading
+
+import pytest
+
+from ddtrace.profiling import _line2def
+from ddtrace.profiling import recorder
+from ddtrace.profiling.collector import _traceback
+from ddtrace.profiling.collector import stack
+from ddtrace.profiling.collector import threading as collector_threading
+from ddtrace.profiling.exporter import pprof
+from ddtrace.vendor import six
+
+
+def _deep_frame(depth):
+    if depth == 0:
+        return sys._getframe()
+    return _deep_frame(depth - 1)
+
+
+@pytest.mark.benchmark(group="profiling.traceback", min_time=0.005)
+def test_pyframe_to_frames_64(benchmark):
+    frame = _deep_frame(64)
+    benchmark(_traceback.pyframe_to_frames, frame, 64)
+
+
+def _stack_events(nevents):
+    return {
+        stack.StackSampleEvent: [
+            stack.StackSampleEvent(
+                thread_id=i % 8,
+                thread_name="thread-%d" % (i % 8),
+                frames=[("file%d.py" % (i % 100), i % 1000, "func%d" % (i % 300)) for _ in range(16)],
+                nframes=16,
+                wall_time_ns=i,
+                cpu_time_ns=i,
+                sampling_period=1000000,
+            )
+            for i in range(nevents)
+        ]
+    }
+
+
+@pytest.mark.benchmark(group="profiling.pprof")
+def test_pprof_export_serialize(benchmark):
+    events = _stack_events(5000)
+    exp = pprof.PprofExporter()
+    benchmark(lambda: exp.export(events, 0, 1).SerializeToString())
+
+
+@pytest.mark.benchmark(group="profiling.pprof")
+def test_pprof_write_profile(benchmark):
+    events = _stack_events(5000)
+    exp = pprof.PprofExporter()
+    benchmark(lambda: exp.write_profile(six.BytesIO(), events, 0, 1))
+
+
+@pytest.mark.parametrize("nevents", [1, 100])
+@pytest.mark.benchmark(group="profiling.recorder")
+def test_recorder_push_events(benchmark, nevents):
+    r = recorder.Recorder()
+    events = [collector_threading.LockAcquireEvent() for _ in range(nevents)]
+    benchmark(r.push_events, events)
+
+
+_MODULE_TEMPLATE = """
+class Class{i}(object):
+    def method(self, x):
+        y = x * 2
+        return y
+
+    @staticmethod
+    def static(x):
+        return [x for _ in range(10)]
+
+
+def function{i}(x):
+    def inner(y):
+        return y + 1
+
+    return inner(x)
+"""
+
+
+@pytest.fixture(scope="module")
+def synthetic_code_base(tmp_path_factory):
+    """A package of 200 modules of 100 functions each."""
+    path = tmp_path_factory.mktemp("code_base")
+    package = path / "synthetic_code_base"
+    package.mkdir()
+    (package / "__init__.py").write_text(u"")
+    filenames = []
+    for module in range(200):
+        filename = package / ("module%d.py" % module)
+        filename.write_text(u"".join(_MODULE_TEMPLATE.format(i=i) for i in range(50)))
+        filenames.append(str(filename))
+    # The loaded modules are resolved from their bytecode cache
+    compileall.compile_dir(str(package), quiet=1)
+    sys.path.insert(0, str(path))
+    try:
+        yield filenames
+    finally:
+        sys.path.remove(str(path))
+        for name in list(sys.modules):
+            if name.startswith("synthetic_code_base"):
+                del sys.modules[name]
+
+
+@pytest.mark.parametrize("loaded", [True, False])
+@pytest.mark.benchmark(group="profiling.line2def")
+def test_filename_and_lineno_to_def(benchmark, synthetic_code_base, loaded):
+    for filename in synthetic_code_base:
+        module = "synthetic_code_base." + os.path.basename(filename)[:-3]
+        if loaded:
+            importlib.import_module(module)
+        else:
+            sys.modules.pop(module, None)
+
+    locations = [(filename, lineno) for filename in synthetic_code_base for lineno in range(1, 800, 7)]
+
+    def resolve():
+        _line2def.file_to_tree.cache_clear()
+        _line2def.filename_and_lineno_to_def.cache_clear()
+        for filename, lineno in locations:
+            _line2def.filename_and_lineno_to_def(filename, lineno)
+
+    benchmark.pedantic(resolve, rounds=3)
+
+
+def _lock_acquire_release(lock):
+    lock.acquire()
+    lock.release()
+
+
+@pytest.mark.parametrize("capture_pct", [None, 0, 2, 100])
+@pytest.mark.parametrize("lock_type", ["Lock", "RLock"])
+@pytest.mark.benchmark(group="profiling.lock")
+def test_lock_acquire_release_uncontended(benchmark, lock_type, capture_pct):
+    if capture_pct is None:
+        benchmark(_lock_acquire_release, getattr(threading, lock_type)())
+        return
+
+    with collector_threading.LockCollector(recorder.Recorder(), capture_pct=capture_pct):
+        lock = getattr(threading, lock_type)()
+    benchmark(_lock_acquire_release, lock)
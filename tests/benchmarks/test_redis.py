@@ -0,0 +1,58 @@
+import pytest
+
+from ddtrace import Pin
+
+
+redis = pytest.importorskip("redis")
+
+from ddtrace.contrib.redis.patch import patch  # noqa: E402
+from ddtrace.contrib.redis.patch import unpatch  # noqa: E402
+
+
+class InProcessConnection(redis.Connection):
+    """Connection answering every command in-process, so that only the client and the tracing are measured."""
+
+    def connect(self):
+        pass
+
+    def can_read(self, timeout=0):
+        return False
+
+    def send_command(self, *args, **kwargs):
+        pass
+
+    def send_packed_command(self, *args, **kwargs):
+        pass
+
+    def read_response(self, *args, **kwargs):
+        return b"value"
+
+
+@pytest.fixture
+def client(tracer, traced):
+    if traced:
+        patch()
+    try:
+        client = redis.Redis(connection_pool=redis.ConnectionPool(connection_class=InProcessConnection))
+        if traced:
+            Pin.override(client, tracer=tracer)
+        yield client
+    finally:
+        if traced:
+            unpatch()
+
+
+@pytest.mark.benchmark(group="integrations.redis", min_time=0.005)
+def test_get(benchmark, client):
+    assert benchmark(client.get, "key") == b"value"
+
+
+@pytest.mark.benchmark(group="integrations.redis.pipeline", min_time=0.005)
+def test_pipeline(benchmark, client):
+    def pipeline():
+        with client.pipeline(transaction=False) as pipe:
+            for i in range(10):
+                pipe.get("key%d" % i)
+            return pipe.execute()
+
+    assert benchmark(pipeline) == [b"value"] * 10
@@ -0,0 +1,18 @@
+import sys
+
+import pytest
+
+from ddtrace.internal.runtime.constants import PSUTIL_RUNTIME_METRICS
+from ddtrace.internal.runtime.metric_collectors import ProcRuntimeMetricCollector
+from ddtrace.internal.runtime.metric_collectors import PSUtilRuntimeMetricCollector
+
+
+@pytest.mark.benchmark(group="runtime_metrics.process", min_time=0.005)
+def test_psutil_collect(benchmark):
+    benchmark(PSUtilRuntimeMetricCollector().collect, PSUTIL_RUNTIME_METRICS)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc is only available on Linux")
+@pytest.mark.benchmark(group="runtime_metrics.process", min_time=0.005)
+def test_proc_collect(benchmark):
+    benchmark(ProcRuntimeMetricCollector().collect, PSUTIL_RUNTIME_METRICS)
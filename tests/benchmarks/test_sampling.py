@@ -0,0 +1,37 @@
+import pytest
+
+from ddtrace.internal import _sampling
+from ddtrace.internal._rand import rand64bits
+from ddtrace.sampler import KNUTH_FACTOR, MAX_TRACE_ID
+from ddtrace.sampler import RateSampler, SamplingRule
+from ddtrace.span import Span
+
+
+TRACE_IDS = [rand64bits() for _ in range(1000000)]
+SAMPLE_RATE = 0.5
+THRESHOLD = _sampling.threshold(SAMPLE_RATE)
+
+
+def _python_sample_many(trace_ids, sample_rate):
+    threshold = sample_rate * MAX_TRACE_ID
+    return [((trace_id * KNUTH_FACTOR) % MAX_TRACE_ID) <= threshold for trace_id in trace_ids]
+
+
+@pytest.mark.benchmark(group="sampling.batch", min_time=0.005)
+def test_sample_many_python(benchmark):
+    benchmark(_python_sample_many, TRACE_IDS, SAMPLE_RATE)
+
+
+@pytest.mark.benchmark(group="sampling.batch", min_time=0.005)
+def test_sample_many(benchmark):
+    benchmark(_sampling.sample_many, TRACE_IDS, THRESHOLD)
+
+
+@pytest.mark.benchmark(group="sampling.span", min_time=0.005)
+def test_rate_sampler_sample(benchmark):
+    benchmark(RateSampler(SAMPLE_RATE).sample, Span(None, "span"))
+
+
+@pytest.mark.benchmark(group="sampling.span", min_time=0.005)
+def test_sampling_rule_sample(benchmark):
+    benchmark(SamplingRule(SAMPLE_RATE).sample, Span(None, "span"))
@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+from ddtrace import Pin
+from ddtrace.contrib.sqlite3.patch import patch
+from ddtrace.contrib.sqlite3.patch import unpatch
+
+
+@pytest.fixture
+def connection(tracer, traced):
+    if traced:
+        patch()
+    try:
+        connection = sqlite3.connect(":memory:")
+    finally:
+        unpatch()
+    if traced:
+        Pin.get_from(connection).clone(tracer=tracer).onto(connection)
+    connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    connection.executemany("INSERT INTO users (name) VALUES (?)", [("user%d" % i,) for i in range(100)])
+    yield connection
+    connection.close()
+
+
+@pytest.mark.benchmark(group="integrations.sqlite3", min_time=0.005)
+def test_query(benchmark, connection):
+    def query():
+        cursor = connection.cursor()
+        cursor.execute("SELECT name FROM users WHERE id = ?", (42,))
+        return cursor.fetchall()
+
+    assert benchmark(query) == [("user41",)]
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from ddtrace import Tracer
+from ddtrace.api import Response
+from ddtrace.internal.writer import AgentWriter
+
+
+NTRACES = 100
+
+
+class LocalAgentWriter(AgentWriter):
+    """Writer encoding the traces like the agent writer, but not sending them."""
+
+    def __init__(self, *args, **kwargs):
+        super(LocalAgentWriter, self).__init__(*args, **kwargs)
+        self.api._put = lambda *args, **kwargs: Response(status=200)
+
+    def write(self, spans=None, services=None):
+        # DEV: the traces are flushed by the benchmark, do not start the thread
+        if spans:
+            self._trace_queue.put(spans)
+
+
+@pytest.mark.parametrize("nthreads", [1, 4, 8])
+@pytest.mark.benchmark(group="writer.threads", min_time=0.005)
+def test_write_and_flush(benchmark, nthreads):
+    tracer = Tracer()
+    writer = tracer.writer = LocalAgentWriter()
+    # Enough room for every trace of the round
+    writer._trace_queue.maxsize = nthreads * NTRACES
+
+    def trace():
+        for _ in range(NTRACES):
+            with tracer.trace("web.request", service="web", resource="GET /users", span_type="web") as span:
+                span.set_tag("http.method", "GET")
+                for i in range(5):
+                    with tracer.trace("db.query", service="db", resource="SELECT %d" % i):
+                        pass
+
+    def write_and_flush():
+        threads = [threading.Thread(target=trace) for _ in range(nthreads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush_queue()
+
+    benchmark(write_and_flush)
@@ -7,6 +7,8 @@ from ddtrace.ext import http
 from ddtrace.contrib.elasticsearch import get_traced_transport
 from ddtrace.contrib.elasticsearch.elasticsearch import elasticsearch
 from ddtrace.contrib.elasticsearch.patch import patch, unpatch
+from ddtrace.contrib.elasticsearch.quantize import QUANTIZE_PROCESSOR
+from ddtrace.internal import processor
 
 # testing
 from tests.opentracer.utils import init_tracer
@@ -337,6 +339,7 @@ class ElasticsearchPatchTest(TracerTestCase):
         # Test patch idempotence
         patch()
         patch()
+        assert QUANTIZE_PROCESSOR in processor.processors
 
         es = elasticsearch.Elasticsearch(port=ELASTICSEARCH_CONFIG["port"])
         Pin(service=self.TEST_SERVICE, tracer=self.tracer).onto(es.transport)
@@ -352,6 +355,7 @@ class ElasticsearchPatchTest(TracerTestCase):
         # Test unpatch
         self.reset()
         unpatch()
+        assert QUANTIZE_PROCESSOR not in processor.processors
 
         es = elasticsearch.Elasticsearch(port=ELASTICSEARCH_CONFIG["port"])
 
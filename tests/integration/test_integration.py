@@ -229,13 +229,13 @@ class TestAPITransport(TestCase):
     a real trace-agent to let them pass.
     """
 
-    @mock.patch("ddtrace.internal.runtime.container.get_container_info")
-    def setUp(self, get_container_info):
+    @mock.patch("ddtrace.internal.runtime.container.get_cached_container_info")
+    def setUp(self, get_cached_container_info):
         """
         Create a tracer without workers, while spying the ``send()`` method
         """
         # Mock the container id we use for making requests
-        get_container_info.return_value = CGroupInfo(container_id="test-container-id")
+        get_cached_container_info.return_value = CGroupInfo(container_id="test-container-id")
 
         # create a new API object to test the transport using synchronous calls
         self.tracer = get_dummy_tracer()
@@ -0,0 +1,31 @@
+# flake8: noqa
+import functools
+
+
+def decorator(f):
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        return f(*args, **kwargs)
+
+    return wrapper
+
+
+class A(object):
+    def x(self):
+        def inner():
+            return [i for i in range(10)]
+
+        return inner()
+
+    @staticmethod
+    def y():
+        return 1
+
+    @property
+    def z(self):
+        return 2
+
+
+@decorator
+def f():
+    return 3
@@ -0,0 +1,15 @@
+# flake8: noqa
+_registry = {}
+
+
+def register(f):
+    _registry[f.__name__] = f
+
+
+@register
+def hidden():
+    return 1
+
+
+def visible():
+    return 2
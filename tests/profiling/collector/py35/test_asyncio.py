@@ -0,0 +1,62 @@
+import asyncio
+
+from ddtrace.profiling import recorder
+from ddtrace.profiling.collector import asyncio as collector_asyncio
+from ddtrace.profiling.collector import threading as collector_threading
+
+
+def test_patch():
+    r = recorder.Recorder()
+    lock = asyncio.Lock
+    collector = collector_asyncio.AsyncioLockCollector(r)
+    collector.start()
+    assert lock == collector.original
+    assert issubclass(asyncio.Lock, lock)
+    collector.stop()
+    assert lock == asyncio.Lock
+
+
+def test_lock_events():
+    r = recorder.Recorder()
+
+    async def _lock():
+        lock = asyncio.Lock()
+        assert isinstance(lock, collector.original)
+        await lock.acquire()
+        assert lock.locked()
+        lock.release()
+        async with lock:
+            pass
+
+    collector = collector_asyncio.AsyncioLockCollector(r, capture_pct=100)
+    with collector:
+        asyncio.get_event_loop().run_until_complete(_lock())
+
+    acquire_events = r.events[collector_threading.LockAcquireEvent]
+    release_events = r.events[collector_threading.LockReleaseEvent]
+    assert len(acquire_events) == 2
+    assert len(release_events) == 2
+    for event in acquire_events:
+        assert event.lock_name == "test_asyncio.py:23"
+        assert event.wait_time_ns > 0
+        assert event.sampling_pct == 100
+    assert acquire_events[0].frames[0] == (__file__, 25, "_lock")
+    assert acquire_events[1].frames[0] == (__file__, 28, "_lock")
+    assert release_events[0].frames[0] == (__file__, 27, "_lock")
+    # The line number of the end of the `async with` block depends on the Python version
+    assert release_events[1].frames[0] in ((__file__, 28, "_lock"), (__file__, 29, "_lock"))
+
+
+def test_lock_events_not_sampled():
+    r = recorder.Recorder()
+
+    async def _lock():
+        lock = asyncio.Lock()
+        async with lock:
+            pass
+
+    with collector_asyncio.AsyncioLockCollector(r, capture_pct=0):
+        asyncio.get_event_loop().run_until_complete(_lock())
+
+    assert len(r.events[collector_threading.LockAcquireEvent]) == 0
+    assert len(r.events[collector_threading.LockReleaseEvent]) == 0
@@ -23,7 +23,7 @@ def test_start_twice():
 
 
 def test_start_wrong_arg():
-    with pytest.raises(TypeError, match="function takes exactly 2 arguments \\(1 given\\)"):
+    with pytest.raises(TypeError, match="function takes at least 2 arguments \\(1 given\\)"):
         _memalloc.start(2)
 
     with pytest.raises(ValueError, match="the number of frames must be in range \\[1; 65535\\]"):
@@ -185,3 +185,115 @@ def test_memory_collector_ignore_profiler(ignore_profiler):
 
     if not ignore_profiler:
         assert ok
+
+
+def _allocate_heap():
+    return [bytearray(1024) for _ in range(1000)]
+
+
+def test_heap():
+    _memalloc.start(32, 1000, 1024)
+    try:
+        kept = _allocate_heap()
+        freed = _allocate_heap()
+        del freed
+        heap = _memalloc.heap()
+    finally:
+        _memalloc.stop()
+
+    count_kept = 0
+    for (stack, nframe, thread_id), size in heap:
+        assert 0 < len(stack) <= 32
+        assert nframe >= len(stack)
+        assert size > 0
+        if stack[0][2] == "<listcomp>" and stack[1][2] == "_allocate_heap":
+            assert thread_id == _nogevent.main_thread_id
+            assert stack[2][2] == "test_heap"
+            count_kept += 1
+            assert stack[2][1] == 197
+
+    # One allocation is sampled every 1 KiB on average, the freed ones are not reported
+    assert 500 < count_kept < 1500
+    assert len(kept) == 1000
+
+
+def test_heap_disabled():
+    _memalloc.start(32, 1000)
+    try:
+        _allocate_heap()
+        assert _memalloc.heap() == ()
+    finally:
+        _memalloc.stop()
+
+
+def test_heap_not_started():
+    with pytest.raises(RuntimeError, match="the memalloc module was not started"):
+        _memalloc.heap()
+
+
+def test_heap_max_count():
+    _memalloc.start(32, 1000, 1)
+    try:
+        kept = [object() for _ in range(memalloc.MemoryCollector._HEAP_MAX_EVENTS * 2)]
+        # Some of the tracked allocations might have been freed since
+        max_count = memalloc.MemoryCollector._HEAP_MAX_EVENTS
+        assert max_count / 2 < len(_memalloc.heap()) <= max_count
+    finally:
+        _memalloc.stop()
+    del kept
+
+
+def test_thread_allocated_bytes():
+    assert _memalloc.thread_allocated_bytes() is None
+    _memalloc.start(32, 1000)
+    try:
+        start = _memalloc.thread_allocated_bytes()
+        other_thread = []
+        th = threading.Thread(target=lambda: other_thread.append([object() for _ in range(10000)]))
+        th.start()
+        th.join()
+        # The allocations of other threads are not counted
+        assert _memalloc.thread_allocated_bytes() - start < 10000 * 16
+        kept = [object() for _ in range(10000)]
+        assert _memalloc.thread_allocated_bytes() - start >= 10000 * 16
+    finally:
+        _memalloc.stop()
+    del kept
+    assert _memalloc.thread_allocated_bytes() is None
+
+
+def test_thread_allocated_bytes_realloc():
+    _memalloc.start(32, 1000)
+    try:
+        data = bytearray(1024 * 1024)
+        start = _memalloc.thread_allocated_bytes()
+        # Shrinking a memory block does not allocate a new one
+        size = len(data)
+        while size > 1024:
+            size //= 2
+            del data[size:]
+        allocated = _memalloc.thread_allocated_bytes() - start
+    finally:
+        _memalloc.stop()
+    del data
+    assert allocated < 256 * 1024
+
+
+def test_memory_collector_heap():
+    r = recorder.Recorder()
+    mc = memalloc.MemoryCollector(r, heap_sample_size=1024)
+    with mc:
+        kept = _allocate_heap()
+        mc.periodic()
+        # The heap is only snapshotted once per heap interval
+        mc.periodic()
+
+    events = r.events[memalloc.MemoryHeapSampleEvent]
+    assert len(events) > 0
+    assert len(set(event.timestamp for event in events)) == 1
+    assert any(event.frames[1][2] == "_allocate_heap" for event in events)
+    for event in events:
+        assert event.size > 0
+        assert event.sample_size == 1024
+        assert not any(frame[0] == _periodic.__file__ for frame in event.frames)
+    del kept
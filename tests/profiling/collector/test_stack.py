@@ -1,17 +1,22 @@
 # -*- encoding: utf-8 -*-
+import gc
 import os
+import sys
 import threading
 import time
 import timeit
 
 import pytest
 
+from ddtrace.internal import active_spans
 from ddtrace.vendor import six
 
 from ddtrace.profiling import _nogevent
 from ddtrace.profiling import recorder
 from ddtrace.profiling.collector import stack
+from ddtrace.profiling.collector import _cputimer
 from ddtrace.profiling.collector import _threading
+from ddtrace.profiling.collector import _traceback
 
 from . import test_collector
 
@@ -296,7 +301,7 @@ def test_exception_collection():
     assert e.sampling_period > 0
     assert e.thread_id == _nogevent.thread_get_ident()
     assert e.thread_name == "MainThread"
-    assert e.frames == [(__file__, 290, "test_exception_collection")]
+    assert e.frames == [(__file__, 295, "test_exception_collection")]
     assert e.nframes == 1
     assert e.exc_type == ValueError
 
@@ -316,7 +321,7 @@ def test_thread_to_span_thread_isolation(tracer_and_collector):
     t, c = tracer_and_collector
     root = t.start_span("root")
     thread_id = _nogevent.thread_get_ident()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
+    assert active_spans.get(thread_id) is root
 
     quit_thread = threading.Event()
     span_started = threading.Event()
@@ -333,11 +338,11 @@ def test_thread_to_span_thread_isolation(tracer_and_collector):
     span_started.wait()
     if TESTING_GEVENT:
         # We track *real* threads, gevent is using only one in this case
-        assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root, store["span2"]}
-        assert c._thread_span_links.get_active_leaf_spans_from_thread_id(th.ident) == set()
+        assert active_spans.get(thread_id) is store["span2"]
+        assert active_spans.get(th.ident) is None
     else:
-        assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
-        assert c._thread_span_links.get_active_leaf_spans_from_thread_id(th.ident) == {store["span2"]}
+        assert active_spans.get(thread_id) is root
+        assert active_spans.get(th.ident) is store["span2"]
     # Do not quit the thread before we test, otherwise the collector might clean up the thread from the list of spans
     quit_thread.set()
     th.join()
@@ -347,44 +352,56 @@ def test_thread_to_span_multiple(tracer_and_collector):
     t, c = tracer_and_collector
     root = t.start_span("root")
     thread_id = _nogevent.thread_get_ident()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
+    assert active_spans.get(thread_id) is root
     subspan = t.start_span("subtrace", child_of=root)
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {subspan}
+    assert active_spans.get(thread_id) is subspan
     subspan.finish()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
+    assert active_spans.get(thread_id) is root
     root.finish()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == set()
+    assert active_spans.get(thread_id) is None
 
 
 def test_thread_to_child_span_multiple_unknown_thread(tracer_and_collector):
     t, c = tracer_and_collector
     t.start_span("root")
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(3456789) == set()
+    assert active_spans.get(3456789) is None
 
 
 def test_thread_to_child_span_clear(tracer_and_collector):
     t, c = tracer_and_collector
     root = t.start_span("root")
     thread_id = _nogevent.thread_get_ident()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
-    c._thread_span_links.clear_threads(set())
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == set()
+    assert active_spans.get(thread_id) is root
+    active_spans.clear_threads(set())
+    assert active_spans.get(thread_id) is None
 
 
 def test_thread_to_child_span_multiple_more_children(tracer_and_collector):
     t, c = tracer_and_collector
     root = t.start_span("root")
     thread_id = _nogevent.thread_get_ident()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root}
+    assert active_spans.get(thread_id) is root
     subspan = t.start_span("subtrace", child_of=root)
     subsubspan = t.start_span("subsubtrace", child_of=subspan)
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {subsubspan}
+    assert active_spans.get(thread_id) is subsubspan
     subsubspan2 = t.start_span("subsubtrace2", child_of=subspan)
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {subsubspan, subsubspan2}
+    assert active_spans.get(thread_id) is subsubspan2
     # ⚠ subspan is not supposed to finish before its children, but the API authorizes it
-    # In that case, we would return also the root span as it's becoming a parent without children 🤷
+    # The last span started by the thread stays active
     subspan.finish()
-    assert c._thread_span_links.get_active_leaf_spans_from_thread_id(thread_id) == {root, subsubspan, subsubspan2}
+    assert active_spans.get(thread_id) is subsubspan2
+    subsubspan2.finish()
+    # Its parent is finished: the thread has no active span anymore
+    assert active_spans.get(thread_id) is None
+
+
+def test_thread_to_span_stopped(tracer):
+    c = stack.StackCollector(recorder.Recorder(), tracer=tracer)
+    c.start()
+    c.stop()
+    root = tracer.start_span("root")
+    assert active_spans.get(_nogevent.thread_get_ident()) is None
+    root.finish()
 
 
 def test_collect_span_ids(tracer_and_collector):
@@ -484,3 +501,109 @@ def test_thread_time_cache():
         assert set(tt._get_last_thread_time().keys()) == set(
             (pthread_id, _threading.get_thread_native_id(pthread_id)) for pthread_id in threads
         )
+
+
+def _spin(duration):
+    end = time.time() + duration
+    while time.time() < end:
+        pass
+
+
+@pytest.mark.skipif(not stack.FEATURES["cpu-timer"], reason="CPU timer not supported")
+def test_cpu_timer_collect():
+    r = recorder.Recorder()
+    c = stack.CPUTimerStackCollector(r, cpu_timer_interval=0.001)
+    refcount = sys.getrefcount(_spin.__code__)
+    c.start()
+    try:
+        _spin(0.5)
+    finally:
+        c.stop()
+        c.join()
+    _cputimer.drain()
+    gc.collect()
+    # The references taken by the signal handler are all released
+    # DEV: not computed in the assert statement, where pytest would hold a reference on the code object
+    new_refcount = sys.getrefcount(_spin.__code__)
+    assert new_refcount == refcount
+
+    main_thread_id = _nogevent.main_thread_id
+    cpu_events = [e for e in r.events[stack.StackSampleEvent] if e.cpu_time_ns]
+    assert cpu_events
+    spin_events = [e for e in cpu_events if e.thread_id == main_thread_id and e.frames[0][2] == "_spin"]
+    assert spin_events
+    assert all(e.thread_name == "MainThread" for e in spin_events)
+
+
+def test_cpu_timer_frame_owned():
+    code = _spin.__code__
+    assert stack._cpu_timer_frame(code, id(code), 0, 42) == (__file__, 42, "_spin")
+
+
+def _cached_code(lineno):
+    code = compile("\n" * (lineno - 1) + "import sys\nframe = sys._getframe()", "<generated>", "exec")
+    namespace = {}
+    exec(code, namespace)
+    frame = namespace.pop("frame")
+    _traceback.pyframe_to_frames(frame, 1)
+    return code, frame.f_lasti
+
+
+def test_cpu_timer_frame_stale_address():
+    code, lasti = _cached_code(1)
+    address = id(code)
+    assert stack._cpu_timer_frame(None, address, lasti, 2) == ("<generated>", 2, "<module>")
+
+    # The code object is freed: its address is unknown
+    del code
+    gc.collect()
+    assert stack._cpu_timer_frame(None, address, lasti, 2) == stack._UNKNOWN_FRAME
+
+    # The address is reused by another code object
+    for _ in range(1000):
+        other, other_lasti = _cached_code(10)
+        if id(other) == address and other_lasti == lasti:
+            break
+    else:
+        pytest.skip("The address of the code object has not been reused")
+    assert stack._cpu_timer_frame(None, address, lasti, 11) == ("<generated>", 11, "<module>")
+    assert stack._cpu_timer_frame(None, address, lasti, 2) == stack._UNKNOWN_FRAME
+
+
+def test_cpu_timer_events_span(tracer):
+    c = stack.CPUTimerStackCollector(recorder.Recorder(), tracer=tracer, cpu_timer_interval=0.01)
+    thread_id = _nogevent.thread_get_ident()
+    code = _spin.__code__
+    frames = [(code, id(code), 0, code.co_firstlineno)]
+    active_spans.enable(_nogevent.thread_get_ident)
+    try:
+        with tracer.trace("root") as root:
+            before, during = c._cpu_timer_events(
+                [(thread_id, root.start_ns - 1, 1, frames), (thread_id, root.start_ns + 1, 1, frames)], 0
+            )
+    finally:
+        active_spans.disable()
+    # The span was not active yet when the first sample was taken
+    assert before.timestamp == root.start_ns - 1
+    assert before.span_ids == set()
+    assert during.span_ids == {root.span_id}
+    assert during.trace_ids == {root.trace_id}
+
+
+def test_cpu_timer_events_dropped():
+    c = stack.CPUTimerStackCollector(recorder.Recorder(), cpu_timer_interval=0.01)
+    code = _spin.__code__
+    sample = (_nogevent.thread_get_ident(), 1, 1, [(code, id(code), 0, code.co_firstlineno)])
+    assert c._cpu_timer_events([], 3) == []
+    events = c._cpu_timer_events([sample, sample], 6)
+    # The dropped samples are accounted for by the ones that were kept
+    assert [e.cpu_time_ns for e in events] == [40000000, 40000000]
+    assert [e.sampling_period for e in events] == [10000000, 10000000]
+
+
+@pytest.mark.skipif(stack.FEATURES["cpu-timer"], reason="CPU timer supported")
+def test_cpu_timer_unavailable():
+    r = recorder.Recorder()
+    c = stack.CPUTimerStackCollector(r)
+    with pytest.raises(RuntimeError):
+        c.start()
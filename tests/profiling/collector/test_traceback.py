@@ -22,3 +22,62 @@ def test_check_traceback_to_frames():
             "test_check_traceback_to_frames",
         ),
     ]
+
+
+def _is_code_cached(code_id):
+    # Only the code objects known by the frame cache can be resolved from their address
+    return _traceback.code_address_to_frame(code_id, 0) is not None
+
+
+def _frames():
+    return _traceback.pyframe_to_frames(sys._getframe(), 10)[0]
+
+
+def test_pyframe_to_frames_cache():
+    frames1, frames2 = [_frames() for _ in range(2)]
+    assert frames1 == frames2
+    # The same frame tuples are reused
+    assert all(f1 is f2 for f1, f2 in zip(frames1, frames2))
+    assert frames1[0] == (__file__, 33, "_frames")
+
+
+def test_pyframe_to_frames_cache_evicted():
+    code = compile("import sys\nframe = sys._getframe()", "<generated>", "exec")
+    namespace = {}
+    exec(code, namespace)
+    frames, nframes = _traceback.pyframe_to_frames(namespace.pop("frame"), 1)
+    assert frames == [("<generated>", 2, "<module>")]
+    code_id = id(code)
+    assert _is_code_cached(code_id)
+    del code
+    assert not _is_code_cached(code_id)
+
+
+def test_code_address_to_frame():
+    frames = _frames()
+    code = _frames.__code__
+    assert _traceback.code_address_to_frame(id(code), 0) == frames[0] == (__file__, 33, "_frames")
+    unknown = compile("pass", "<generated>", "exec")
+    assert _traceback.code_address_to_frame(id(unknown), 0) is None
+
+
+def _cached_code(filename):
+    code = compile("import sys\nframe = sys._getframe()", filename, "exec")
+    namespace = {}
+    exec(code, namespace)
+    _traceback.pyframe_to_frames(namespace.pop("frame"), 1)
+    return code
+
+
+def test_frames_cache_bounded():
+    code = _cached_code("<generated>")
+    assert _is_code_cached(id(code))
+
+    # Fill the cache with the instructions of a code object cached after
+    filler = _cached_code("<filler>")
+    for lasti in range(70000):
+        assert _traceback.code_address_to_frame(id(filler), lasti) is not None
+
+    # The code object cached first has been evicted even though it is still alive
+    assert not _is_code_cached(id(code))
+    assert _is_code_cached(id(filler))
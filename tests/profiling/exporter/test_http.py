@@ -167,6 +167,16 @@ def test_export(endpoint_test_server):
     exp.export(test_pprof.TEST_EVENTS, 0, compat.time_ns())
 
 
+def test_export_reuse_client(endpoint_test_server):
+    exp = http.PprofHTTPExporter(_ENDPOINT, _API_KEY)
+    exp.export(test_pprof.TEST_EVENTS, 0, compat.time_ns())
+    client = exp._client
+    assert client is not None
+    # The test server closes the connection after each request: it is reopened transparently
+    exp.export(test_pprof.TEST_EVENTS, 0, compat.time_ns())
+    assert exp._client is client
+
+
 def test_export_server_down():
     exp = http.PprofHTTPExporter("http://localhost:2", _API_KEY, max_retry_delay=2)
     with pytest.raises(http.UploadFailed) as t:
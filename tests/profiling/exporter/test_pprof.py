@@ -10,11 +10,13 @@ import mock
 
 import pytest
 
+from ddtrace.profiling import recorder
 from ddtrace.profiling.collector import memalloc
 from ddtrace.profiling.collector import memory
 from ddtrace.profiling.collector import stack
 from ddtrace.profiling.collector import threading
 from ddtrace.profiling.exporter import pprof
+from ddtrace.vendor import attr
 from ddtrace.vendor import six
 
 
@@ -594,12 +596,94 @@ def test_ppprof_exporter():
         assert f.read() == str(exports), filename
 
 
+def test_pprof_exporter_aggregated_stack_events():
+    exp = pprof.PprofExporter()
+    exp._get_program_name = mock.Mock()
+    exp._get_program_name.return_value = "bonjour"
+    r = recorder.Recorder()
+    stack_events = TEST_EVENTS[stack.StackSampleEvent] * 2
+    r.push_events([attr.evolve(e) for e in stack_events])
+    events = r.reset()
+    assert len(events[stack.StackSampleEvent]) < len(stack_events)
+    assert exp.export(events, 1, 7) == exp.export({stack.StackSampleEvent: stack_events}, 1, 7)
+
+
+@pytest.mark.skipif(memalloc._memalloc is None, reason="_memalloc not available")
+def test_pprof_exporter_heap():
+    exp = pprof.PprofExporter()
+
+    def _heap_event(timestamp, size, function):
+        return memalloc.MemoryHeapSampleEvent(
+            timestamp=timestamp,
+            thread_id=67892304,
+            thread_native_id=123987,
+            thread_name="MainThread",
+            frames=[("foobar.py", 23, function)],
+            nframes=1,
+            size=size,
+            sample_size=512,
+        )
+
+    export = exp.export(
+        {
+            memalloc.MemoryHeapSampleEvent: [
+                # Older snapshot, not exported
+                _heap_event(1, 100000, "func1"),
+                _heap_event(2, 1024, "func2"),
+                _heap_event(2, 1024, "func2"),
+                _heap_event(2, 16, "func3"),
+            ],
+        },
+        1,
+        7,
+    )
+    heap_space_index = [export.string_table[st.type] for st in export.sample_type].index("heap-space")
+    heap_space = {
+        export.string_table[export.function[export.location[s.location_id[0] - 1].line[0].function_id - 1].name]: (
+            s.value[heap_space_index]
+        )
+        for s in export.sample
+    }
+    assert heap_space == {"func2": 2048, "func3": 512}
+
+
 def test_pprof_exporter_empty():
     exp = pprof.PprofExporter()
     export = exp.export({}, 0, 1)
     assert len(export.sample) == 0
 
 
+@pytest.mark.parametrize("events", [TEST_EVENTS, {}])
+def test_pprof_exporter_write_profile(events):
+    exp = pprof.PprofExporter()
+    exp._get_program_name = mock.Mock()
+    exp._get_program_name.return_value = "bonjour"
+    s = six.BytesIO()
+    exp.write_profile(s, events, 1, 7)
+    assert s.getvalue() == exp.export(events, 1, 7).SerializeToString()
+
+
+def test_pprof_exporter_write_profile_large():
+    exp = pprof.PprofExporter()
+    events = {
+        stack.StackSampleEvent: [
+            stack.StackSampleEvent(
+                thread_id=i,
+                thread_name="thread-%d" % i,
+                frames=[("file%d.py" % i, i, "func%d" % i), ("foobar.py", 2 ** 40, "func")],
+                nframes=3,
+                wall_time_ns=2 ** 62,
+                cpu_time_ns=i,
+                sampling_period=1000000,
+            )
+            for i in range(5000)
+        ]
+    }
+    s = six.BytesIO()
+    exp.write_profile(s, events, 1, 7)
+    assert s.getvalue() == exp.export(events, 1, 7).SerializeToString()
+
+
 @pytest.mark.skipif(tracemalloc is None, reason="tracemalloc is unavailable")
 def test_ppprof_memory_exporter():
     if sys.version_info.major <= 3 and sys.version_info.minor < 6:
@@ -684,6 +768,10 @@ sample_type {
   type: 16
   unit: 17
 }
+sample_type {
+  type: 18
+  unit: 17
+}
 sample {
   location_id: 1
   value: 0
@@ -696,6 +784,7 @@ sample {
   value: 0
   value: 100
   value: 169380
+  value: 0
 }
 sample {
   location_id: 2
@@ -709,10 +798,11 @@ sample {
   value: 0
   value: 40
   value: 1920
+  value: 0
 }
 mapping {
   id: 1
-  filename: 19
+  filename: 20
 }
 location {
   id: 1
@@ -755,12 +845,13 @@ string_table: "lock-release-hold"
 string_table: "alloc-samples"
 string_table: "alloc-space"
 string_table: "bytes"
+string_table: "heap-space"
 string_table: "time"
 string_table: "bonjour"
 time_nanos: 1
 duration_nanos: 1
 period_type {
-  type: 18
+  type: 19
   unit: 8
 }
 """ == str(
@@ -0,0 +1,105 @@
+# -*- encoding: utf-8 -*-
+import pytest
+
+from ddtrace.profiling import _buffer
+from ddtrace.profiling import event
+from ddtrace.profiling import recorder
+
+
+def test_ring_buffer():
+    b = _buffer.RingBuffer(3)
+    assert b.maxlen == 3
+    assert len(b) == 0
+    assert not b
+    assert list(b) == []
+    b.extend([1, 2])
+    assert len(b) == 2
+    assert list(b) == [1, 2]
+    b.append(3)
+    assert list(b) == [1, 2, 3]
+    b.extend((4, 5))
+    assert len(b) == 3
+    assert list(b) == [3, 4, 5]
+    assert b[0] == 3
+    assert b[-1] == 5
+    with pytest.raises(IndexError):
+        b[3]
+    with pytest.raises(IndexError):
+        b[-4]
+
+
+def test_ring_buffer_pop():
+    b = _buffer.RingBuffer(2)
+    b.extend([1, 2, 3])
+    assert b.pop() == 3
+    assert b.pop() == 2
+    with pytest.raises(IndexError):
+        b.pop()
+    b.append(4)
+    assert list(b) == [4]
+
+
+def test_ring_buffer_clear():
+    b = _buffer.RingBuffer(2)
+    b.extend([1, 2, 3])
+    b.clear()
+    assert len(b) == 0
+    b.append(4)
+    assert list(b) == [4]
+
+
+def test_ring_buffer_iter_snapshot():
+    b = _buffer.RingBuffer(4)
+    b.extend([1, 2])
+    it = iter(b)
+    b.extend([3, 4, 5])
+    assert list(it) == [1, 2]
+
+
+def test_ring_buffer_zero():
+    b = _buffer.RingBuffer(0)
+    b.extend([1, 2])
+    assert len(b) == 0
+    assert list(b) == []
+
+
+def test_ring_buffer_lazy():
+    tracemalloc = pytest.importorskip("tracemalloc")
+    tracemalloc.start()
+    try:
+        b = _buffer.RingBuffer(1000000)
+        # Ignore the memory allocated by other threads
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, __file__)])
+    finally:
+        tracemalloc.stop()
+    # The slots are only allocated once events are pushed
+    assert sum(stat.size for stat in snapshot.statistics("filename")) < 1000000
+    b.extend([1, 2, 3])
+    assert b.pop() == 3
+    b.append(4)
+    assert list(b) == [1, 2, 4]
+
+
+def test_ring_buffer_clear_wrapped():
+    b = _buffer.RingBuffer(3)
+    b.extend(range(5))
+    b.clear()
+    b.extend([5, 6])
+    assert list(b) == [5, 6]
+    b.extend([7, 8])
+    assert list(b) == [6, 7, 8]
+    assert b[0] == 6
+
+
+def test_ring_buffer_negative():
+    with pytest.raises(ValueError):
+        _buffer.RingBuffer(-1)
+
+
+def test_push_events():
+    r = recorder.Recorder()
+    # No buffer yet
+    assert not _buffer.push_events(r, [event.Event()])
+    assert len(r.events[event.Event]) == 0
+    assert _buffer.push_events(r, [event.Event()])
+    assert len(r.events[event.Event]) == 1
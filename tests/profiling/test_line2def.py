@@ -1,5 +1,7 @@
 import os
+import py_compile
 
+import mock
 import pytest
 
 from ddtrace.vendor import six
@@ -76,3 +78,50 @@ def test_empty_filename_to_def():
 def test_bracket_filename_to_def():
     assert _line2def.filename_and_lineno_to_def("<input>", 2) == "<input>:2"
     assert _line2def.filename_and_lineno_to_def("<>", 2) == "<>:2"
+
+
+def test_filename_and_lineno_to_def_loaded_module():
+    from . import _test_line2def_2
+
+    filename = _test_line2def_2.__file__
+    if filename.endswith(".pyc"):
+        filename = filename[:-1]
+    with mock.patch("ddtrace.profiling._line2def._ast_intervals", side_effect=AssertionError("source parsed")):
+        assert _line2def.filename_and_lineno_to_def(filename, 6) == "wrapper"
+        assert _line2def.filename_and_lineno_to_def(filename, 10) == "decorator"
+        assert _line2def.filename_and_lineno_to_def(filename, 14) == "x"
+        assert _line2def.filename_and_lineno_to_def(filename, 16) == "inner"
+        assert _line2def.filename_and_lineno_to_def(filename, 19) == "A"
+        assert _line2def.filename_and_lineno_to_def(filename, 22) == "y"
+        assert _line2def.filename_and_lineno_to_def(filename, 26) == "z"
+        assert _line2def.filename_and_lineno_to_def(filename, 31) == "f"
+        # The source is not parsed for the lines that are not in any function either
+        assert _line2def.filename_and_lineno_to_def(filename, 1).endswith("/_test_line2def_2.py:1")
+
+
+@pytest.mark.skipif(six.PY2, reason="Modules have no bytecode cache path on Python 2")
+def test_filename_and_lineno_to_def_unreachable_function():
+    from . import _test_line2def_3
+
+    filename = _test_line2def_3.__file__
+    if filename.endswith(".pyc"):
+        filename = filename[:-1]
+    # The code of the module is only read from its bytecode cache
+    py_compile.compile(filename, cfile=_test_line2def_3.__cached__)
+    with mock.patch("ddtrace.profiling._line2def._ast_intervals", side_effect=AssertionError("source parsed")):
+        assert _line2def.filename_and_lineno_to_def(filename, 15) == "visible"
+        # The decorator does not return the function: it is resolved from the code of the module
+        assert _line2def.filename_and_lineno_to_def(filename, 11) == "hidden"
+        assert _line2def.filename_and_lineno_to_def(filename, 2).endswith("/_test_line2def_3.py:2")
+
+
+def test_filename_and_lineno_to_def_module_without_code():
+    from . import _test_line2def_3
+
+    filename = _test_line2def_3.__file__
+    if filename.endswith(".pyc"):
+        filename = filename[:-1]
+    # Without the code of the module, the functions reachable from it are resolved
+    with mock.patch("ddtrace.profiling._line2def._module_code", return_value=None):
+        assert _line2def.file_to_tree.__wrapped__(filename)[15].pop().data == "visible"
+        assert not _line2def.file_to_tree.__wrapped__(filename)[11]
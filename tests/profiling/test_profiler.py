@@ -195,3 +195,12 @@ def test_copy():
     assert p.version == c.version
     assert p.service == c.service
     assert p.tracer == c.tracer
+
+
+@pytest.mark.skipif(not stack.FEATURES["cpu-timer"], reason="CPU timer not supported")
+def test_cpu_timer(monkeypatch):
+    monkeypatch.setenv("DD_PROFILING_CPU_TIMER", "true")
+    p = profiler.Profiler()
+    assert isinstance(p._profiler._collectors[0], stack.CPUTimerStackCollector)
+    p.start()
+    p.stop(flush=False)
@@ -1,4 +1,5 @@
 # -*- encoding: utf-8 -*-
+from ddtrace.profiling import _buffer
 from ddtrace.profiling import event
 from ddtrace.profiling import recorder
 from ddtrace.profiling.collector import stack
@@ -49,3 +50,55 @@ def test_limit():
     )
     assert r.events[stack.StackExceptionSampleEvent].maxlen == 12
     assert r.events[stack.StackSampleEvent].maxlen == 24
+
+
+def _stack_sample_event(**kwargs):
+    return stack.StackSampleEvent(
+        thread_id=1,
+        thread_name="MainThread",
+        frames=[("foobar.py", 23, "func1")],
+        nframes=1,
+        sampling_period=1000,
+        **kwargs
+    )
+
+
+def test_aggregated_events():
+    r = recorder.Recorder()
+    r.push_events(
+        [
+            _stack_sample_event(wall_time_ns=10, cpu_time_ns=1, trace_ids={2, 1}, span_ids={3}),
+            _stack_sample_event(wall_time_ns=20, cpu_time_ns=2, trace_ids={1}, span_ids={3}),
+            _stack_sample_event(wall_time_ns=40, cpu_time_ns=4),
+        ]
+    )
+    events = r.reset()[stack.StackSampleEvent]
+    assert len(events) == 2
+    with_span, without_span = sorted(events, key=lambda e: e.nsamples, reverse=True)
+    assert with_span.nsamples == 2
+    assert with_span.wall_time_ns == 30
+    assert with_span.cpu_time_ns == 3
+    assert with_span.sampling_period == 1000
+    assert without_span.nsamples == 1
+    assert without_span.wall_time_ns == 40
+
+
+def test_aggregated_events_limit():
+    r = recorder.Recorder(max_events={stack.StackSampleEvent: 1})
+    r.push_events(
+        [_stack_sample_event(thread_native_id=i) for i in range(3)] + [_stack_sample_event(thread_native_id=0)]
+    )
+    events = r.events[stack.StackSampleEvent]
+    assert len(events) == 1
+    assert events.pop().nsamples == 2
+    with pytest.raises(IndexError):
+        events.pop()
+
+
+def test_ring_buffer_limit():
+    r = recorder.Recorder(default_max_events=2)
+    events = [event.Event() for _ in range(3)]
+    r.push_event(events[0])
+    r.push_events(events[1:])
+    assert isinstance(r.events[event.Event], _buffer.RingBuffer)
+    assert list(r.reset()[event.Event]) == events[1:]
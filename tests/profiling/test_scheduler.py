@@ -1,4 +1,7 @@
 # -*- encoding: utf-8 -*-
+import threading
+import time
+
 from ddtrace.profiling import event
 from ddtrace.profiling import exporter
 from ddtrace.profiling import recorder
@@ -26,3 +29,59 @@ def test_thread_name():
     s.start()
     assert s._worker.name == "ddtrace.profiling.scheduler:Scheduler"
     s.stop()
+
+
+class _ThreadExporter(exporter.Exporter):
+    def __init__(self):
+        self.threads = []
+
+    def export(self, events, start_time_ns, end_time_ns):
+        self.threads.append(threading.current_thread().name)
+
+
+def test_export_worker():
+    r = recorder.Recorder()
+    exp = _ThreadExporter()
+    s = scheduler.Scheduler(r, [exp])
+    s.start()
+    assert s._export_worker.name == "ddtrace.profiling.scheduler:Scheduler:export"
+    s.flush()
+    s.stop()
+    s.join()
+    assert exp.threads == ["ddtrace.profiling.scheduler:Scheduler:export"] * 2
+    assert not s._export_worker.is_alive()
+
+
+class _SlowExporter(exporter.Exporter):
+    def __init__(self):
+        self.unblock = threading.Event()
+        self.exported = []
+
+    def export(self, events, start_time_ns, end_time_ns):
+        self.unblock.wait()
+        self.exported.append(len(events[event.Event]))
+
+
+def test_export_bounded_pending():
+    r = recorder.Recorder()
+    exp = _SlowExporter()
+    s = scheduler.Scheduler(r, [exp], max_pending_exports=2)
+    s.start()
+    try:
+        for i in range(1, 6):
+            r.push_events([event.Event()] * i)
+            s.flush()
+            if i == 1:
+                # Wait for the worker to be blocked on the first profile
+                while not s._export_queue.empty():
+                    time.sleep(0.01)
+        assert s._export_queue.qsize() == 2
+        exp.unblock.set()
+        while not s._export_queue.empty():
+            time.sleep(0.01)
+    finally:
+        exp.unblock.set()
+        s.stop()
+        s.join()
+    # The 2nd and 3rd profiles are dropped, an empty profile is flushed on shutdown
+    assert exp.exported == [1, 4, 5, 0]
@@ -0,0 +1,133 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from ddtrace.internal.runtime.constants import (
+    ASYNCIO_LOOP_LAG,
+    ASYNCIO_PENDING_TASKS,
+    ASYNCIO_RUNTIME_METRICS,
+    ASYNCIO_SLOW_CALLBACKS,
+    ASYNCIO_SLOW_CALLBACK_DURATION,
+    SPAN_ASYNCIO_LOOP_LAG,
+    SPAN_ASYNCIO_SLOW_CALLBACK,
+    SPAN_ASYNCIO_SLOW_CALLBACK_DURATION,
+)
+from ddtrace.internal.runtime.metric_collectors import AsyncioRuntimeMetricCollector
+from tests import DummyTracer
+from tests import override_env
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    try:
+        yield loop
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def collector():
+    with override_env(dict(DD_RUNTIME_METRICS_ASYNCIO_SLOW_CALLBACK_THRESHOLD="0.02")):
+        collector = AsyncioRuntimeMetricCollector(enabled=True)
+    try:
+        yield collector
+    finally:
+        collector.close()
+
+
+def test_disabled_by_default():
+    run = asyncio.Handle._run
+    collector = AsyncioRuntimeMetricCollector()
+    assert not collector.enabled
+    assert collector.collect() == []
+    assert asyncio.Handle._run is run
+
+
+def test_enabled_with_env():
+    run = asyncio.Handle._run
+    with override_env(dict(DD_RUNTIME_METRICS_ASYNCIO_ENABLED="true")):
+        collector = AsyncioRuntimeMetricCollector()
+    try:
+        assert collector.enabled
+        assert collector.slow_callback_threshold == 0.1
+        assert asyncio.Handle._run is not run
+    finally:
+        collector.close()
+    assert asyncio.Handle._run is run
+
+
+def test_single_patch():
+    run = asyncio.Handle._run
+    first = AsyncioRuntimeMetricCollector(enabled=True)
+    second = AsyncioRuntimeMetricCollector(enabled=True)
+    try:
+        assert first.collect() == []
+        assert set(dict(second.collect())) == ASYNCIO_RUNTIME_METRICS
+    finally:
+        second.close()
+        first.close()
+    assert asyncio.Handle._run is run
+
+
+def test_loop_lag(collector, loop):
+    done = loop.create_future()
+    loop.call_later(0.01, done.set_result, None)
+    # Block the loop past the timer
+    loop.call_soon(time.sleep, 0.05)
+    loop.run_until_complete(done)
+
+    metrics = dict(collector.collect())
+    assert max(metrics[ASYNCIO_LOOP_LAG]) >= 0.03
+    assert metrics[ASYNCIO_SLOW_CALLBACKS] == 1
+    assert len(metrics[ASYNCIO_SLOW_CALLBACK_DURATION]) == 1
+    assert metrics[ASYNCIO_SLOW_CALLBACK_DURATION][0] >= 0.05
+
+    # The metrics are reset by each collection
+    metrics = dict(collector.collect())
+    assert metrics[ASYNCIO_SLOW_CALLBACKS] == 0
+    assert metrics[ASYNCIO_SLOW_CALLBACK_DURATION] == []
+
+
+def test_pending_tasks(collector, loop):
+    async def main():
+        event = asyncio.Event()
+        tasks = [loop.create_task(event.wait()) for _ in range(5)]
+        # Let the probe run
+        await asyncio.sleep(collector.PROBE_INTERVAL * 1.5)
+        metrics = dict(collector.collect())
+        event.set()
+        await asyncio.gather(*tasks)
+        return metrics
+
+    metrics = loop.run_until_complete(main())
+    # The 5 tasks and the main one
+    assert metrics[ASYNCIO_PENDING_TASKS] == 6
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="asyncio handles have a context since Python 3.7")
+def test_span(collector, loop):
+    tracer = DummyTracer()
+
+    async def handler():
+        with tracer.trace("request") as root:
+            with tracer.trace("child"):
+                time.sleep(0.1)
+                await asyncio.sleep(0)
+                # Block the loop while a timer of this trace is due
+                loop.call_soon(time.sleep, 0.05)
+                await asyncio.sleep(0.01)
+        return root
+
+    root = loop.run_until_complete(handler())
+    assert root.get_metric(SPAN_ASYNCIO_SLOW_CALLBACK_DURATION) >= 0.1
+    assert root.get_tag(SPAN_ASYNCIO_SLOW_CALLBACK) == "%s:%d:handler" % (__file__, handler.__code__.co_firstlineno)
+    assert root.get_metric(SPAN_ASYNCIO_LOOP_LAG) >= 0.03
+
+
+def test_no_span(collector, loop):
+    loop.call_soon(time.sleep, 0.05)
+    loop.run_until_complete(asyncio.sleep(0))
+    assert dict(collector.collect())[ASYNCIO_SLOW_CALLBACKS] == 1
@@ -1,8 +1,11 @@
+import os
+
 import mock
 
 import pytest
 
 from ddtrace.compat import PY2
+from ddtrace.internal.runtime import container
 from ddtrace.internal.runtime.container import CGroupInfo, get_container_info
 
 from .utils import cgroup_line_valid_test_cases
@@ -123,6 +126,58 @@ def test_cgroup_info_init():
             "13:/docker/3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860",
             None,
         ),
+        # Valid, cgroup v2 with systemd docker scope
+        (
+            "0::/system.slice/docker-3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860.scope",
+            CGroupInfo(
+                id="0",
+                groups="",
+                controllers=[],
+                path="/system.slice/docker-3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860.scope",
+                container_id="3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860",
+                pod_id=None,
+            ),
+        ),
+        # Valid, cgroup v2 with systemd kubernetes slices
+        (
+            "0::/kubepods.slice/kubepods-burstable.slice"
+            "/kubepods-burstable-pod2d3da189_6407_48e3_9ab6_78188d75e609.slice"
+            "/cri-containerd-7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199.scope",
+            CGroupInfo(
+                id="0",
+                groups="",
+                controllers=[],
+                path="/kubepods.slice/kubepods-burstable.slice"
+                "/kubepods-burstable-pod2d3da189_6407_48e3_9ab6_78188d75e609.slice"
+                "/cri-containerd-7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199.scope",
+                container_id="7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199",
+                pod_id="2d3da189-6407-48e3-9ab6-78188d75e609",
+            ),
+        ),
+        # Invalid container id, the prefix is not separated from the id
+        (
+            "0::/system.slice/docker3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860.scope",
+            CGroupInfo(
+                id="0",
+                groups="",
+                controllers=[],
+                path="/system.slice/docker3726184226f5d3147c25fdeab5b60097e378e8a720503a5e19ecfdf29f869860.scope",
+                container_id=None,
+                pod_id=None,
+            ),
+        ),
+        # Valid, cgroup v2 without container
+        (
+            "0::/",
+            CGroupInfo(
+                id="0",
+                groups="",
+                controllers=[],
+                path="/",
+                container_id=None,
+                pod_id=None,
+            ),
+        ),
         # Empty line
         (
             "",
@@ -228,6 +283,13 @@ def test_cgroup_info_from_line(line, expected_info):
             """,
             None,
         ),
+        # cgroup v2 file
+        (
+            """
+0::/kubepods.slice/kubepods-besteffort.slice/kubepods-besteffort-pod2d3da189_6407_48e3_9ab6_78188d75e609.slice/crio-7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199.scope
+            """,
+            "7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199",
+        ),
         # Empty file
         (
             "",
@@ -289,3 +351,60 @@ def test_get_container_info_exception(mock_log, mock_from_line):
 
         # Ensure we logged the exception
         mock_log.debug.assert_called_once_with("Failed to parse cgroup file for pid %r", "self", exc_info=True)
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "/kubepods/burstable/pod2d3da189-6407-48e3-9ab6-78188d75e609/{0}",
+        "/kubepods.slice/kubepods-burstable.slice/kubepods-burstable-pod2d3da189_6407_48e3_9ab6_78188d75e609.slice"
+        "/cri-containerd-{0}.scope",
+    ),
+)
+def test_cgroup_info_pod_id(path):
+    container_id = "7b8952daecf4c0e44bbcefe1b5c5ebc7b4839d4eefeccefe694709d3809b6199"
+    info = CGroupInfo.from_line("0::" + path.format(container_id))
+    assert info.container_id == container_id
+    assert info.pod_id == "2d3da189-6407-48e3-9ab6-78188d75e609"
+
+
+@pytest.fixture
+def uncached_container_info():
+    container._container_info = container._UNKNOWN
+    try:
+        yield
+    finally:
+        container._container_info = container._UNKNOWN
+
+
+def test_get_cached_container_info(uncached_container_info):
+    with get_mock_open(read_data="13:name=systemd:/docker/" + "a" * 64) as mock_open:
+        info = container.get_cached_container_info()
+        assert info.container_id == "a" * 64
+        assert container.get_cached_container_info() is info
+        mock_open.assert_called_once_with("/proc/self/cgroup", mode="r")
+
+    with get_mock_open(read_data="13:name=systemd:/docker/" + "b" * 64) as mock_open:
+        assert container.get_cached_container_info() is info
+        assert container.refresh_container_info().container_id == "b" * 64
+        assert container.get_cached_container_info().container_id == "b" * 64
+        mock_open.assert_called_once_with("/proc/self/cgroup", mode="r")
+
+
+def test_get_cached_container_info_not_found(uncached_container_info):
+    with get_mock_open(read_data="0::/") as mock_open:
+        assert container.get_cached_container_info() is None
+        assert container.get_cached_container_info() is None
+        mock_open.assert_called_once_with("/proc/self/cgroup", mode="r")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not available")
+def test_get_cached_container_info_fork(uncached_container_info):
+    with get_mock_open(read_data="13:name=systemd:/docker/" + "a" * 64) as mock_open:
+        info = container.get_cached_container_info()
+        pid = os.fork()
+        if pid == 0:
+            # The child process inherits the container info without parsing the cgroup file again
+            os._exit(0 if container.get_cached_container_info() is info and mock_open.call_count == 1 else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
@@ -1,15 +1,42 @@
+import gc
+import os
+import sys
+import threading
+
+import mock
+import pytest
+
+from ddtrace.internal import active_spans
+from ddtrace.internal import gc_timer
 from ddtrace.internal.runtime.metric_collectors import (
     RuntimeMetricCollector,
     GCRuntimeMetricCollector,
+    ProcRuntimeMetricCollector,
     PSUtilRuntimeMetricCollector,
 )
 
 from ddtrace.internal.runtime.constants import (
+    CPU_PERCENT,
+    CPU_SCHED_WAIT_TIME,
+    CPU_TIME_USER,
+    CTX_SWITCH_VOLUNTARY,
+    FD_COUNT,
+    GC_ALLOCATION_RATE,
+    GC_CALLBACKS_RUNTIME_METRICS,
+    GC_COLLECTED,
     GC_COUNT_GEN0,
+    GC_PAUSE_GEN2,
+    GC_PAUSE_TIME,
     GC_RUNTIME_METRICS,
+    MEM_RSS,
+    PAGE_FAULTS_MINOR,
+    PROC_RUNTIME_METRICS,
     PSUTIL_RUNTIME_METRICS,
+    SPAN_GC_TIME,
+    THREAD_COUNT,
 )
 from tests import BaseTestCase
+from tests import DummyTracer
 
 
 class TestRuntimeMetricCollector(BaseTestCase):
@@ -34,20 +61,225 @@ class TestPSUtilRuntimeMetricCollector(BaseTestCase):
             self.assertIsNotNone(value)
 
 
-class TestGCRuntimeMetricCollector(BaseTestCase):
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc is only available on Linux")
+class TestProcRuntimeMetricCollector(BaseTestCase):
     def test_metrics(self):
+        collector = ProcRuntimeMetricCollector()
+        assert collector.enabled
+        metrics = dict(collector.collect(PROC_RUNTIME_METRICS))
+        assert set(metrics) == PROC_RUNTIME_METRICS
+        for value in metrics.values():
+            assert value is not None
+
+    def test_same_as_psutil(self):
+        proc = dict(ProcRuntimeMetricCollector().collect(PSUTIL_RUNTIME_METRICS))
+        psutil = dict(PSUtilRuntimeMetricCollector().collect(PSUTIL_RUNTIME_METRICS))
+        assert proc[THREAD_COUNT] == psutil[THREAD_COUNT]
+        assert abs(proc[MEM_RSS] - psutil[MEM_RSS]) < 10 * 1024 * 1024
+        assert abs(proc[CPU_TIME_USER] - psutil[CPU_TIME_USER]) < 1
+
+    def test_deltas(self):
+        collector = ProcRuntimeMetricCollector()
+        first = dict(collector.collect())
+        assert first[CPU_PERCENT] == 0.0
+        # Fault some pages in
+        data = bytearray(16 * 1024 * 1024)
+        second = dict(collector.collect())
+        del data
+        assert second[PAGE_FAULTS_MINOR] > 0
+
+    def test_skip_fd_count(self):
+        collector = ProcRuntimeMetricCollector()
+        assert FD_COUNT in dict(collector.collect())
+        with mock.patch("os.listdir") as listdir:
+            assert FD_COUNT not in dict(collector.collect([THREAD_COUNT]))
+        listdir.assert_not_called()
+
+    def test_command_name_with_parentheses(self):
+        collector = ProcRuntimeMetricCollector()
+        stat = b"42 (a) b (c) S 1 42 42 0 -1 4194560 100 0 3 0 250 50 0 0 20 0 7 0 1 1 1000 " + b" ".join([b"0"] * 28)
+        with mock.patch.object(collector, "_read", return_value=stat):
+            with mock.patch("resource.getrusage", return_value=mock.Mock(ru_nvcsw=12, ru_nivcsw=34)):
+                metrics = dict(collector.collect())
+        assert metrics[THREAD_COUNT] == 7
+        assert metrics[MEM_RSS] == 1000 * os.sysconf("SC_PAGE_SIZE")
+        assert metrics[PAGE_FAULTS_MINOR] == 100
+        assert metrics[CTX_SWITCH_VOLUNTARY] == 12
+        assert metrics[CPU_TIME_USER] == 250 / float(os.sysconf("SC_CLK_TCK"))
+
+    def test_all_threads(self):
+        collector = ProcRuntimeMetricCollector()
+        if collector._task_path is None:
+            pytest.skip("scheduler statistics are not available")
+        collector.collect()
+        started = threading.Event()
+        stop = threading.Event()
+
+        def _switch():
+            started.set()
+            for _ in range(100):
+                stop.wait(0.001)
+
+        th = threading.Thread(target=_switch)
+        th.start()
+        started.wait()
+        thread_tids = set(os.listdir(collector._task_path))
+        th.join()
+        metrics = dict(collector.collect())
+        # The context switches of the thread are counted even though it exited
+        assert metrics[CTX_SWITCH_VOLUNTARY] >= 100
+        assert metrics[CPU_SCHED_WAIT_TIME] >= 0
+
+        # A thread that exited does not decrease the wait time
+        collector._sched_wait_times.update((tid, 10 ** 18) for tid in thread_tids)
+        assert dict(collector.collect())[CPU_SCHED_WAIT_TIME] == 0
+
+    def test_sched_fds(self):
+        collector = ProcRuntimeMetricCollector()
+        if collector._task_path is None:
+            pytest.skip("scheduler statistics are not available")
+        started = threading.Event()
+        stop = threading.Event()
+
+        def _wait():
+            started.set()
+            stop.wait()
+
+        th = threading.Thread(target=_wait)
+        th.start()
+        started.wait()
+        thread_tids = set(os.listdir(collector._task_path))
+        collector.collect()
+        # The files are opened once and kept open while their thread runs
+        fds = dict(collector._sched_fds)
+        assert set(fds) == thread_tids
+        with mock.patch("os.open") as open_:
+            collector.collect()
+        open_.assert_not_called()
+
+        stop.set()
+        th.join()
+        collector.collect()
+        exited = thread_tids - set(collector._sched_fds)
+        assert len(exited) == 1
+        with pytest.raises(OSError):
+            os.fstat(fds[exited.pop()])
+
+        collector.close()
+        assert collector._sched_fds == {}
+        for fd in fds.values():
+            with pytest.raises(OSError):
+                os.fstat(fd)
+
+    def test_fork(self):
+        collector = ProcRuntimeMetricCollector()
+        parent_metrics = dict(collector.collect())
+        pid = os.fork()
+        if pid == 0:
+            metrics = dict(collector.collect())
+            # The minor page faults of the parent process are not reported as the ones of the child
+            ok = (
+                collector._pid == os.getpid()
+                and metrics[THREAD_COUNT] == 1
+                and metrics[PAGE_FAULTS_MINOR] < parent_metrics[PAGE_FAULTS_MINOR]
+            )
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+
+
+class TestGCRuntimeMetricCollector(BaseTestCase):
+    def _collector(self):
         collector = GCRuntimeMetricCollector()
+        self.addCleanup(collector.close)
+        return collector
+
+    def test_metrics(self):
+        collector = self._collector()
         for (key, value) in collector.collect(GC_RUNTIME_METRICS):
             self.assertIsNotNone(value)
 
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_callbacks_metrics(self):
+        collector = self._collector()
+        # Create a reference cycle
+        a = []
+        a.append(a)
+        del a
+        gc.collect()
+        metrics = dict(collector.collect())
+        assert GC_CALLBACKS_RUNTIME_METRICS <= set(metrics)
+        assert len(metrics[GC_PAUSE_GEN2]) >= 1
+        assert metrics[GC_PAUSE_TIME] >= sum(metrics[GC_PAUSE_GEN2])
+        assert metrics[GC_COLLECTED] >= 1
+
+        # The metrics are reset by each collection
+        metrics = dict(collector.collect())
+        assert metrics[GC_COLLECTED] == 0
+
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_max_pauses(self):
+        collector = self._collector()
+        for _ in range(collector.MAX_PAUSES * 2):
+            gc.collect()
+        metrics = dict(collector.collect())
+        assert len(metrics[GC_PAUSE_GEN2]) == collector.MAX_PAUSES
+
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_allocation_rate(self):
+        collector = self._collector()
+        collector.collect()
+        objects = [[] for _ in range(10000)]
+        metrics = dict(collector.collect())
+        del objects
+        assert metrics[GC_ALLOCATION_RATE] > 0
+
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_span_gc_time(self):
+        self._collector()
+        tracer = DummyTracer()
+        with tracer.trace("root") as root:
+            with tracer.trace("child") as child:
+                gc.collect()
+        assert root.get_metric(SPAN_GC_TIME) > 0
+        assert child.get_metric(SPAN_GC_TIME) is None
+
+        with tracer.trace("other") as other:
+            pass
+        assert other.get_metric(SPAN_GC_TIME) is None
+
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_clear_dead_threads(self):
+        collector = self._collector()
+        tracer = DummyTracer()
+        th = threading.Thread(target=tracer.trace, args=("thread",))
+        th.start()
+        th.join()
+        assert th.ident in active_spans._spans
+        collector.collect()
+        assert th.ident not in active_spans._spans
+
+    @pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+    def test_single_hook(self):
+        first = self._collector()
+        second = self._collector()
+        assert first._on_gc not in gc_timer._callbacks
+        assert gc_timer._callbacks.count(second._on_gc) == 1
+        assert gc.callbacks.count(gc_timer._on_gc) == 1
+        assert GC_PAUSE_TIME not in dict(first.collect())
+        second.close()
+        assert second._on_gc not in gc_timer._callbacks
+        assert gc_timer._on_gc not in gc.callbacks
+
     def test_gen1_changes(self):
         # disable gc
         import gc
 
         gc.disable()
+        self.addCleanup(gc.enable)
 
         # start collector and get current gc counts
-        collector = GCRuntimeMetricCollector()
+        collector = self._collector()
         gc.collect()
         start = gc.get_count()
 
@@ -1,14 +1,25 @@
+import gc
 import time
 
 import mock
 
 from ddtrace.ext import SpanTypes
+from ddtrace.vendor.dogstatsd import DogStatsd
 
 from ddtrace.internal.runtime.runtime_metrics import (
     RuntimeTags,
     RuntimeMetrics,
+    RuntimeWorker,
+)
+from ddtrace.internal.runtime.constants import (
+    ASYNCIO_RUNTIME_METRICS,
+    DEFAULT_RUNTIME_METRICS,
+    GC_CALLBACKS_RUNTIME_METRICS,
+    GC_COUNT_GEN0,
+    HISTOGRAM_RUNTIME_METRICS,
+    SERVICE,
+    ENV,
 )
-from ddtrace.internal.runtime.constants import DEFAULT_RUNTIME_METRICS, GC_COUNT_GEN0, SERVICE, ENV
 
 from tests import TracerTestCase, BaseTestCase
 
@@ -52,16 +63,34 @@ class TestRuntimeTags(TracerTestCase):
 
 
 class TestRuntimeMetrics(BaseTestCase):
+    def _runtime_metrics(self, **kwargs):
+        runtime_metrics = RuntimeMetrics(**kwargs)
+        self.addCleanup(runtime_metrics.close)
+        return runtime_metrics
+
     def test_all_metrics(self):
-        metrics = set([k for (k, v) in RuntimeMetrics()])
-        self.assertSetEqual(metrics, DEFAULT_RUNTIME_METRICS)
+        metrics = set([k for (k, v) in self._runtime_metrics()])
+        # The asyncio metrics are opt-in
+        expected = DEFAULT_RUNTIME_METRICS - ASYNCIO_RUNTIME_METRICS
+        if not hasattr(gc, "callbacks"):
+            expected -= GC_CALLBACKS_RUNTIME_METRICS
+        self.assertSetEqual(metrics, expected)
 
     def test_one_metric(self):
-        metrics = [k for (k, v) in RuntimeMetrics(enabled=[GC_COUNT_GEN0])]
+        metrics = [k for (k, v) in self._runtime_metrics(enabled=[GC_COUNT_GEN0])]
         self.assertEqual(metrics, [GC_COUNT_GEN0])
 
 
 class TestRuntimeWorker(TracerTestCase):
+    def test_dogstatsd_client(self):
+        # The vendored client cannot be flushed: the worker aggregates the metrics itself
+        client = DogStatsd(disable_telemetry=True)
+        client.socket = mock.Mock()
+        worker = RuntimeWorker(client)
+        self.addCleanup(worker._runtime_metrics.close)
+        worker.flush()
+        assert client.socket.send.mock_calls
+
     def test_tracer_metrics(self):
         # Mock socket.socket to hijack the dogstatsd socket
         with mock.patch("socket.socket"):
@@ -89,12 +118,12 @@ class TestRuntimeWorker(TracerTestCase):
         # we expect more than one flush since it is also called on shutdown
         assert len(received) > 1
 
-        # expect all metrics in default set are received
+        # expect all gauges in default set are received, histograms are only sent if there are values
         # DEV: dogstatsd gauges in form "{metric_name}:{metric_value}|g#t{tag_name}:{tag_value},..."
-        assert (
-            DEFAULT_RUNTIME_METRICS & set([gauge.split(":")[0] for packet in received for gauge in packet.split("\n")])
-            == DEFAULT_RUNTIME_METRICS
-        )
+        gauges = DEFAULT_RUNTIME_METRICS - HISTOGRAM_RUNTIME_METRICS - ASYNCIO_RUNTIME_METRICS
+        if not hasattr(gc, "callbacks"):
+            gauges -= GC_CALLBACKS_RUNTIME_METRICS
+        assert gauges & set([gauge.split(":")[0] for packet in received for gauge in packet.split("\n")]) == gauges
 
         # check to last set of metrics returned to confirm tags were set
         for gauge in received[-1:]:
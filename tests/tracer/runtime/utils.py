@@ -53,7 +53,8 @@ def cgroup_line_valid_test_cases():
                 path=path.format(container_id, pod_id),
                 controllers=groups,
                 container_id=container_id if "{0}" in path else None,
-                pod_id=pod_id if "{1}" in path else None,
+                # systemd replaces the dashes of the pod UID by underscores
+                pod_id=pod_id.replace("_", "-") if "{1}" in path else None,
             ),
         )
         for path, id_, groups, container_id, pod_id in itertools.product(
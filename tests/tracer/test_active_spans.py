@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from ddtrace.internal import active_spans
+
+from .test_tracer import get_dummy_tracer
+
+
+@pytest.fixture
+def enabled():
+    active_spans.enable()
+    try:
+        yield
+    finally:
+        active_spans.disable()
+
+
+def test_disabled():
+    tracer = get_dummy_tracer()
+    with tracer.trace("root"):
+        assert active_spans.get(threading.current_thread().ident) is None
+
+
+def test_active_span(enabled):
+    tracer = get_dummy_tracer()
+    thread_id = threading.current_thread().ident
+    with tracer.trace("root") as root:
+        assert active_spans.get(thread_id) is root
+        with tracer.trace("child") as child:
+            assert active_spans.get(thread_id) is child
+        assert active_spans.get(thread_id) is root
+    assert active_spans.get(thread_id) is None
+
+
+def test_span_closed_by_another_thread(enabled):
+    tracer = get_dummy_tracer()
+    thread_id = threading.current_thread().ident
+    root = tracer.trace("root")
+    th = threading.Thread(target=root.finish)
+    th.start()
+    th.join()
+    # The span is finished: it is not active anymore but it did not change the active span of the other thread
+    assert active_spans.get(thread_id) is None
+    assert active_spans._spans[thread_id] is root
+    assert th.ident not in active_spans._spans
+
+
+def test_enable_nested():
+    active_spans.enable()
+    active_spans.enable()
+    active_spans.disable()
+    tracer = get_dummy_tracer()
+    try:
+        with tracer.trace("root") as root:
+            assert active_spans.get(threading.current_thread().ident) is root
+    finally:
+        active_spans.disable()
+    assert active_spans._spans is None
+
+
+def test_clear_threads(enabled):
+    tracer = get_dummy_tracer()
+    thread_id = threading.current_thread().ident
+    with tracer.trace("root") as root:
+        active_spans.clear_threads({thread_id})
+        assert active_spans.get(thread_id) is root
+        active_spans.clear_threads(set())
+        assert active_spans.get(thread_id) is None
+
+
+def test_clear_dead_threads(enabled):
+    tracer = get_dummy_tracer()
+    thread_id = threading.current_thread().ident
+
+    def _trace():
+        tracer.trace("thread")
+
+    th = threading.Thread(target=_trace)
+    th.start()
+    th.join()
+    assert th.ident in active_spans._spans
+    with tracer.trace("root") as root:
+        active_spans.clear_dead_threads()
+        assert th.ident not in active_spans._spans
+        assert active_spans.get(thread_id) is root
+
+
+def test_current(enabled):
+    tracer = get_dummy_tracer()
+    assert active_spans.current() is None
+    with tracer.trace("root") as root:
+        assert active_spans.current() is root
+    assert active_spans.current() is None
+
+
+def test_enable_keeps_get_ident():
+    def get_ident():
+        return 42
+
+    active_spans.enable(get_ident)
+    active_spans.enable()
+    try:
+        assert active_spans._get_ident is get_ident
+    finally:
+        active_spans.disable()
+        active_spans.disable()
+    assert active_spans._get_ident is not get_ident
@@ -283,19 +283,19 @@ def test_flush_connection_uds(endpoint_uds_server):
     assert response.status == 200
 
 
-@mock.patch('ddtrace.internal.runtime.container.get_container_info')
-def test_api_container_info(get_container_info):
+@mock.patch('ddtrace.internal.runtime.container.get_cached_container_info')
+def test_api_container_info(get_cached_container_info):
     # When we have container information
-    # DEV: `get_container_info` will return a `CGroupInfo` with a `container_id` or `None`
+    # DEV: `get_cached_container_info` will return a `CGroupInfo` with a `container_id` or `None`
     info = CGroupInfo(container_id='test-container-id')
-    get_container_info.return_value = info
+    get_cached_container_info.return_value = info
 
     api = API(_HOST, 8126)
     assert api._container_info is info
     assert api._headers['Datadog-Container-Id'] == 'test-container-id'
 
     # When we do not have container information
-    get_container_info.return_value = None
+    get_cached_container_info.return_value = None
 
     api = API(_HOST, 8126)
     assert api._container_info is None
@@ -144,8 +144,11 @@ class TestTracingContext(BaseTestCase):
             ctx = Context()
             span = Span(tracer=None, name='fake_span')
             ctx.add_span(span)
-            span.finish()
-            assert span.get_tag(HOSTNAME_KEY) == 'test-hostname'
+            span.finished = True
+
+            # The hostname tag is set by the writer
+            trace, _ = ctx.close_span(span)
+            assert trace[0].get_tag(HOSTNAME_KEY) is None
 
     @mock.patch('ddtrace.internal.hostname.get_hostname')
     def test_get_report_hostname_disabled(self, get_hostname):
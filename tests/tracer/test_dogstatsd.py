@@ -0,0 +1,119 @@
+import threading
+
+import mock
+
+from ddtrace.internal.dogstatsd import AggregatingDogStatsd
+from ddtrace.internal.dogstatsd import aggregating
+from ddtrace.vendor.dogstatsd import DogStatsd
+
+
+def _client(**kwargs):
+    client = DogStatsd(disable_telemetry=True, **kwargs)
+    client.socket = mock.Mock()
+    return client
+
+
+def _sent(client):
+    return [c.args[0].decode("utf-8") for c in client.socket.send.mock_calls]
+
+
+def test_aggregate():
+    client = _client()
+    statsd = AggregatingDogStatsd(client)
+    statsd.increment("counter")
+    statsd.increment("counter", 2)
+    statsd.decrement("counter")
+    statsd.increment("counter", tags=["a:b"])
+    statsd.gauge("gauge", 1)
+    statsd.gauge("gauge", 3)
+    statsd.histogram("histogram", 1)
+    statsd.histogram("histogram", 2, tags=["a:b"])
+    statsd.histogram("histogram", 4, tags=["a:b"])
+    assert _sent(client) == []
+
+    statsd.flush()
+    (packet,) = _sent(client)
+    assert sorted(packet.split("\n")) == [
+        "counter:1|c|#a:b",
+        "counter:2|c",
+        "gauge:3|g",
+        "histogram:1|h",
+        "histogram:2|h|#a:b",
+        "histogram:4|h|#a:b",
+    ]
+
+    # Nothing is sent when nothing was aggregated
+    statsd.flush()
+    assert len(_sent(client)) == 1
+
+
+def test_constant_tags():
+    client = _client(constant_tags=["env:test"])
+    statsd = AggregatingDogStatsd(client)
+    statsd.increment("counter", tags=["a:b"])
+    statsd.gauge("gauge", 1)
+    statsd.flush()
+    (packet,) = _sent(client)
+    assert sorted(packet.split("\n")) == ["counter:1|c|#a:b,env:test", "gauge:1|g|#env:test"]
+
+
+def test_max_payload_size():
+    client = _client(max_buffer_len=40)
+    statsd = AggregatingDogStatsd(client)
+    for i in range(10):
+        statsd.gauge("gauge.%d" % i, 1000000)
+    statsd.flush()
+    packets = _sent(client)
+    assert len(packets) == 5
+    assert all(len(packet) <= 40 for packet in packets)
+    assert sorted(line for packet in packets for line in packet.split("\n")) == [
+        "gauge.%d:1000000|g" % i for i in range(10)
+    ]
+
+
+def test_disabled():
+    client = _client()
+    client._enabled = False
+    statsd = AggregatingDogStatsd(client)
+    statsd.increment("counter")
+    statsd.flush()
+    assert _sent(client) == []
+
+
+def test_telemetry():
+    client = DogStatsd()
+    client.socket = mock.Mock()
+    statsd = AggregatingDogStatsd(client)
+    statsd.increment("counter")
+    statsd.histogram("histogram", 1)
+    statsd.histogram("histogram", 2)
+    statsd.flush()
+    assert client.metrics_count == 3
+
+
+def test_threads():
+    client = _client()
+    statsd = AggregatingDogStatsd(client)
+
+    def _increment():
+        for _ in range(1000):
+            statsd.increment("counter")
+
+    threads = [threading.Thread(target=_increment) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    statsd.flush()
+    assert _sent(client) == ["counter:10000|c"]
+
+
+def test_aggregating():
+    client = _client()
+    statsd = aggregating(client)
+    assert isinstance(statsd, AggregatingDogStatsd)
+    assert statsd.client is client
+    assert aggregating(statsd) is statsd
+    assert aggregating(None) is None
+    flushable = mock.Mock()
+    assert aggregating(flushable) is flushable
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from ddtrace.filters import FilterRequestsOnUrl
+from ddtrace.filters import FilterRequestsOnUrl, TraceFilter, _process_traces
 from ddtrace.span import Span
 from ddtrace.ext.http import URL
 
@@ -33,3 +33,53 @@ class FilterRequestOnUrlTests(TestCase):
         filtr = FilterRequestsOnUrl([r'http://domain\.example\.com', r'http://anotherdomain\.example\.com'])
         trace = filtr.process_trace([span])
         self.assertIsNotNone(trace)
+
+    def test_process_traces(self):
+        traces = []
+        for url in ('http://domain.example.com', 'http://cooldomain.example.com', 'http://anotherdomain.example.com'):
+            span = Span(name='Name', tracer=None)
+            span.set_tag(URL, url)
+            traces.append([span])
+        filtr = FilterRequestsOnUrl([r'http://domain\.example\.com', r'http://anotherdomain\.example\.com'])
+        self.assertIsNotNone(filtr._regexp)
+        self.assertEqual(filtr.process_traces(traces), [traces[1]])
+
+    def test_backreference_not_combined(self):
+        span = Span(name='Name', tracer=None)
+        span.set_tag(URL, r'http://aa.example.com')
+        filtr = FilterRequestsOnUrl([r'http://(b)\1\.example\.com', r'http://(a)\1\.example\.com'])
+        self.assertIsNone(filtr._regexp)
+        self.assertEqual(filtr.process_traces([[span]]), [])
+
+    def test_no_regexps(self):
+        span = Span(name='Name', tracer=None)
+        span.set_tag(URL, r'http://example.com')
+        filtr = FilterRequestsOnUrl([])
+        self.assertEqual(filtr.process_traces([[span]]), [[span]])
+
+
+class ProcessTracesTests(TestCase):
+    def test_filters_chain(self):
+        class DropOdd(TraceFilter):
+            def process_trace(self, trace):
+                if trace[0].span_id % 2:
+                    return None
+                return trace
+
+        class Fail(object):
+            def process_trace(self, trace):
+                if trace[0].span_id == 2:
+                    raise ValueError()
+                return trace[1:]
+
+        traces = [[Span(name='Name', tracer=None, span_id=i), Span(name='Name', tracer=None)] for i in (1, 2, 3, 4)]
+        processed = _process_traces([DropOdd(), Fail()], traces)
+        # The filter failing keeps the trace unchanged
+        self.assertEqual([len(t) for t in processed], [2, 1])
+
+    def test_drop_all(self):
+        class DropAll(object):
+            def process_traces(self, traces):
+                return None
+
+        self.assertEqual(_process_traces([DropAll()], [[Span(name='Name', tracer=None)]]), [])
@@ -0,0 +1,42 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+def _modules_imported_by(code):
+    output = subprocess.check_output(
+        [sys.executable, "-c", code + "; import json, sys; print(json.dumps(sorted(sys.modules)))"]
+    )
+    return set(json.loads(output.decode().strip().splitlines()[-1]))
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "ddtrace.contrib",
+        "ddtrace.internal.debug",
+        "ddtrace.internal.runtime.runtime_metrics",
+        "ddtrace.opentracer",
+        "ddtrace.profiling",
+        "ddtrace.vendor.psutil",
+        pytest.param(
+            "pkg_resources", marks=pytest.mark.skipif(sys.version_info < (3, 8), reason="importlib.metadata is needed")
+        ),
+        pytest.param("asyncio", marks=pytest.mark.skipif(sys.version_info < (3, 4), reason="asyncio is needed")),
+        pytest.param("http.server", marks=pytest.mark.skipif(sys.version_info < (3,), reason="Python 3 module name")),
+    ],
+)
+def test_lazy_import(module):
+    """Optional subsystems are only imported when used."""
+    modules = _modules_imported_by("import ddtrace")
+    assert "ddtrace.tracer" in modules
+    assert module not in modules
+
+
+def test_runtime_metrics_import():
+    modules = _modules_imported_by(
+        "import ddtrace; ddtrace.tracer.configure(collect_metrics=True); ddtrace.tracer.shutdown()"
+    )
+    assert "ddtrace.internal.runtime.runtime_metrics" in modules
@@ -0,0 +1,100 @@
+import mock
+
+from ddtrace.constants import HOSTNAME_KEY
+from ddtrace.internal import processor
+from ddtrace.internal.writer import AgentWriter, LogWriter
+from ddtrace.span import Span
+from tests import override_global_config
+
+
+class RecordProcessor(processor.SpanProcessor):
+    def __init__(self, calls, stage=processor.ENRICHMENT):
+        self.calls = calls
+        self.stage = stage
+
+    def process_trace(self, trace):
+        self.calls.append(self)
+
+
+class FailingProcessor(processor.SpanProcessor):
+    def process_trace(self, trace):
+        raise ValueError()
+
+
+def test_chain_order():
+    calls = []
+    normalize = RecordProcessor(calls, processor.NORMALIZATION)
+    obfuscate = RecordProcessor(calls, processor.OBFUSCATION)
+    enrich1 = RecordProcessor(calls, processor.ENRICHMENT)
+    enrich2 = RecordProcessor(calls, processor.ENRICHMENT)
+    chain = processor.SpanProcessorChain([normalize, enrich1, obfuscate, enrich2])
+    chain.register(enrich1)
+    assert list(chain) == [enrich1, enrich2, obfuscate, normalize]
+
+    durations = chain.process_traces([[Span(None, "span")]])
+    assert calls == [enrich1, enrich2, obfuscate, normalize]
+    assert [p for p, _ in durations] == [enrich1, enrich2, obfuscate, normalize]
+    assert all(d >= 0 for _, d in durations)
+
+    chain.unregister(obfuscate)
+    assert list(chain) == [enrich1, enrich2, normalize]
+
+
+def test_chain_failing_processor():
+    calls = []
+    record = RecordProcessor(calls, processor.NORMALIZATION)
+    chain = processor.SpanProcessorChain([FailingProcessor(), record])
+    chain.process_traces([[Span(None, "span")]])
+    assert calls == [record]
+
+
+@mock.patch("ddtrace.internal.hostname.get_hostname")
+def test_hostname_processor(get_hostname):
+    get_hostname.return_value = "test-hostname"
+    traces = [[Span(None, "root"), Span(None, "child")], []]
+
+    with override_global_config(dict(report_hostname=False)):
+        processor.HostnameProcessor().process_traces(traces)
+    assert traces[0][0].get_tag(HOSTNAME_KEY) is None
+
+    with override_global_config(dict(report_hostname=True)):
+        processor.HostnameProcessor().process_traces(traces)
+    assert traces[0][0].get_tag(HOSTNAME_KEY) == "test-hostname"
+    assert traces[0][1].get_tag(HOSTNAME_KEY) is None
+
+
+def test_writers_apply_processors():
+    calls = []
+    record = RecordProcessor(calls)
+    chain = processor.SpanProcessorChain([record])
+
+    writer = AgentWriter(processors=chain)
+    assert writer.recreate()._processors is chain
+    writer.api = mock.Mock()
+    writer.api.send_traces.return_value = []
+    writer.write([Span(None, "span")])
+    writer.stop()
+    writer.join()
+    assert calls == [record]
+
+    out = mock.Mock()
+    LogWriter(out=out, processors=chain).write([Span(None, "span")])
+    assert calls == [record, record]
+    assert AgentWriter()._processors is processor.processors
+
+
+def test_elasticsearch_quantize_processor():
+    from ddtrace.contrib.elasticsearch.quantize import QuantizeProcessor
+    from ddtrace.ext import SpanTypes, elasticsearch
+
+    span = Span(None, "elasticsearch.query", span_type=SpanTypes.ELASTICSEARCH)
+    span.set_tag(elasticsearch.METHOD, "GET")
+    span.set_tag(elasticsearch.URL, "/index-2020/doc/10")
+    unsampled = Span(None, "elasticsearch.query", span_type=SpanTypes.ELASTICSEARCH)
+    other = Span(None, "web.request", resource="/10")
+    other.set_tag(elasticsearch.URL, "/10")
+
+    QuantizeProcessor().process_traces([[span, unsampled, other]])
+    assert span.resource == "GET /index-?/doc/?"
+    assert unsampled.resource == "elasticsearch.query"
+    assert other.resource == "/10"
@@ -0,0 +1,110 @@
+import gc
+import sys
+import threading
+
+import pytest
+
+from ddtrace.context import Context
+from ddtrace.internal import gc_timer
+from ddtrace.internal import resource_accounting
+from ddtrace.internal.runtime.constants import SPAN_ALLOCATED_BYTES
+from ddtrace.internal.runtime.constants import SPAN_CPU_TIME
+from ddtrace.internal.runtime.constants import SPAN_GC_TIME
+from tests import DummyTracer
+from tests import override_env
+
+
+try:
+    from ddtrace.profiling.collector import _memalloc
+except ImportError:
+    _memalloc = None
+
+
+@pytest.fixture
+def tracer():
+    resource_accounting.enable()
+    tracer = DummyTracer()
+    tracer._resource_accounting = True
+    try:
+        yield tracer
+    finally:
+        resource_accounting.disable()
+
+
+def test_disabled():
+    tracer = DummyTracer()
+    assert not tracer._resource_accounting
+    with tracer.trace("root") as root:
+        pass
+    assert root._resource_usage is None
+    assert root.get_metric(SPAN_CPU_TIME) is None
+    assert root.get_metric(SPAN_GC_TIME) is None
+
+
+def test_enabled_with_env():
+    with override_env(dict(DD_TRACE_RESOURCE_ACCOUNTING_ENABLED="true")):
+        tracer = DummyTracer()
+    try:
+        assert tracer._resource_accounting
+        assert gc_timer.total_ns() is not None
+    finally:
+        resource_accounting.disable()
+    assert gc_timer.total_ns() is None
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 7) and not sys.platform.startswith("linux"), reason="Thread CPU time is not available"
+)
+def test_cpu_time(tracer):
+    with tracer.trace("root") as root:
+        with tracer.trace("child") as child:
+            sum(range(1000000))
+    assert root.get_metric(SPAN_CPU_TIME) > 0
+    assert root.get_metric(SPAN_CPU_TIME) <= root.duration
+    assert child.get_metric(SPAN_CPU_TIME) is None
+
+
+@pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+def test_gc_time(tracer):
+    with tracer.trace("root") as root:
+        gc.collect()
+    assert root.get_metric(SPAN_GC_TIME) > 0
+
+
+@pytest.mark.skipif(_memalloc is None, reason="The memory profiler is not available")
+def test_allocated_bytes(tracer):
+    with tracer.trace("root") as root:
+        pass
+    assert root.get_metric(SPAN_ALLOCATED_BYTES) is None
+
+    _memalloc.start(32, 1000)
+    try:
+        with tracer.trace("root") as root:
+            objects = [object() for _ in range(10000)]
+    finally:
+        _memalloc.stop()
+    del objects
+    assert root.get_metric(SPAN_ALLOCATED_BYTES) >= 10000 * sys.getsizeof(object())
+
+
+def test_dropped_trace(tracer):
+    root = tracer.start_span("root", child_of=Context(trace_id=1, span_id=2, sampling_priority=0))
+    assert root._resource_usage is None
+    root.finish()
+    assert root.get_metric(SPAN_CPU_TIME) is None
+    assert root.get_metric(SPAN_GC_TIME) is None
+
+    # Kept distributed trace
+    root = tracer.start_span("root", child_of=Context(trace_id=1, span_id=2, sampling_priority=1))
+    assert root._resource_usage is not None
+    root.finish()
+
+
+@pytest.mark.skipif(not hasattr(gc, "callbacks"), reason="gc.callbacks is not available")
+def test_finished_by_another_thread(tracer):
+    root = tracer.trace("root")
+    th = threading.Thread(target=root.finish)
+    th.start()
+    th.join()
+    assert root.get_metric(SPAN_CPU_TIME) is None
+    assert root.get_metric(SPAN_GC_TIME) is not None
@@ -10,8 +10,10 @@ from ddtrace.compat import iteritems
 from ddtrace.constants import SAMPLING_PRIORITY_KEY, SAMPLE_RATE_METRIC_KEY
 from ddtrace.constants import SAMPLING_AGENT_DECISION, SAMPLING_RULE_DECISION, SAMPLING_LIMIT_DECISION
 from ddtrace.ext.priority import AUTO_KEEP, AUTO_REJECT
+from ddtrace.internal import _sampling
+from ddtrace.internal._rand import rand64bits
 from ddtrace.internal.rate_limiter import RateLimiter
-from ddtrace.sampler import DatadogSampler, SamplingRule
+from ddtrace.sampler import DatadogSampler, SamplingRule, KNUTH_FACTOR, MAX_TRACE_ID
 from ddtrace.sampler import RateSampler, AllSampler, RateByServiceSampler
 from ddtrace.span import Span
 
@@ -188,6 +190,29 @@ class RateByServiceSamplerTest(unittest.TestCase):
                 rates[k] = v.sample_rate
             assert case == rates, '%s != %s' % (case, rates)
 
+    def test_update_rate_by_service_sample_rates_copy_on_write(self):
+        priority_sampler = RateByServiceSampler()
+        samplers = priority_sampler._by_service_samplers
+        default_sampler = samplers[RateByServiceSampler._default_key]
+
+        priority_sampler.update_rate_by_service_sample_rates({'service:mcnulty,env:dev': 0.5})
+        # The previous samplers are never modified in place
+        assert list(samplers) == [RateByServiceSampler._default_key]
+        new_samplers = priority_sampler._by_service_samplers
+        assert new_samplers is not samplers
+        assert new_samplers[RateByServiceSampler._default_key] is default_sampler
+        mcnulty_sampler = new_samplers['service:mcnulty,env:dev']
+
+        # Unchanged rates keep their sampler
+        priority_sampler.update_rate_by_service_sample_rates(
+            {'service:mcnulty,env:dev': 0.5, 'service:postgres,env:dev': 0.7}
+        )
+        assert priority_sampler._by_service_samplers['service:mcnulty,env:dev'] is mcnulty_sampler
+
+        priority_sampler.set_sample_rate(0.1, service='redis')
+        assert 'service:redis,env:' not in new_samplers
+        assert priority_sampler._by_service_samplers['service:redis,env:'].sample_rate == 0.1
+
 
 @pytest.mark.parametrize(
     'sample_rate,allowed',
@@ -877,3 +902,19 @@ def test_datadog_sampler_update_rate_by_service_sample_rates(dummy_tracer):
         for k, v in iteritems(sampler.default_sampler._by_service_samplers):
             rates[k] = v.sample_rate
         assert case == rates, '%s != %s' % (case, rates)
+
+
+@pytest.mark.parametrize('sample_rate', [0.0, 1e-9, 0.1, 0.33, 0.5, 0.999999, 1.0 - 2 ** -53, 1.0])
+def test_sampling_kernel(sample_rate):
+    threshold = _sampling.threshold(sample_rate)
+    trace_ids = [0, 1, 2 ** 63, 2 ** 64 - 1] + [rand64bits() for _ in range(10000)]
+    expected = [((trace_id * KNUTH_FACTOR) % MAX_TRACE_ID) <= sample_rate * MAX_TRACE_ID for trace_id in trace_ids]
+    assert [_sampling.sample(trace_id, threshold) for trace_id in trace_ids] == expected
+    assert _sampling.sample_many(trace_ids, threshold) == expected
+
+
+def test_sampling_kernel_out_of_range_trace_id():
+    threshold = _sampling.threshold(0.5)
+    for trace_id in (2 ** 64, 2 ** 70 + 12345, -1, -(2 ** 65)):
+        expected = ((trace_id * KNUTH_FACTOR) % MAX_TRACE_ID) <= 0.5 * MAX_TRACE_ID
+        assert _sampling.sample(trace_id, threshold) is expected
@@ -0,0 +1,139 @@
+import json
+
+import mock
+import pytest
+
+from ddtrace import Pin
+from ddtrace.contrib import trace_utils
+from ddtrace.internal import self_telemetry
+from ddtrace.vendor import wrapt
+from ddtrace.vendor.six.moves.urllib.request import urlopen
+from tests import DummyTracer
+from tests import override_env
+
+
+@pytest.fixture
+def telemetry():
+    self_telemetry.enable()
+    try:
+        yield self_telemetry
+    finally:
+        self_telemetry.disable()
+
+
+@pytest.mark.parametrize("value", [0, 1, 7, 8, 9, 15, 16, 100, 1000, 123456789, 2 ** 62])
+def test_histogram_buckets(value):
+    histogram = self_telemetry.Histogram()
+    histogram.record(value)
+    assert histogram.count == 1
+    assert histogram.total == value
+    assert histogram.max == value
+    index = histogram._bucket(value)
+    if index < histogram.NBUCKETS - 1:
+        assert value < histogram._bucket_upper_bound(index)
+        if index > 0:
+            assert value >= histogram._bucket_upper_bound(index - 1)
+
+
+def test_histogram_percentiles():
+    histogram = self_telemetry.Histogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.percentile(50) >= 500
+    assert histogram.percentile(50) <= 500 * 1.25
+    assert histogram.percentile(99) >= 990
+    assert histogram.percentile(99) <= 1000
+    assert histogram.to_dict() == {
+        "count": 1000,
+        "mean_ns": 500,
+        "max_ns": 1000,
+        "p50_ns": histogram.percentile(50),
+        "p95_ns": histogram.percentile(95),
+        "p99_ns": histogram.percentile(99),
+    }
+    assert self_telemetry.Histogram().percentile(50) == 0
+
+
+def test_disabled():
+    assert not self_telemetry.enabled
+    tracer = DummyTracer()
+    with tracer.trace("root"):
+        pass
+    assert self_telemetry.snapshot() == {}
+
+
+def test_enabled_with_env():
+    with override_env(dict(DD_TRACE_SELF_TELEMETRY_ENABLED="true")):
+        DummyTracer()
+    try:
+        assert self_telemetry.enabled
+    finally:
+        self_telemetry.disable()
+
+
+def test_tracer(telemetry):
+    tracer = DummyTracer()
+    with tracer.trace("root"):
+        with tracer.trace("child"):
+            pass
+
+    snapshot = telemetry.snapshot()
+    assert snapshot["tracer.start_span"]["count"] == 2
+    assert snapshot["span.finish"]["count"] == 2
+    assert snapshot["context.close_span"]["count"] == 2
+    assert snapshot["tracer.write"]["count"] == 1
+    for histogram in snapshot.values():
+        assert histogram["max_ns"] > 0
+
+
+def test_integration(telemetry):
+    class Module(object):
+        __name__ = "module"
+
+        @staticmethod
+        def func(x):
+            return x + 1
+
+    @trace_utils.with_traced_module
+    def traced_func(mod, pin, wrapped, instance, args, kwargs):
+        assert wrapped.__name__ == "func"
+        return wrapped(*args, **kwargs) * 2
+
+    mod = Module()
+    Pin().onto(mod)
+    wrapt.wrap_function_wrapper(mod, "func", traced_func(mod))
+
+    assert mod.func(1) == 4
+    assert telemetry.snapshot()["integration.module"]["count"] == 1
+
+
+def test_report(telemetry):
+    telemetry.record("op", 1000)
+    telemetry.record("op", 2000)
+
+    dogstatsd = mock.Mock()
+    telemetry.report(dogstatsd)
+    tags = ["operation:op"]
+    dogstatsd.increment.assert_called_once_with("datadog.tracer.instrumentation.count", 2, tags=tags)
+    dogstatsd.gauge.assert_any_call("datadog.tracer.instrumentation.duration.max", 2000, tags=tags)
+    dogstatsd.gauge.assert_any_call("datadog.tracer.instrumentation.duration.99percentile", 2000, tags=tags)
+
+    # Only the values recorded since the last report are sent, but all of them are kept in the snapshot
+    dogstatsd.reset_mock()
+    telemetry.report(dogstatsd)
+    dogstatsd.increment.assert_not_called()
+    telemetry.record("op", 3000)
+    assert telemetry.snapshot()["op"]["count"] == 3
+    assert telemetry.snapshot()["op"]["max_ns"] == 3000
+
+
+def test_debug_server(telemetry):
+    telemetry.record("op", 1000)
+    server = self_telemetry.DebugServer(0)
+    server.start()
+    try:
+        response = urlopen("http://127.0.0.1:%d/" % server.port)
+        assert response.getcode() == 200
+        assert json.loads(response.read().decode("utf-8")) == telemetry.snapshot()
+    finally:
+        server.stop()
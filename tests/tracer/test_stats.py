@@ -0,0 +1,142 @@
+import mock
+import pytest
+
+from ddtrace.api import API
+from ddtrace.constants import SPAN_MEASURED_KEY
+from ddtrace.ext import http
+from ddtrace.internal import sketch
+from ddtrace.internal.stats import SpanStatsConcentrator
+from ddtrace.internal.writer import AgentWriter
+from ddtrace.span import Span
+from tests import override_global_config
+
+
+BUCKET_SIZE = int(10 * 1e9)
+
+
+def _span(name="web.request", service="web", resource="/", parent_id=None, span_id=None, start_ns=0, duration_ns=1):
+    span = Span(None, name, service=service, resource=resource, parent_id=parent_id, span_id=span_id)
+    span.start_ns = start_ns
+    span.duration_ns = duration_ns
+    return span
+
+
+@pytest.mark.parametrize("quantile", [0.1, 0.5, 0.9, 0.99])
+def test_sketch_relative_accuracy(quantile):
+    s = sketch.DDSketch()
+    values = list(range(1, 10001))
+    for v in values:
+        s.add(v)
+
+    expected = values[int(quantile * (len(values) - 1))]
+    assert abs(s.get_quantile_value(quantile) - expected) <= expected * s.relative_accuracy
+
+
+def test_sketch_zero_and_empty():
+    s = sketch.DDSketch()
+    assert s.get_quantile_value(0.5) is None
+    s.add(0)
+    assert s.zero_count == 1
+    assert s.get_quantile_value(0.5) == 0.0
+
+
+def test_sketch_max_bins():
+    s = sketch.DDSketch(max_bins=10)
+    for v in range(1, 100000, 7):
+        s.add(v)
+    assert len(s.bins) <= 10
+    assert sum(s.bins.values()) == s.count
+
+
+def test_sketch_to_proto():
+    s = sketch.DDSketch()
+    assert s.to_proto().startswith(b"\x0a\x09\x09")
+    s.add(1000)
+    s.add(0)
+    encoded = s.to_proto()
+    # mapping, positive store, zero count
+    assert encoded[0:1] == b"\x0a"
+    assert encoded[11:12] == b"\x12"
+    assert encoded[-9:] == b"\x21" + b"\x00\x00\x00\x00\x00\x00\xf0\x3f"
+
+
+def test_concentrator_top_level_and_measured():
+    concentrator = SpanStatsConcentrator(bucket_size_ns=BUCKET_SIZE)
+    root = _span(span_id=1, duration_ns=100)
+    child = _span(name="child", parent_id=1, span_id=2, duration_ns=10)
+    measured = _span(name="measured", parent_id=1, span_id=3, duration_ns=20)
+    measured.set_tag(SPAN_MEASURED_KEY)
+    other_service = _span(name="db.query", service="db", parent_id=1, span_id=4, duration_ns=30)
+    concentrator.add_trace([root, child, measured, other_service])
+
+    payload = concentrator.flush(now_ns=BUCKET_SIZE)
+    assert len(payload["Stats"]) == 1
+    stats = {s["Name"]: s for s in payload["Stats"][0]["Stats"]}
+    assert sorted(stats) == ["db.query", "measured", "web.request"]
+    assert stats["web.request"]["TopLevelHits"] == 1
+    assert stats["measured"]["TopLevelHits"] == 0
+    assert stats["measured"]["Hits"] == 1
+    assert stats["db.query"]["TopLevelHits"] == 1
+    assert stats["db.query"]["Duration"] == 30
+
+
+def test_concentrator_aggregation_key():
+    concentrator = SpanStatsConcentrator(bucket_size_ns=BUCKET_SIZE)
+    for status_code, error in ((200, 0), (200, 0), (500, 1)):
+        span = _span(duration_ns=50)
+        span.set_tag(http.STATUS_CODE, status_code)
+        span.error = error
+        concentrator.add_trace([span])
+
+    payload = concentrator.flush(now_ns=BUCKET_SIZE)
+    stats = {s["HTTPStatusCode"]: s for s in payload["Stats"][0]["Stats"]}
+    assert stats[200]["Hits"] == 2
+    assert stats[200]["Errors"] == 0
+    assert stats[200]["Duration"] == 100
+    assert stats[500]["Hits"] == 1
+    assert stats[500]["Errors"] == 1
+    assert isinstance(stats[500]["ErrorSummary"], bytes)
+
+
+def test_concentrator_buckets():
+    concentrator = SpanStatsConcentrator(bucket_size_ns=BUCKET_SIZE)
+    concentrator.add_trace([_span(start_ns=0, duration_ns=1)])
+    concentrator.add_trace([_span(start_ns=BUCKET_SIZE, duration_ns=1)])
+    # Unfinished spans are ignored
+    concentrator.add_trace([_span(start_ns=BUCKET_SIZE, duration_ns=None)])
+    assert len(concentrator) == 2
+
+    assert concentrator.flush(now_ns=BUCKET_SIZE - 1) is None
+
+    payload = concentrator.flush(now_ns=BUCKET_SIZE)
+    assert [b["Start"] for b in payload["Stats"]] == [0]
+    assert payload["Sequence"] == 1
+    assert len(concentrator) == 1
+
+    payload = concentrator.flush(now_ns=BUCKET_SIZE, force=True)
+    assert [b["Start"] for b in payload["Stats"]] == [BUCKET_SIZE]
+    assert payload["Sequence"] == 2
+    assert len(concentrator) == 0
+
+
+def test_api_send_stats():
+    api = API("localhost", 8126, client_computed_stats=True)
+    assert api._headers[API.CLIENT_COMPUTED_STATS_HEADER] == "yes"
+    with mock.patch.object(api, "_put") as put:
+        api.send_stats({"Stats": []})
+    put.assert_called_once_with(API.STATS_ENDPOINT, mock.ANY, headers={"Content-Type": "application/msgpack"})
+
+
+def test_writer_flush_stats():
+    with override_global_config(dict(_compute_stats=True)):
+        writer = AgentWriter()
+    assert writer._stats_concentrator is not None
+    writer.api = mock.Mock()
+    writer.api.send_traces.return_value = []
+    writer.api.send_stats.return_value = mock.Mock(status=200)
+    writer.write([_span(duration_ns=10)])
+    writer.stop()
+    writer.join()
+    writer.api.send_stats.assert_called_once()
+    (payload,), _ = writer.api.send_stats.call_args
+    assert payload["Stats"][0]["Stats"][0]["Hits"] == 1
@@ -16,7 +16,7 @@ import pytest
 import ddtrace
 from ddtrace.ext import system
 from ddtrace.context import Context
-from ddtrace.constants import VERSION_KEY, ENV_KEY
+from ddtrace.constants import HOSTNAME_KEY, VERSION_KEY, ENV_KEY
 from ddtrace.vendor import six
 
 from tests.subprocesstest import run_in_subprocess
@@ -443,6 +443,7 @@ class TracerTestCases(TracerTestCase):
 
         # configure tracer with runtime metrics collection
         self.tracer.configure(collect_metrics=True)
+        self.addCleanup(self.tracer.configure, collect_metrics=False)
         self.assertIsNotNone(self.tracer._runtime_worker)
 
     def test_configure_dogstatsd_host(self):
@@ -497,6 +498,7 @@ class TracerTestCases(TracerTestCase):
 
     def test_only_root_span_runtime_internal_span_types(self):
         self.tracer.configure(collect_metrics=True)
+        self.addCleanup(self.tracer.configure, collect_metrics=False)
 
         for span_type in ("custom", "template", "web", "worker"):
             root = self.start_span("root", span_type=span_type)
@@ -509,6 +511,7 @@ class TracerTestCases(TracerTestCase):
 
     def test_only_root_span_runtime_external_span_types(self):
         self.tracer.configure(collect_metrics=True)
+        self.addCleanup(self.tracer.configure, collect_metrics=False)
 
         for span_type in (
             "algoliasearch.search",
@@ -1222,3 +1225,50 @@ def test_unicode_config_vals():
         with t.trace("1"):
             pass
     t.shutdown()
+
+
+def test_filters_custom_writer():
+    class FilterAll(object):
+        def process_trace(self, trace):
+            return None
+
+    class CustomWriter(object):
+        def __init__(self):
+            self.spans = []
+
+        def write(self, spans=None, services=None):
+            self.spans.extend(spans)
+
+    t = ddtrace.Tracer()
+    t.configure(settings={"FILTERS": [FilterAll()]})
+    t.writer = CustomWriter()
+
+    with t.trace("root"):
+        pass
+
+    assert t.writer.spans == []
+
+    t.configure(settings={"FILTERS": []})
+    with t.trace("root"):
+        pass
+
+    assert len(t.writer.spans) == 1
+
+
+def test_processors_custom_writer():
+    class CustomWriter(object):
+        def __init__(self):
+            self.spans = []
+
+        def write(self, spans=None, services=None):
+            self.spans.extend(spans)
+
+    t = ddtrace.Tracer()
+    t.writer = CustomWriter()
+
+    with override_global_config(dict(report_hostname=True)):
+        with mock.patch("ddtrace.internal.hostname.get_hostname", return_value="test-hostname"):
+            with t.trace("root"):
+                pass
+
+    assert t.writer.spans[0].get_tag(HOSTNAME_KEY) == "test-hostname"
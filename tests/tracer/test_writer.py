@@ -3,9 +3,10 @@ import time
 import mock
 
 from ddtrace.span import Span
-from ddtrace.api import API
+from ddtrace.api import API, Response
 from ddtrace.internal.writer import AgentWriter, LogWriter
 from ddtrace.payload import PayloadFull
+from ddtrace.vendor.dogstatsd import DogStatsd
 from tests import BaseTestCase
 
 MAX_NUM_SPANS = 7
@@ -51,10 +52,12 @@ class FailingAPI(object):
 class AgentWriterTests(BaseTestCase):
     N_TRACES = 11
 
-    def create_worker(self, api_class=DummyAPI, enable_stats=False, num_traces=N_TRACES, num_spans=MAX_NUM_SPANS):
+    def create_worker(
+        self, api_class=DummyAPI, enable_stats=False, num_traces=N_TRACES, num_spans=MAX_NUM_SPANS, filters=None
+    ):
         with self.override_global_config(dict(health_metrics_enabled=enable_stats)):
             self.dogstatsd = mock.Mock()
-            worker = AgentWriter(dogstatsd=self.dogstatsd)
+            worker = AgentWriter(dogstatsd=self.dogstatsd, filters=filters)
             worker._STATS_EVERY_INTERVAL = 1
             self.api = api_class()
             worker.api = self.api
@@ -81,6 +84,18 @@ class AgentWriterTests(BaseTestCase):
         with self.override_global_config(dict(health_metrics_enabled=True)):
             assert worker._send_stats is False
 
+    def test_dogstatsd_client(self):
+        # The vendored client cannot be flushed: the writer aggregates the metrics itself
+        client = DogStatsd(disable_telemetry=True)
+        client.socket = mock.Mock()
+        with self.override_global_config(dict(health_metrics_enabled=True)):
+            worker = AgentWriter(dogstatsd=client)
+            worker.api = DummyAPI()
+            worker.run_periodic()
+            worker.on_shutdown()
+        assert worker.dogstatsd.client is client
+        assert client.socket.send.mock_calls
+
     def test_no_dogstats(self):
         worker = self.create_worker()
         assert worker._send_stats is False
@@ -110,6 +125,7 @@ class AgentWriterTests(BaseTestCase):
         histogram_calls = [
             mock.call("datadog.tracer.flush.traces", 11, tags=None),
             mock.call("datadog.tracer.flush.spans", 77, tags=None),
+            mock.call("datadog.tracer.processor.duration", mock.ANY, tags=["processor:HostnameProcessor"]),
             mock.call("datadog.tracer.api.requests", 11, tags=None),
             mock.call("datadog.tracer.api.errors", 0, tags=None),
             mock.call("datadog.tracer.api.traces_payloadfull", 0, tags=None),
@@ -144,6 +160,7 @@ class AgentWriterTests(BaseTestCase):
         histogram_calls = [
             mock.call("datadog.tracer.flush.traces", 1, tags=None),
             mock.call("datadog.tracer.flush.spans", num_spans, tags=None),
+            mock.call("datadog.tracer.processor.duration", mock.ANY, tags=["processor:HostnameProcessor"]),
             mock.call("datadog.tracer.api.requests", 1, tags=None),
             mock.call("datadog.tracer.api.errors", 0, tags=None),
             mock.call("datadog.tracer.api.traces_payloadfull", 1, tags=None),
@@ -176,6 +193,7 @@ class AgentWriterTests(BaseTestCase):
         histogram_calls = [
             mock.call("datadog.tracer.flush.traces", 11, tags=None),
             mock.call("datadog.tracer.flush.spans", 77, tags=None),
+            mock.call("datadog.tracer.processor.duration", mock.ANY, tags=["processor:HostnameProcessor"]),
             mock.call("datadog.tracer.api.requests", 1, tags=None),
             mock.call("datadog.tracer.api.errors", 1, tags=None),
             mock.call("datadog.tracer.api.traces_payloadfull", 0, tags=None),
@@ -185,6 +203,43 @@ class AgentWriterTests(BaseTestCase):
 
         assert histogram_calls == self.dogstatsd.histogram.mock_calls
 
+    def test_dogstatsd_filtered_traces(self):
+        class FilterAll(object):
+            def process_trace(self, trace):
+                return None
+
+        self.create_worker(enable_stats=True, filters=[FilterAll()])
+        assert [] == self.api.traces
+
+        assert [
+            mock.call("datadog.tracer.flushes"),
+            mock.call("datadog.tracer.flush.traces.total", 11, tags=None),
+            mock.call("datadog.tracer.flush.spans.total", 77, tags=None),
+            mock.call("datadog.tracer.api.requests.total", 0, tags=None),
+            mock.call("datadog.tracer.api.errors.total", 0, tags=None),
+            mock.call("datadog.tracer.api.traces_payloadfull.total", 0, tags=None),
+            mock.call("datadog.tracer.queue.dropped.traces", 0),
+            mock.call("datadog.tracer.queue.enqueued.traces", 11),
+            mock.call("datadog.tracer.queue.enqueued.spans", 77),
+            mock.call("datadog.tracer.shutdown"),
+        ] == self.dogstatsd.increment.mock_calls
+
+    def test_rate_by_service_unchanged_body(self):
+        priority_sampler = mock.Mock()
+        worker = AgentWriter(priority_sampler=priority_sampler)
+        body = b'{"rate_by_service": {"service:,env:": 0.5}}'
+        responses = [Response(status=200, body=body), Response(status=200, body=body)]
+        with mock.patch.object(Response, "get_json", autospec=True, side_effect=Response.get_json) as get_json:
+            for response in responses:
+                worker._update_rate_by_service_sample_rates(response)
+            # The second response is not parsed again
+            assert get_json.call_count == 1
+            priority_sampler.update_rate_by_service_sample_rates.assert_called_once_with({"service:,env:": 0.5})
+
+            worker._update_rate_by_service_sample_rates(Response(status=200, body=b'{"rate_by_service": {}}'))
+            assert get_json.call_count == 2
+            assert priority_sampler.update_rate_by_service_sample_rates.call_count == 2
+
 
 class LogWriterTests(BaseTestCase):
     N_TRACES = 11